@@ -55,6 +55,10 @@ OUTPUT_DIR = DATA_DIR + r"\sharpshooter_parsed"
 
 label_df = pd.read_csv(CSV_PATH)
 
+# header-only index of the recordings (annotations, sample counts, ...), so
+# finding the file and channel for a bug ID never reads any sample data
+catalog = wdq.build_catalog(DATA_DIR)
+
 for bug_id in BUG_IDS:
     print(f"Parsing {bug_id}...")
 
@@ -78,12 +82,9 @@ for bug_id in BUG_IDS:
     # Only works if there is are no duplicate reps. Additional duplicate reps are ignored
     pattern = re.compile(rf"(?:^|_)({re.escape(rep)})(?:_|$)")
     filepath = [
-        str(path) for path in Path(DATA_DIR).rglob(f"*{rep}*")
-        if pattern.search(path.stem)
+        path for path in catalog
+        if pattern.search(Path(path).stem)
     ][0]
-
-
-    daq = wdq.windaq(filepath)
     
     # Find channel ID if it's not in bug ID
     if channel_id is None:
@@ -94,7 +95,7 @@ for bug_id in BUG_IDS:
         # Normalize for their treatment typos (- vs _, infec vs infect)
         treatment_regex = treatment.replace("-", "[-_]").replace("infec", "infect?")
         treatment_pattern = re.compile(treatment_regex, re.IGNORECASE)
-        channel_annotations = [daq.chAnnotation(x+1) for x in range(8)]
+        channel_annotations = catalog[filepath]["annotations"][:8]
 
         # Normalize for their post typos (post vs pos)
         post_pattern = re.compile(r"\bpos(?:t)?\b", re.IGNORECASE)
@@ -113,10 +114,12 @@ for bug_id in BUG_IDS:
             print("No matching channel found in .WDQ file. Skipping ID.")
             continue
     
+    daq = wdq.windaq(filepath, mmap=True)
     df = pd.DataFrame(columns = ["time", "pre_rect", "post_rect", "labels"])
     df["time"] = daq.time().astype("float32").round(3)
-    df["pre_rect"] = daq.data(channel_id - 1).astype("float32")
-    df["post_rect"] = daq.data(channel_id).astype("float32")
+    prepost = daq.channels([channel_id - 1, channel_id]) # float32, decoded in one pass
+    df["pre_rect"] = prepost[:, 0]
+    df["post_rect"] = prepost[:, 1]
 
     bug_id_mask = [label_df["insectno"] == csv_id]
 
@@ -24,6 +24,10 @@ TREATMENT_MAP = {
     "d": "infec-wild",
 }
 
+# header-only index of the recordings (annotations, sample counts, ...), so
+# finding the file and channel for a bug ID never reads any sample data
+catalog = wdq.build_catalog(DATA_DIR)
+
 for bug_id in BUG_IDS:
     if len(bug_id) == 4 and bug_id[1] == 0:
         txt_id = bug_id[0] + bug_id[2:]
@@ -53,12 +57,10 @@ for bug_id in BUG_IDS:
     # Only works if there is are no duplicate reps. Additional duplicate reps are ignored
     pattern = re.compile(rf"(?:^|_)({re.escape(rep)})(?:_|$)")
     filepath = [
-        str(path) for path in Path(DATA_DIR).rglob(f"*{rep}*")
-        if pattern.search(path.stem)
+        path for path in catalog
+        if pattern.search(Path(path).stem)
     ][0]
 
-    daq = wdq.windaq(filepath)
-
     # Find channel ID if it's not in bug ID
     if channel_id is None:
         treatment = TREATMENT_MAP.get(bug_id[0])
@@ -68,7 +70,7 @@ for bug_id in BUG_IDS:
         # Normalize for their treatment typos (- vs _, infec vs infect)
         treatment_regex = treatment.replace("-", "[-_]").replace("infec", "infect?")
         treatment_pattern = re.compile(treatment_regex, re.IGNORECASE)
-        channel_annotations = [daq.chAnnotation(x+1) for x in range(8)]
+        channel_annotations = catalog[filepath]["annotations"][:8]
 
         # Normalize for their post typos (post vs pos)
         post_pattern = re.compile(r"\bpos(?:t)?\b", re.IGNORECASE)
@@ -120,10 +122,12 @@ for bug_id in BUG_IDS:
         # Create DataFrame
         label_df = pd.DataFrame(time_label_pairs, columns=["time", "label"])
     
+    daq = wdq.windaq(filepath, mmap=True)
     df = pd.DataFrame(columns = ["time", "pre_rect", "post_rect", "labels"])
     df["time"] = daq.time().astype("float32").round(3)
-    df["pre_rect"] = daq.data(channel_id - 1).astype("float32")
-    df["post_rect"] = daq.data(channel_id).astype("float32")
+    prepost = daq.channels([channel_id - 1, channel_id]) # float32, decoded in one pass
+    df["pre_rect"] = prepost[:, 0]
+    df["post_rect"] = prepost[:, 1]
 
     label_end_times = label_df["time"].to_numpy()
     label_names = label_df["label"].to_numpy()
@@ -10,6 +10,9 @@ Python 3 Version
 #!/usr/bin/python
 import struct
 import datetime
+import hashlib
+import json
+import os
 import numpy
 
 class windaq(object):
@@ -20,7 +23,7 @@ class windaq(object):
     and python library https://www.socsci.ru.nl/wilberth/python/wdq.py that does not appear to support the .wdq files created by WINDAQ/PRO+
     '''
 
-    def __init__(self, filename):
+    def __init__(self, filename, mmap = False, recover = False):
         ''' Define data types based off convention used in documentation from Dataq '''
         UI = "<H" # unsigned integer, little endian
         I  = "<h" # integer, little endian
@@ -30,9 +33,20 @@ class windaq(object):
         L  = "<l" # long, little endian
         F  = "<f" # float, little endian
 
-        ''' Open file as binary '''
+        ''' Open file as binary
+            With mmap=True only the header, channel info tables and trailer/annotations are read here,
+            ADC data is memory mapped and paged in by the OS when a channel is actually accessed
+            With recover=True a file whose header was never finalized (no trailer or annotations, e.g. a
+            windaqWriter that did not get to close) is read up to its last complete sample set on disk
+        '''
+        self.filename = filename
+        self._mmap = mmap
         with open(filename, 'rb') as self._file:
-            self._fcontents = self._file.read()
+            if mmap:
+                self._fcontents = self._file.read(8)                                                            # just enough to find the header size (element 5)
+                self._fcontents += self._file.read(struct.unpack_from(I, self._fcontents, 6)[0] - 8)            # rest of the header, including the channel info tables
+            else:
+                self._fcontents = self._file.read()
 
         ''' Read Header Info '''
         if (struct.unpack_from(B, self._fcontents, 1)[0]):                                              # max channels >= 144
@@ -47,6 +61,9 @@ class windaq(object):
         self.nSample        = (self._dataSize/(2*self.nChannels))                                       # number of samples per channel
         self._trailerSize   = struct.unpack_from(UL, self._fcontents,12)[0]                             # total number of event marker, time and date stamp, and event marker comment pointer bytes in trailer
         self._annoSize      = struct.unpack_from(UI, self._fcontents, 16)[0]                            # total number of usr annotation bytes including 1 null per channel
+        if recover and self._trailerSize == 0 and self._annoSize == 0:                                    # data after the last header patch is still on disk, keep every complete sample set
+            self._dataSize  = (os.path.getsize(filename) - self._headSize)//(2*self.nChannels)*(2*self.nChannels)
+            self.nSample    = (self._dataSize/(2*self.nChannels))
         self.timeStep       = struct.unpack_from(D,  self._fcontents, 28)[0]                            # time between channel samples: 1/(sample rate throughput / total number of acquired channels)
         e14                 = struct.unpack_from(L,  self._fcontents, 36)[0]                            # time file was opened by acquisition: total number of seconds since jan 1 1970
         e15                 = struct.unpack_from(L,  self._fcontents, 40)[0]                            # time file was written by acquisition: total number of seconds since jan 1 1970
@@ -79,39 +96,235 @@ class windaq(object):
                 self.sampleRateDivisor.append(1)
             self.phyChannel.append(struct.unpack_from(B, self._fcontents, channelOffset + 4 + 4 + 8 + 8 + 6 + 1 + 1)[0])        # describes the physical channel number
 
-        ''' read user annotations '''
-        aOffset = self._headSize + self._dataSize + self._trailerSize
-        aTemp = ''
-        for i in range(0, self._annoSize):
-            aTemp += struct.unpack_from('c', self._fcontents, aOffset + i)[0].decode("utf-8")
-        self._annotations = aTemp.split('\x00')
+        ''' packed files store a channel with sample rate divisor d only in every d-th sample set. the sets repeat in a frame
+            of lcm(divisors) sample sets, work out which words of the frame belong to each channel (one word per channel
+            per frame for unpacked files) '''
+        self._divisors = [max(d, 1) for d in self.sampleRateDivisor]                                              # a divisor of 0 is treated as 1
+        frameSets = int(numpy.lcm.reduce(self._divisors)) if self._packed else 1
+        positions = [[] for channel in range(self.nChannels)]
+        self._setOfWord = []                                                                                    # sample set (within the frame) each word of the frame belongs to
+        for sampleSet in range(frameSets):
+            for channel in range(self.nChannels):
+                if sampleSet % self._divisors[channel] == 0:
+                    positions[channel].append(len(self._setOfWord))
+                    self._setOfWord.append(sampleSet)
+        self._frameSets = frameSets
+        self._frameWords = len(self._setOfWord)
+        self._positions = [numpy.array(p, dtype=numpy.int64) for p in positions]
+        self._setOfWord = numpy.array(self._setOfWord, dtype=numpy.int64)
+        frames, rest = divmod(self._dataSize//2, self._frameWords)
+        self._sampleCount = [frames*len(p) + int(numpy.count_nonzero(p < rest)) for p in self._positions]     # samples per channel, includes a trailing partial frame
+        self._stride = []                                                                                       # word spacing of each channel's samples, 0 if not evenly spaced
+        for p in self._positions:
+            step = self._frameWords // len(p)
+            evenly = step*len(p) == self._frameWords and numpy.array_equal(p, p[0] + step*numpy.arange(len(p)))
+            self._stride.append(step if evenly else 0)
+        if self._packed:
+            self.nSample = max(self._sampleCount)                                                               # samples of the fastest channel, see sampleCount() for the others
+
+        ''' read trailer, user annotations and event marker comments, everything after the ADC data '''
+        tOffset = self._headSize + self._dataSize
+        if mmap:
+            with open(filename, 'rb') as f:
+                f.seek(tOffset)
+                tail = f.read()
+        else:
+            tail = self._fcontents[tOffset:]
+        aOffset = self._trailerSize
+        self._annotations = tail[aOffset:aOffset + self._annoSize].decode("utf-8", errors="replace").split('\x00')
+        self._markerComments = tail[aOffset + self._annoSize:]                                                 # event marker comment records, decoded on demand
+        self.eventmarkers = self._read_eventmarkers(tail[:self._trailerSize])
+
         #create a numpy view into the data for efficient reading
         dt = numpy.dtype(numpy.int16)
         dt = dt.newbyteorder('<')
-        self.npdata =  numpy.frombuffer(self._fcontents, dtype=dt,count = int(self.nSample*self.nChannels),offset = self._headSize)
+        count = self._dataSize//2
+        if not mmap:
+            self.npdata = numpy.frombuffer(self._fcontents, dtype=dt, count = count, offset = self._headSize)
+        elif count > 0:
+            self.npdata = numpy.memmap(filename, dtype=dt, mode='r', shape=(count,), offset = self._headSize)       # read only, pages are loaded on first access
+        else:
+            self.npdata = numpy.empty(0, dtype=dt)                                                              # numpy.memmap cannot map an empty region
+
+    ''' compact description of one event marker, see _read_eventmarkers '''
+    EVENTMARKER_DTYPE = numpy.dtype([
+        ('index', '<i8'),                                                                                   # sample set (time in units of timeStep) the marker points to, the sample index of unpacked files
+        ('type', 'u1'),                                                                                     # bit 0 set: marker has a time and date stamp, bit 1 set: marker has a comment
+        ('timestamp', '<i8'),                                                                               # seconds since jan 1 1970, 0 if not stamped
+        ('textOffset', '<i8'),                                                                              # offset of the comment text in the comment block, -1 if no comment
+    ])
+    STAMPED = 1
+    COMMENTED = 2
+
+    def _read_eventmarkers(self, trailer):
+        ''' decode the trailer into an array of EVENTMARKER_DTYPE records without a python loop over markers
+
+            the trailer is a sequence of little endian 4 byte longs, bits 0-30 of an event marker pointer are the
+            location of the marker as an offset in ADC words from the start of the data. if bit 31 is set the next
+            long is a time and date stamp (seconds since jan 1 1970), which is always positive so it can never be
+            mistaken for a stamped pointer.
+
+            event marker comments are stored after the user annotations, each one is a 4 byte long with the
+            (0 based) number of the marker it belongs to followed by the null terminated comment text
+        '''
+        words = numpy.frombuffer(trailer, dtype='<i4', count=len(trailer)//4)
+        isStamp = numpy.zeros(len(words), dtype=bool)
+        isStamp[1:] = words[:-1] < 0                                                                        # a word following a pointer with bit 31 set is its stamp
+        pointerIdx = numpy.flatnonzero(~isStamp)
+        pointers = words[pointerIdx]
+        stamped = pointers < 0
+
+        markers = numpy.zeros(len(pointers), dtype=self.EVENTMARKER_DTYPE)
+        offsets = pointers.astype('<i8') & 0x7FFFFFFF                                                      # offset in ADC words
+        markers['index'] = (offsets // self._frameWords)*self._frameSets + self._setOfWord[offsets % self._frameWords]
+        markers['type'] = numpy.where(stamped, self.STAMPED, 0)
+        stampIdx = pointerIdx[stamped] + 1
+        stampOk = stampIdx < len(words)                                                                     # guard against a truncated trailer
+        markers['timestamp'][numpy.flatnonzero(stamped)[stampOk]] = words[stampIdx[stampOk]]
+        markers['textOffset'] = -1
+
+        ''' one step per comment (not per byte), comments are rare compared to markers '''
+        comments = self._markerComments
+        pos = 0
+        while pos + 4 < len(comments):
+            number = struct.unpack_from("<l", comments, pos)[0]
+            end = comments.find(b'\x00', pos + 4)
+            end = len(comments) if end == -1 else end
+            if 0 <= number < len(markers):
+                markers['textOffset'][number] = pos + 4
+                markers['type'][number] |= self.COMMENTED
+            pos = end + 1
+        return markers
+
+    def eventmarker_comment(self, markerNumber):
+        ''' return the comment text of an event marker (position in self.eventmarkers), or None '''
+        offset = self.eventmarkers['textOffset'][markerNumber]
+        if offset < 0:
+            return None
+        end = self._markerComments.find(b'\x00', offset)
+        end = len(self._markerComments) if end == -1 else end
+        return self._markerComments[offset:end].decode("utf-8", errors="replace")
+
+    def close(self):
+        ''' drop the file contents / memory map, the map is released once no arrays returned by data() reference it '''
+        self.npdata = numpy.empty(0, dtype=self.npdata.dtype)
+        self._fcontents = b''
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
 
     def data(self, channelNumber):
         ''' return the data for the channel requested
             data format is saved CH1tonChannels one sample at a time.
             each sample is read as a 16bit word and then shifted to a 14bit value
         '''
-        data = self.npdata[(channelNumber-1)::self.nChannels]
+        return self._calibrate(self.raw(channelNumber), channelNumber)
+
+    def raw(self, channelNumber, start = 0, stop = None):
+        ''' return the uncalibrated 16bit words of a channel, samples start to stop
+            this is a strided view into the file (no copy) unless the channel's samples are unevenly spaced in a
+            packed file, which needs a gather
+        '''
+        channel = channelNumber-1
+        count = self._sampleCount[channel]
+        stop = count if stop is None else min(stop, count)
+        start = min(start, stop)
+        step = self._stride[channel]
+        if step:
+            first = self._positions[channel][0] + start*step
+            return self.npdata[first:first + (stop-start)*step:step]
+        positions = self._positions[channel]
+        sample = numpy.arange(start, stop)
+        return self.npdata[(sample // len(positions))*self._frameWords + positions[sample % len(positions)]]
+
+    def sampleCount(self, channelNumber):
+        ''' return the number of samples of a channel, channels of packed files differ by their sample rate divisor '''
+        return self._sampleCount[channelNumber-1]
+
+    def _divisor(self, channelNumbers):
+        ''' return the sample rate divisor shared by channelNumbers, they can only be read as one block if they match '''
+        divisors = {self._divisors[c-1] for c in channelNumbers}
+        if len(divisors) > 1:
+            raise ValueError("channels %s are sampled at different rates, read them separately with data() and time()" % list(channelNumbers))
+        return divisors.pop() if divisors else 1
+
+    def _block(self, channelNumbers, start, stop):
+        ''' return the raw words of samples start to stop of channelNumbers as a (samples, channels) block '''
+        if self._packed:
+            return numpy.stack([self.raw(c, start, stop) for c in channelNumbers], axis=1)
+        index = numpy.asarray(channelNumbers) - 1
+        block = self.npdata[start*self.nChannels:stop*self.nChannels].reshape(-1, self.nChannels)     # view, no copy, only this range is paged in for memory mapped files
+        return block[:, index]                                                                              # only copies the requested int16 columns
+
+    def channels(self, channelNumbers, dtype = numpy.float32):
+        ''' return calibrated data for several channels in one pass over the interleaved ADC data
+            returns an array of shape (samples, len(channelNumbers)), column i holds channelNumbers[i]
+            channels of a packed file must share a sample rate divisor
+        '''
+        channelNumbers = list(channelNumbers)
+        self._divisor(channelNumbers)
+        nSample = min(self.sampleCount(c) for c in channelNumbers) if self._packed else int(self.nSample)
+        return self._calibrate(self._block(channelNumbers, 0, nSample), channelNumbers, dtype)
+
+    def data_all(self, dtype = numpy.float32):
+        ''' return calibrated data for every channel, shape (nSample, nChannels) '''
+        return self.channels(range(1, self.nChannels + 1), dtype)
+
+    def _calibrate(self, data, channelNumbers, dtype = numpy.float64):
+        ''' convert raw 16bit words to calibrated values
+            data: 1D words of a single channel (channelNumbers is an int) or a 2D (samples, channels)
+                  block of words (channelNumbers is a list with the channel number of each column)
+        '''
+        index = numpy.asarray(channelNumbers) - 1
+        slope = numpy.asarray(self.calScaling)[index]
+        intercept = numpy.asarray(self.calIntercept)[index]
+
         if self._HiRes:
-            temp = data * 0.25            # multiply by 0.25 for HiRes data
+            slope = slope * 0.25                           # multiply by 0.25 for HiRes data, folded into the slope
         else:
-            temp = numpy.floor(data*0.25)              # bit shift by two for normal data
+            data = numpy.right_shift(data, 2)              # bit shift by two for normal data, same as floor(data*0.25)
 
-        temp2 = self.calScaling[channelNumber-1]*temp + self.calIntercept[channelNumber-1]
+        temp = data.astype(dtype)
+        temp *= slope.astype(dtype)
+        temp += intercept.astype(dtype)
+        return temp
 
-        return temp2
+    def iter_blocks(self, channels, blockSize = 65536, start = 0, stop = None, dtype = numpy.float64):
+        ''' iterate over the recording in blocks of at most blockSize samples without loading the whole file
+            channels: a channel number, or a list of channel numbers
+            start, stop: sample range to iterate over, defaults to the whole recording
+            yields (time, data) tuples, time is relative to logger start time and data is 1D for a single
+            channel or has shape (samples, len(channels)) for a list of channels
+            channels of a packed file must share a sample rate divisor, start and stop count their samples
+        '''
+        single = isinstance(channels, int)
+        channelNumbers = [channels] if single else list(channels)
+        timeStep = self.timeStep*self._divisor(channelNumbers)
+        nSample = min(self.sampleCount(c) for c in channelNumbers) if self._packed else int(self.nSample)
+        stop = nSample if stop is None else min(stop, nSample)
+
+        for blockStart in range(start, stop, blockSize):
+            blockStop = min(blockStart + blockSize, stop)
+            block = self._block(channelNumbers, blockStart, blockStop)
+            time = numpy.arange(blockStart, blockStop)*timeStep
+            if single:
+                yield time, self._calibrate(block[:, 0], channels, dtype)
+            else:
+                yield time, self._calibrate(block, channelNumbers, dtype)
 
-    def time(self):
-        ''' return time (relative to logger start time) '''
-        return numpy.arange(0,int(self.nSample))*self.timeStep
+    def time(self, channelNumber = 1):
+        ''' return time (relative to logger start time) of the samples of a channel
+            all channels share one time base unless the file is packed, then a channel is sampled every
+            timeStep*sampleRateDivisor seconds
+        '''
+        return numpy.arange(0,self.sampleCount(channelNumber))*(self.timeStep*self._divisors[channelNumber-1])
 
-    def time_utc(self):
+    def time_utc(self, channelNumber = 1):
         ''' return time in numpy datetime64 format '''
-        return (self.time()*1e9).astype('timedelta64[ns]') + numpy.datetime64(self.fileCreatedRaw)
+        return (self.time(channelNumber)*1e9).astype('timedelta64[ns]') + numpy.datetime64(self.fileCreatedRaw)
 
     def unit(self, channelNumber):
         ''' return unit of requested channel '''
@@ -126,3 +339,226 @@ class windaq(object):
     def chAnnotation(self, channelNumber):
         ''' return user annotation of requested channel '''
         return self._annotations[channelNumber-1]
+
+
+class windaqWriter(object):
+    '''
+    Stream samples to a HiRes windaq file that the windaq class (and WINDAQ) can open
+
+    Samples are appended as 16bit words scaled to +-fullScale, the header is written up front with placeholder sizes
+    and patched by flush() and close(), so a file that was never closed is still readable up to the last flush.
+    close() also writes the trailer with one event marker per comment (see windaq._read_eventmarkers) and the
+    channel annotations. Values beyond +-fullScale are clipped, clipped counts them.
+
+    The windaq format has a single timeStep, worked out from the first and last time passed to write(). With
+    keepTimes the exact time of every sample is also appended, as little endian float64, to a sidecar file
+    (filename + TIMES_SUFFIX, see read_sample_times), so gaps and uneven spacing survive. Comments are then placed
+    on the sample closest to their time instead of assuming even spacing.
+    '''
+
+    def __init__(self, filename, nChannels = 1, fullScale = 10.0, units = "V", annotations = None, timeStep = 0.0, started = None,
+                 keepTimes = False):
+        self.filename = filename
+        self.nChannels = nChannels
+        self.fullScale = fullScale
+        self.timeStep = timeStep                                                                            # used until two samples have been written
+        self.annotations = list(annotations) if annotations else [""]*nChannels
+        self.started = started or datetime.datetime.now()
+        self.nSample = 0
+        self.comments = []                                                                                  # (time, text) pairs, turned into event markers on close
+        self.clipped = 0                                                                                    # values written beyond +-fullScale
+        self.timesFilename = filename + TIMES_SUFFIX if keepTimes else None
+        self._timesFile = open(self.timesFilename, 'w+b') if keepTimes else None
+        self._firstTime = None
+        self._lastTime = None
+        self._headSize = max(1156, 110 + 36*nChannels + 2)
+
+        h = bytearray(self._headSize)
+        h[0] = nChannels; h[1] = 1                                                                          # element 1, max channels >= 144 so all bits are the channel count
+        h[4] = 110; h[5] = 36                                                                               # channel info tables offset and size
+        struct.pack_into("<h", h, 6, self._headSize)
+        stamp = int(self.started.timestamp())
+        struct.pack_into("<l", h, 36, stamp)
+        struct.pack_into("<l", h, 40, stamp)
+        struct.pack_into("<H", h, 100, 2)                                                                   # bit 1 of element 27: HiRes 16-bit data
+        for channel in range(nChannels):
+            offset = 110 + 36*channel
+            struct.pack_into("<ffdd", h, offset, 1.0, 0.0, 4*fullScale/32768, 0.0)                          # HiRes data is read as word*0.25*calScaling
+            h[offset + 24:offset + 30] = units.encode("utf-8")[:4].ljust(6, b'\x00')
+            h[offset + 32] = channel                                                                        # physical channel number
+        struct.pack_into("<H", h, self._headSize - 2, 0x8001)                                               # fixed value ending the header
+        self._file = open(filename, 'w+b')
+        self._file.write(h)
+        self._patch_header()
+
+    def write(self, times, values):
+        ''' append samples, values is 1D for a single channel file or has shape (samples, nChannels) '''
+        values = numpy.asarray(values, dtype=numpy.float64).reshape(-1, self.nChannels)
+        if not len(values):
+            return
+        scaled = numpy.rint(values*(32768/self.fullScale))
+        self.clipped += int(numpy.count_nonzero((scaled < -32768) | (scaled > 32767)))
+        words = numpy.clip(scaled, -32768, 32767).astype('<i2')                                             # interleaved CH1tonChannels one sample at a time
+        if self._timesFile is not None:
+            self._timesFile.write(numpy.ascontiguousarray(times, dtype='<f8').tobytes())
+        self._file.write(words.tobytes())
+        if self._firstTime is None:
+            self._firstTime = float(times[0])
+        self._lastTime = float(times[-1])
+        self.nSample += len(values)
+
+    def add_comment(self, time, text):
+        ''' attach a comment to the sample closest to time (relative to the first written sample) '''
+        self.comments.append((time, text))
+
+    def flush(self, sync = False):
+        ''' write out buffered samples and patch the header so the file can be opened as it is,
+            with sync the data is also forced to disk (fsync) so it survives a power loss '''
+        self._patch_header()
+        for f in (self._timesFile, self._file):
+            if f is not None:
+                f.flush()
+                if sync:
+                    os.fsync(f.fileno())
+
+    def _patch_header(self):
+        if self.nSample > 1:
+            self.timeStep = (self._lastTime - self._firstTime)/(self.nSample - 1)
+        end = self._file.tell()
+        self._file.seek(8)
+        self._file.write(struct.pack("<L", self.nSample*self.nChannels*2))                                  # ADC data bytes
+        self._file.seek(28)
+        self._file.write(struct.pack("<d", self.timeStep))
+        self._file.seek(end)
+
+    def close(self):
+        ''' patch the header and write the trailer, event marker comments and channel annotations '''
+        if self._file.closed:
+            return
+        self._patch_header()
+        trailer = b''
+        markerComments = b''
+        origin = self._firstTime or 0.0
+        times = None
+        if self._timesFile is not None:
+            self._timesFile.close()
+            times = read_sample_times(self.filename, self.nSample)
+        for number, (time, text) in enumerate(sorted(self.comments, key=lambda c: c[0])):
+            if times is not None and len(times):
+                sample = int(numpy.searchsorted(times, time))
+                if sample > 0 and (sample == len(times) or time - times[sample - 1] < times[sample] - time):
+                    sample -= 1                                                                             # closer to the previous sample
+            else:
+                sample = int(round((time - origin)/self.timeStep)) if self.timeStep else 0
+            sample = min(max(sample, 0), max(self.nSample - 1, 0))
+            trailer += struct.pack("<l", sample*self.nChannels)                                             # pointer in ADC words, no time and date stamp
+            markerComments += struct.pack("<l", number) + text.encode("utf-8") + b'\x00'
+        annotations = b''.join(a.encode("utf-8") + b'\x00' for a in self.annotations)
+
+        self._file.seek(0, os.SEEK_END)
+        self._file.write(trailer + annotations + markerComments)
+        self._file.seek(12)
+        self._file.write(struct.pack("<L", len(trailer)))
+        self._file.seek(16)
+        self._file.write(struct.pack("<H", len(annotations)))
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+TIMES_SUFFIX = ".times"
+
+def read_sample_times(filename, nSample = None):
+    ''' return the exact sample times windaqWriter(keepTimes=True) kept next to filename, None if there are none
+        nSample: number of samples in the windaq file, the times are cut to it (the sidecar of a file that was
+        never closed can be ahead of its header), None if there are fewer times than samples
+    '''
+    path = filename + TIMES_SUFFIX
+    if not os.path.exists(path):
+        return None
+    times = numpy.fromfile(path, dtype='<f8', count=os.path.getsize(path)//8)
+    if nSample is None:
+        return times
+    nSample = int(nSample)
+    return times[:nSample] if len(times) >= nSample else None
+
+
+''' Header-only catalog of the windaq files in a directory tree '''
+
+CATALOG_NAME = "windaq_index.json"
+CATALOG_VERSION = 1
+_FINGERPRINT_BYTES = 1 << 16
+
+def _fingerprint(path, size):
+    ''' sha1 of the file size and its first and last 64 KiB, which covers the header, trailer and annotations without reading sample data '''
+    sha = hashlib.sha1(str(size).encode())
+    with open(path, 'rb') as f:
+        sha.update(f.read(_FINGERPRINT_BYTES))
+        if size > _FINGERPRINT_BYTES:
+            f.seek(max(_FINGERPRINT_BYTES, size - _FINGERPRINT_BYTES))
+            sha.update(f.read())
+    return sha.hexdigest()
+
+def _catalog_entry(path, stat):
+    ''' read the header and annotations of a single file, the ADC data is mapped but never touched '''
+    w = windaq(path, mmap=True)
+    entry = {
+        "size": stat.st_size,
+        "mtime": stat.st_mtime,
+        "hash": _fingerprint(path, stat.st_size),
+        "nChannels": w.nChannels,
+        "nSample": int(w.nSample),
+        "sampleRate": 1/w.timeStep if w.timeStep else 0,
+        "fileCreated": w.fileCreated,
+        "annotations": [w.chAnnotation(c) for c in range(1, w.nChannels + 1)],
+    }
+    w.close()
+    return entry
+
+def build_catalog(directory, index_path = None, save = True):
+    ''' scan directory recursively for .wdq files and return {absolute path: entry}
+        entries hold the channel annotations, sample rate, sample count, creation time and a content fingerprint.
+        the index is saved to index_path (default: windaq_index.json in directory), and entries of files whose
+        size and modification time did not change since the last scan are reused without opening the file.
+    '''
+    directory = os.path.abspath(directory)
+    index_path = index_path or os.path.join(directory, CATALOG_NAME)
+    previous = load_catalog(index_path, directory)
+
+    catalog = {}
+    for root, _, files in os.walk(directory):
+        for name in sorted(files):
+            if not name.lower().endswith(('.wdq', '.daq')):
+                continue
+            path = os.path.join(root, name)
+            stat = os.stat(path)
+            old = previous.get(path)
+            if old and old["size"] == stat.st_size and old["mtime"] == stat.st_mtime:
+                catalog[path] = old
+                continue
+            try:
+                catalog[path] = _catalog_entry(path, stat)
+            except (OSError, struct.error, ValueError) as e:
+                print(f"Skipping {path}: {e}")
+
+    if save:
+        relative = {os.path.relpath(path, directory): entry for path, entry in catalog.items()}
+        with open(index_path, 'w') as f:
+            json.dump({"version": CATALOG_VERSION, "files": relative}, f, indent=1)
+    return catalog
+
+def load_catalog(index_path, directory = None):
+    ''' load a saved catalog as {absolute path: entry}, returns an empty dict if there is no usable index '''
+    directory = os.path.abspath(directory or os.path.dirname(index_path))
+    try:
+        with open(index_path) as f:
+            saved = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if saved.get("version") != CATALOG_VERSION:
+        return {}
+    return {os.path.join(directory, path): entry for path, entry in saved["files"].items()}
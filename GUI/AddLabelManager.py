@@ -171,9 +171,8 @@ class AddLabelManager:
         # Merge if needed
         self.dw.selection.merge_adjacent_labels(new_label)
 
-        # Push to epgdata
-        transitions = [(la.start_time, la.label) for la in self.dw.labels]
-        self.dw.epgdata.set_transitions(self.dw.file, transitions, self.dw.transition_mode)
+        # Push the edited range to epgdata
+        self.dw.push_label_range(start, end)
 
         self.dw.update_plot()
         self.cancel()
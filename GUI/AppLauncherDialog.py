@@ -6,7 +6,8 @@ from NewRecordingDialog import NewRecordingDialog
 from main import start_main_application
 from SettingsWindow import SettingsWindow
 from Settings import Settings
-from PyQt6.QtWidgets import QApplication, QDialog, QHBoxLayout, QPushButton, QVBoxLayout, QLabel
+import BackupRecovery
+from PyQt6.QtWidgets import QApplication, QDialog, QHBoxLayout, QPushButton, QVBoxLayout, QLabel, QFileDialog, QMessageBox, QInputDialog
 from PyQt6.QtCore import Qt, pyqtSignal
 import sys
 
@@ -37,6 +38,11 @@ class AppLauncherDialog(QDialog):
         self.new_recording_button.clicked.connect(self.open_new_recording_dialog)
         button_layout.addWidget(self.new_recording_button)
 
+        self.recover_button = QPushButton("Recover Backup")
+        self.recover_button.setMinimumHeight(40)
+        self.recover_button.clicked.connect(self.recover_backup)
+        button_layout.addWidget(self.recover_button)
+
         main_layout.addLayout(button_layout)
 
         # Add a simple exit button for convenience if user doesn't want to proceed
@@ -58,6 +64,38 @@ class AppLauncherDialog(QDialog):
             self.launchMainWindow.emit(recording_settings)
             self.accept() # Accept and close the AppLauncherDialog
 
+    def recover_backup(self):
+        sessions = BackupRecovery.find_sessions(BackupRecovery.DEFAULT_BACKUP_DIR)
+        if not sessions:
+            QMessageBox.information(self, "Recover Backup", "No backups found.")
+            return
+
+        # newest session first, the one a crash would have left behind
+        choices = [f"{session['stamp']}{' (older backup format)' if session['legacy'] else ''}" for session in sessions]
+        choice, ok = QInputDialog.getItem(self, "Recover Backup", "Session to recover (UTC):", choices, 0, False)
+        if not ok:
+            return
+        stamp = sessions[choices.index(choice)]["stamp"]
+
+        output, _ = QFileDialog.getSaveFileName(
+            self, "Save Recovered Recording", f"recovered_{stamp}.WDQ", "WinDAQ Files (*.wdq *.WDQ)"
+        )
+        if not output:
+            return
+
+        try:
+            result = BackupRecovery.recover(BackupRecovery.DEFAULT_BACKUP_DIR, output, stamp=stamp)
+        except (FileNotFoundError, OSError) as e:
+            QMessageBox.warning(self, "Recover Backup", f"Could not recover a recording:\n{e}")
+            return
+
+        message = (f"Recovered {result['samples']} samples and {result['comments']} comments "
+                   f"from session {result['session']['stamp']}.\n\n"
+                   f"Recording: {result['output']}\nComments: {result['comments_output']}")
+        if result["problems"]:
+            message += "\n\n" + "\n".join(result["problems"])
+        QMessageBox.information(self, "Recover Backup", message)
+
 def launch_application():
     app = QApplication(sys.argv)
     launcher_dialog = AppLauncherDialog()
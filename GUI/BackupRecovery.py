@@ -0,0 +1,252 @@
+"""
+Recovers live recording sessions from the periodic backups LiveDataWindow
+writes to the backups folder, e.g. after a crash or power loss.
+
+A session is compacted into a single windaq recording (comments stored as
+event markers) plus a comments CSV. Both the current backup format
+(waveform_backup_<utc>.WDQ with a comments_journal_<utc>.csv) and the
+older CSV backups (waveform_backup.csv_<utc>.csv, renamed on every save,
+with comments_backup.csv_<utc>.csv) are understood. The exact sample
+times of windaq backups (waveform_backup_<utc>.WDQ.times, see
+windaq.read_sample_times) are carried over to the recovered file.
+
+Run headless with
+    python BackupRecovery.py [backup_dir] [-o output.WDQ] [--session <utc>]
+"""
+import argparse
+import csv
+import os
+import re
+import sys
+
+import numpy as np
+import pandas as pd
+
+import windaq
+
+DEFAULT_BACKUP_DIR = "backups"
+
+WAVEFORM_PATTERN = re.compile(r"^waveform_backup_(\d{8}_\d{6})\.WDQ$", re.IGNORECASE)
+JOURNAL_PATTERN = re.compile(r"^comments_journal_(\d{8}_\d{6})\.csv$", re.IGNORECASE)
+LEGACY_WAVEFORM_PATTERN = re.compile(r"^waveform_backup\.csv_(\d{8}_\d{6})\.csv$", re.IGNORECASE)
+LEGACY_COMMENTS_PATTERN = re.compile(r"^comments_backup\.csv_(\d{8}_\d{6})\.csv$", re.IGNORECASE)
+
+BLOCK_SIZE = 1 << 20  # samples copied per block when compacting a windaq backup
+
+
+def find_sessions(backup_dir: str = DEFAULT_BACKUP_DIR) -> list[dict]:
+    """
+    find_sessions lists the backed up sessions in backup_dir.
+    Inputs:
+            backup_dir: the LiveDataWindow backup folder
+    Returns:
+            a list of dicts with "stamp" (utc time of the session's
+            waveform file), "waveform" and "comments" paths ("comments"
+            may be None) and "legacy" (True for CSV backups), newest first
+    """
+    if not os.path.isdir(backup_dir):
+        return []
+
+    waveforms, journals, legacy_waveforms, legacy_comments = {}, {}, {}, {}
+    for name in os.listdir(backup_dir):
+        for pattern, found in [
+            (WAVEFORM_PATTERN, waveforms),
+            (JOURNAL_PATTERN, journals),
+            (LEGACY_WAVEFORM_PATTERN, legacy_waveforms),
+            (LEGACY_COMMENTS_PATTERN, legacy_comments),
+        ]:
+            match = pattern.match(name)
+            if match:
+                found[match.group(1)] = os.path.join(backup_dir, name)
+
+    sessions = [
+        {"stamp": stamp, "waveform": path, "comments": journals.get(stamp), "legacy": False}
+        for stamp, path in waveforms.items()
+    ]
+
+    # legacy backups were renamed on every save, so a session's waveform
+    # file carries the stamp of its last save and holds all of its data.
+    # its comments file is the newest one saved before the next session ended
+    legacy_stamps = sorted(legacy_waveforms)
+    comment_stamps = sorted(legacy_comments)
+    for i, stamp in enumerate(legacy_stamps):
+        previous = legacy_stamps[i - 1] if i > 0 else ""
+        following = legacy_stamps[i + 1] if i + 1 < len(legacy_stamps) else "99999999_999999"
+        candidates = [c for c in comment_stamps if previous < c < following]
+        comments = legacy_comments[candidates[-1]] if candidates else None
+        sessions.append({"stamp": stamp, "waveform": legacy_waveforms[stamp], "comments": comments, "legacy": True})
+
+    return sorted(sessions, key=lambda session: session["stamp"], reverse=True)
+
+
+def read_legacy_waveform(path: str) -> tuple[np.ndarray, np.ndarray, list[str]]:
+    """
+    read_legacy_waveform reads a CSV waveform backup, dropping a partially
+    written last line and anything after time stops increasing.
+    Inputs:
+            path: the CSV backup
+    Returns:
+            a (times, volts, problems) tuple, problems describes what was dropped
+    """
+    problems = []
+    df = pd.read_csv(path, on_bad_lines="skip")
+    times = pd.to_numeric(df["time"], errors="coerce").values
+    volts = pd.to_numeric(df["voltage"], errors="coerce").values
+    valid = ~(np.isnan(times) | np.isnan(volts))
+    if not valid.all():
+        problems.append(f"dropped {np.count_nonzero(~valid)} unreadable rows")
+        times, volts = times[valid], volts[valid]
+
+    backwards = np.flatnonzero(np.diff(times) < 0)
+    if len(backwards):
+        end = backwards[0] + 1
+        problems.append(f"time goes backwards at {times[end]:.3f}s, dropped the last {len(times) - end} samples")
+        times, volts = times[:end], volts[:end]
+    return times, volts, problems
+
+
+def read_comments(session: dict) -> dict[float, str]:
+    """
+    read_comments rebuilds the comments of a session, replaying the
+    comments journal or reading a legacy comments CSV.
+    Inputs:
+            session: a session from find_sessions
+    Returns:
+            a dict of comment time : comment text
+    """
+    comments = {}
+    path = session["comments"]
+    if path is None or not os.path.exists(path):
+        return comments
+
+    if session["legacy"]:
+        df = pd.read_csv(path, on_bad_lines="skip")
+        for time, text in zip(df["time"], df["comment"]):
+            comments[float(time)] = "" if pd.isna(text) else str(text)
+        return comments
+
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            try:
+                time = float(row["time"])
+            except (TypeError, ValueError):
+                continue  # partially written last line
+            if row["action"] in ("add", "edit"):
+                comments[time] = row["comment"] or ""
+            elif row["action"] == "delete":
+                comments.pop(time, None)
+    return comments
+
+
+def recover(backup_dir: str = DEFAULT_BACKUP_DIR, output: str | None = None, stamp: str | None = None) -> dict:
+    """
+    recover compacts a backed up session into one windaq recording and a
+    comments CSV next to it (<output>_comments.csv).
+    Inputs:
+            backup_dir: the LiveDataWindow backup folder
+            output: path of the recording to write, defaults to
+                    recovered_<stamp>.WDQ in the working directory
+            stamp: session to recover, defaults to the newest one with data
+    Returns:
+            a dict with the recovered "session", "output", "comments_output",
+            "samples", "comments" count and "problems" found
+    Raises:
+            FileNotFoundError if there is no matching session with data
+    """
+    sessions = find_sessions(backup_dir)
+    if stamp is not None:
+        sessions = [session for session in sessions if session["stamp"] == stamp]
+
+    problems = []
+    for session in sessions:
+        try:
+            if session["legacy"]:
+                times, volts, session_problems = read_legacy_waveform(session["waveform"])
+                source = None
+                samples = len(times)
+            else:
+                # the backup may have more data on disk than its header says
+                source = windaq.windaq(session["waveform"], mmap=True, recover=True)
+                session_problems = []
+                samples = int(source.nSample)
+                # exact sample times, if the backup kept them
+                times = windaq.read_sample_times(session["waveform"], samples)
+                if times is None and os.path.exists(session["waveform"] + windaq.TIMES_SUFFIX):
+                    session_problems.append("sample times file is incomplete, assuming even spacing")
+                if times is None and samples > 1 and not source.timeStep > 0:
+                    session_problems.append("no valid time step, time is in samples")
+        except (OSError, ValueError, KeyError) as e:
+            problems.append(f"skipped {session['waveform']}: {e}")
+            continue
+        if samples > 0:
+            break
+        problems.append(f"skipped {session['waveform']}: no samples")
+    else:
+        raise FileNotFoundError(f"No backup with data found in {backup_dir}. " + " ".join(problems))
+
+    problems += session_problems
+    if output is None:
+        output = f"recovered_{session['stamp']}.WDQ"
+    comments = read_comments(session)
+
+    with windaq.windaqWriter(output, annotations=["recovered"], keepTimes=True) as writer:
+        if source is None:
+            writer.write(times, volts)
+        else:
+            time_step = source.timeStep if source.timeStep > 0 else 1.0
+            start = 0
+            for _, volts in source.iter_blocks(1, BLOCK_SIZE, stop=samples):
+                stop = start + len(volts)
+                writer.write(np.arange(start, stop) * time_step if times is None else times[start:stop], volts)
+                start = stop
+        for time, text in comments.items():
+            writer.add_comment(time, text)
+
+        if writer.clipped:
+            problems.append(f"{writer.clipped} samples beyond +-{writer.fullScale} V were clipped")
+
+    comments_output = os.path.splitext(output)[0] + "_comments.csv"
+    with open(comments_output, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["comment_time", "comment_text"])
+        for time in sorted(comments):
+            writer.writerow([time, comments[time]])
+
+    return {
+        "session": session,
+        "output": output,
+        "comments_output": comments_output,
+        "samples": samples,
+        "comments": len(comments),
+        "problems": problems,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Recover a live recording session from its periodic backups.")
+    parser.add_argument("backup_dir", nargs="?", default=DEFAULT_BACKUP_DIR, help="backup folder (default: %(default)s)")
+    parser.add_argument("-o", "--output", help="recording to write (default: recovered_<utc>.WDQ)")
+    parser.add_argument("--session", help="utc stamp of the session to recover (default: newest)")
+    parser.add_argument("--list", action="store_true", help="only list the sessions found")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for session in find_sessions(args.backup_dir):
+            kind = "csv" if session["legacy"] else "wdq"
+            print(f"{session['stamp']}  {kind}  {session['waveform']}  {session['comments'] or '-'}")
+        return 0
+
+    try:
+        result = recover(args.backup_dir, args.output, args.session)
+    except FileNotFoundError as e:
+        print(e, file=sys.stderr)
+        return 1
+    print(f"Recovered {result['samples']} samples and {result['comments']} comments "
+          f"from session {result['session']['stamp']} to {result['output']} and {result['comments_output']}")
+    for problem in result["problems"]:
+        print(f"  {problem}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
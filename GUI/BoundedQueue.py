@@ -0,0 +1,173 @@
+import queue
+
+import numpy as np
+from numpy.typing import NDArray
+
+POLICIES = ("block", "decimate", "drop")
+
+
+def minmax_decimate(times: NDArray, values: NDArray, max_samples: int) -> tuple[NDArray, NDArray]:
+    """
+    Reduces a block of samples to at most max_samples, keeping the minimum
+    and maximum sample of each bin so peaks survive, like the peak
+    downsampling of the plots. The samples kept are real samples, in order.
+
+    Parameters:
+        times (NDArray): Sample times.
+        values (NDArray): Sample values, shape (samples,) or (channels, samples).
+            Bins are chosen on the first channel.
+        max_samples (int): Max number of samples to keep, at least 2.
+
+    Returns:
+        tuple[NDArray, NDArray]: The kept times and values.
+    """
+    count = len(times)
+    if count <= max_samples:
+        return times, values
+
+    first_channel = values if values.ndim == 1 else values[0]
+    bins = max(1, max_samples // 2)  # each bin keeps 2 samples
+    size = -(-count // bins)
+    # pad the partial last bin with its last sample, so it never wins over a real one
+    padded = np.pad(first_channel, (0, bins * size - count), mode="edge").reshape(bins, size)
+    offsets = np.arange(bins) * size
+    keep = np.concatenate([offsets + padded.argmin(axis=1), offsets + padded.argmax(axis=1)])
+    keep = np.unique(np.minimum(keep, count - 1))  # sorted, a flat bin keeps one sample
+
+    return times[keep], values[..., keep]
+
+
+class BoundedQueue(queue.Queue):
+    """
+    A queue.Queue with a size limit and an explicit policy for when it is full.
+
+    - "block": put waits for space, which slows the producer down (backpressure).
+    - "drop": the oldest item is discarded to make room.
+    - "decimate": queued "data_block" messages (see EPGSocket.decode_frame)
+      are merged into one and reduced with minmax_decimate to free space.
+      If there is nothing to decimate the oldest item is dropped.
+
+    The counters (blocked, dropped, decimated, high_water) can be read at any
+    time for display, see stats.
+    """
+
+    def __init__(self, maxsize: int = 10000, policy: str = "drop"):
+        """
+        Parameters:
+            maxsize (int): Max number of queued items, 0 for unbounded.
+            policy (str): "block", "decimate" or "drop".
+        """
+        if policy not in POLICIES:
+            raise ValueError(f'Invalid policy "{policy}". Please select one of {", ".join(POLICIES)}.')
+        super().__init__(maxsize)
+        self.policy = policy
+        self.blocked = 0 # puts that found the queue full and had to wait
+        self.dropped = 0 # items discarded
+        self.decimated = 0 # samples removed by decimation
+        self.high_water = 0 # largest number of queued items seen
+
+    def put(self, item, block: bool = True, timeout: float | None = None) -> None:
+        if self.policy == "block":
+            if self.maxsize > 0 and block:
+                with self.mutex:
+                    if self._qsize() >= self.maxsize:
+                        self.blocked += 1
+            super().put(item, block, timeout)
+            return
+
+        with self.not_full:
+            if 0 < self.maxsize <= self._qsize():
+                queued = self._qsize()
+                if self.policy == "decimate":
+                    item = self._decimate(item)
+                while self._qsize() >= self.maxsize:
+                    self.queue.popleft()
+                    self.dropped += 1
+                self.unfinished_tasks -= queued - self._qsize() # removed items will never be done
+            if item is None: # merged into the queued data
+                return
+            self._put(item)
+            self.unfinished_tasks += 1
+            self.not_empty.notify()
+
+    def _put(self, item) -> None:
+        super()._put(item)
+        self.high_water = max(self.high_water, self._qsize())
+
+    def _decimate(self, item):
+        """
+        Merges the queued data blocks (and item, if it is one) into a single
+        block of half their samples. Call with the mutex held.
+
+        Returns:
+            The item to enqueue, None if it was merged into the queue.
+        """
+        is_block = lambda message: isinstance(message, dict) and message.get("type") == "data_block"
+        blocks = [message for message in self.queue if is_block(message)]
+        if is_block(item):
+            blocks.append(item)
+        # blocks of different shapes or sources cannot be merged
+        if len(blocks) < 2 or len({(block["source"], block["values"].shape[0]) for block in blocks}) > 1:
+            return item
+
+        times = np.concatenate([block["times"] for block in blocks])
+        values = np.concatenate([block["values"] for block in blocks], axis=1)
+        kept_times, kept_values = minmax_decimate(times, values, max(2, len(times) // 2))
+        self.decimated += len(times) - len(kept_times)
+        merged = dict(blocks[0], times=kept_times, values=kept_values)
+
+        # the merged block takes the place of the first one, other messages keep their order
+        rebuilt, placed = [], False
+        for message in self.queue:
+            if is_block(message):
+                if not placed:
+                    rebuilt.append(merged)
+                    placed = True
+                continue
+            rebuilt.append(message)
+        if not placed:
+            rebuilt.append(merged)
+        self.queue.clear()
+        self.queue.extend(rebuilt)
+        return None if is_block(item) else item
+
+    def get_all(self, block: bool = True, timeout: float | None = None, max_items: int | None = None) -> list:
+        """
+        Takes every queued item at once, in order, with a single lock acquisition.
+        Waits for the first item like get.
+
+        Parameters:
+            block (bool): Whether to wait while the queue is empty.
+            timeout (float): Max seconds to wait, None to wait indefinitely.
+            max_items (int): Max number of items to take.
+
+        Returns:
+            list: The items, at least one.
+
+        Raises:
+            queue.Empty: If no item arrived in time.
+        """
+        with self.not_empty:
+            if not block:
+                if not self._qsize():
+                    raise queue.Empty
+            elif not self.not_empty.wait_for(self._qsize, timeout):
+                raise queue.Empty
+            count = self._qsize() if max_items is None else min(self._qsize(), max_items)
+            items = [self._get() for _ in range(count)]
+            self.not_full.notify_all() # room for every producer that was waiting
+            return items
+
+    def stats(self) -> dict[str, int]:
+        """
+        Returns the queue counters, see the class docstring, plus the current size and limit.
+        """
+        with self.mutex:
+            return {
+                "size": self._qsize(),
+                "maxsize": self.maxsize,
+                "blocked": self.blocked,
+                "dropped": self.dropped,
+                "decimated": self.decimated,
+                "high_water": self.high_water,
+            }
@@ -1,9 +1,11 @@
-from PyQt6.QtWidgets import QWidget, QLabel, QHBoxLayout, QSizePolicy
-from PyQt6.QtCore import Qt
+from PyQt6.QtWidgets import QWidget, QLabel, QHBoxLayout, QSizePolicy, QMenu
+from PyQt6.QtCore import Qt, pyqtSignal
 import socket
 
 
 class ConnectionIndicator(QWidget):
+    exportStatsRequested = pyqtSignal()     # emitted when the user asks to export the link statistics
+
     def __init__(self):
         super().__init__()
 
@@ -42,4 +44,17 @@ class ConnectionIndicator(QWidget):
             """)
             self.text_label.setText("ENGR Disconnected")
 
+    def set_details(self, text: str):
+        """
+        Sets the link statistics shown in the tooltip.
+        """
+        self.setToolTip(text)
 
+    def contextMenuEvent(self, event):
+        """
+        Offers to export the link statistics.
+        """
+        menu = QMenu(self)
+        export_action = menu.addAction("Export Latency Log...")
+        if menu.exec(event.globalPos()) == export_action:
+            self.exportStatsRequested.emit()
@@ -1,5 +1,6 @@
 import numpy as np
 from numpy.typing import NDArray
+import bisect
 import os
 import csv
 
@@ -264,7 +265,9 @@ class DataWindow(PlotWidget):
 
         self.viewbox.setLimits(xMin=None, xMax=None, yMin=None, yMax=None) # clear stale data (avoids warning)
 
-        self.downsample_visible(x_range=(x_min, x_max))
+        # about two points (a min and a max) per pixel of plot width
+        plot_width = int(self.viewbox.width() * self.devicePixelRatioF())
+        self.downsample_visible(x_range=(x_min, x_max), max_points=max(2 * plot_width, 500))
 
         x_data = self.xy_data[0]
         y_data = self.xy_data[1]
@@ -602,9 +605,10 @@ class DataWindow(PlotWidget):
         NOTE: 
             `subsample` samples the first point of each bin (fastest)
             `mean` averages each bin
-            `peak` returns the min and max point of each bin (slowest, best looking)
+            `peak` returns the min and max point of each bin (best looking, read from the EPGData LODPyramid)
         """
         x, y = self.epgdata.get_recording(self.file, self.prepost)
+        left_idx, right_idx = 0, len(x)
 
         # Filter to x_range if provided
         if x_range is not None:
@@ -617,17 +621,23 @@ class DataWindow(PlotWidget):
                 # render additional point on each side at very high zooms
                 left_idx = max(0, left_idx - 1)
                 right_idx = min(len(x), right_idx + 1)
-  
-            x = x[left_idx:right_idx]
-            y = y[left_idx:right_idx]   
-    
-        num_points = len(x)
+
+        num_points = right_idx - left_idx
 
         if num_points <= max_points or num_points < 2:  # no downsampling needed
-            self.xy_data[0] = x
-            self.xy_data[1] = y
+            self.xy_data[0] = x[left_idx:right_idx]
+            self.xy_data[1] = y[left_idx:right_idx]
+            return
+
+        if method == 'peak':
+            # read precomputed window min/max from the pyramid instead of reducing every visible sample
+            pyramid = self.epgdata.get_pyramid(self.file, self.prepost)
+            self.xy_data[0], self.xy_data[1] = pyramid.peaks(left_idx, right_idx, max_points)
             return
 
+        x = x[left_idx:right_idx]
+        y = y[left_idx:right_idx]
+
         if method == 'subsampling': 
             stride = num_points // max_points
             x_out = x[::stride]
@@ -638,18 +648,6 @@ class DataWindow(PlotWidget):
             start_idx = stride // 2
             x_out = x[start_idx : start_idx + num_windows * stride : stride] 
             y_out = y[:num_windows * stride].reshape(num_windows,stride).mean(axis=1)
-        elif method == 'peak':
-            stride = max(1, num_points // (max_points // 2))  # each window gives 2 points
-            num_windows = num_points // stride
-
-            start_idx = stride // 2  # Choose a representative x (near center) for each window
-            x_win = x[start_idx : start_idx + num_windows * stride : stride]
-            x_out = np.repeat(x_win, 2)  # repeated for (x, y_min), (x, y_max)
-
-            y_reshaped = y[: num_windows * stride].reshape(num_windows, stride)
-            y_out = np.empty(num_windows * 2)
-            y_out[::2] = y_reshaped.max(axis=1)
-            y_out[1::2] = y_reshaped.min(axis=1)
         else:
             raise ValueError(
                 'Invalid "method" arugment. ' \
@@ -684,8 +682,8 @@ class DataWindow(PlotWidget):
         times, _ = self.epgdata.get_recording(self.file, self.prepost)
         transitions = self.epgdata.get_transitions(self.file, self.transition_mode)
 
-        # only continue if the label column contains labels
-        if self.epgdata.dfs[file][self.transition_mode].isna().all():
+        # only continue if the recording contains labels
+        if len(transitions) == 0:
             return
         
         durations = []  # elements of (label_start_time, label_duration, label)
@@ -723,6 +721,31 @@ class DataWindow(PlotWidget):
             if not has_adjacent_right:
                 label_area.add_right_transition_line()
 
+    def push_label_range(self, start_time: float, end_time: float) -> None:
+        """
+        Writes the labels shown between start_time and end_time to epgdata,
+        after the LabelAreas there were edited. As in set_transitions, a
+        label extends to the start of the next LabelArea, so the range is
+        extended to the first LabelArea starting after end_time.
+
+        Parameters:
+            start_time (float): Start of the edited range.
+            end_time (float): End of the edited range.
+        """
+        labels = sorted(self.labels, key=lambda la: la.start_time)
+        if not labels:
+            return
+        starts = [la.start_time for la in labels]
+        end_time = next((t for t in starts if t > end_time), float("inf"))
+
+        # label in effect at start_time, then every LabelArea starting inside the range
+        i = bisect.bisect_right(starts, start_time) - 1
+        pieces = [(start_time, labels[i].label if i >= 0 else None)]
+        pieces += [(la.start_time, la.label) for la in labels[i + 1:] if la.start_time < end_time]
+        for k, (time, label) in enumerate(pieces):
+            next_time = pieces[k + 1][0] if k + 1 < len(pieces) else end_time
+            self.epgdata.update_label_range(self.file, time, next_time, label, self.transition_mode)
+
 
     def change_label_color(self, label: str, color: QColor) -> None:
         """
@@ -972,8 +995,12 @@ class DataWindow(PlotWidget):
         if self.moving_mode:
             # if transition line was released, update data transition line
             if isinstance(self.selected_item, InfiniteLine) and self.selected_item is not self.baseline:
-                transitions = [(label_area.start_time, label_area.label) for label_area in self.labels]
-                self.epgdata.set_transitions(self.file, transitions, self.transition_mode)
+                # only the LabelAreas next to the line changed
+                x = self.selected_item.value()
+                # self.labels is in insertion order after adding or merging labels
+                starts = sorted(label_area.start_time for label_area in self.labels)
+                i = bisect.bisect_right(starts, x) - 1
+                self.push_label_range(starts[i - 1] if i > 0 else 0, x)
             return
         elif self.add_label_manager.active:
             x = self.window_to_viewbox(event.position()).x()
@@ -0,0 +1,149 @@
+import hashlib
+import os
+
+from pandas import DataFrame
+from pandas.api.types import is_object_dtype, is_string_dtype
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # the cache is skipped without pyarrow
+    pa = None
+    feather = None
+
+# bump when decoding (windaq, EPGData.load_data) or the entry layout changes,
+# entries of other versions are never read again and age out through evict
+CACHE_VERSION = 2
+
+
+class EPGCache:
+    """
+    An on-disk cache of decoded recordings, so reopening a file skips
+    parsing the CSV or WDQ.
+
+    Entries are Arrow IPC (Feather v2) files keyed by CACHE_VERSION and the
+    source path, modification time and size, so editing or replacing a
+    source file, or changing how it is decoded, invalidates its entry.
+    Voltage columns are stored as float32 (load_data decodes them as
+    float32 too) and text columns (labels, probes, comments) as
+    categoricals. Entries are read uncompressed from a memory map, then
+    converted into regular, writable pandas columns (a copy). The least
+    recently used entries are deleted once the cache directory grows past
+    max_bytes.
+    """
+
+    def __init__(self, cache_dir: str | None = None, max_bytes: int = 4 * 1024**3):
+        if cache_dir is None:
+            cache_dir = os.path.join(os.path.dirname(os.path.realpath(__file__)), "cache")
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.enabled = feather is not None
+
+    def entry_path(self, source: str) -> str | None:
+        """
+        entry_path returns where the cache entry of a source file lives.
+        Inputs:
+                source: path of the recording
+        Returns:
+                the entry path, or None if the source does not exist
+        """
+        try:
+            stat = os.stat(source)
+        except OSError:
+            return None
+        key = f"{CACHE_VERSION}|{os.path.abspath(source)}|{stat.st_mtime_ns}|{stat.st_size}"
+        return os.path.join(self.cache_dir, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".feather")
+
+    def get(self, source: str) -> DataFrame | None:
+        """
+        get reads the cached recording of a source file.
+        Inputs:
+                source: path of the recording
+        Returns:
+                the cached dataframe, or None on a cache miss
+        """
+        if not self.enabled:
+            return None
+        path = self.entry_path(source)
+        if path is None or not os.path.exists(path):
+            return None
+        try:
+            table = feather.read_table(path, memory_map=True)
+        except (OSError, pa.ArrowInvalid):
+            # unreadable entry, e.g. from an interrupted write
+            os.remove(path)
+            return None
+        os.utime(path)  # mark as recently used
+        df = table.to_pandas()
+        # label editing assigns arbitrary strings, so hand back object columns
+        for column in df.columns:
+            if df[column].dtype == "category":
+                df[column] = df[column].astype(object)
+        return df
+
+    def put(self, source: str, df: DataFrame, float32_columns: list[str] = ()) -> bool:
+        """
+        put stores a decoded recording in the cache.
+        Inputs:
+                source: path of the recording
+                df: the decoded recording
+                float32_columns: columns that can be stored as float32
+        Returns:
+                True if successful, False otherwise
+        """
+        if not self.enabled:
+            return False
+        path = self.entry_path(source)
+        if path is None:
+            return False
+        compact = df.copy(deep=False)
+        for column in compact.columns:
+            if column in float32_columns:
+                compact[column] = compact[column].astype("float32")
+            elif is_object_dtype(compact[column]) or is_string_dtype(compact[column]):
+                compact[column] = compact[column].astype("category")
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # write a temp file and swap it in, so readers never see half an entry
+            feather.write_feather(compact, path + ".tmp", compression="uncompressed")
+            os.replace(path + ".tmp", path)
+        except (OSError, pa.ArrowException, TypeError, ValueError) as e:
+            print(f"Could not cache {source}: {e}")
+            return False
+        self.evict()
+        return True
+
+    def evict(self):
+        """
+        evict deletes the least recently used entries until the cache
+        directory is no larger than max_bytes.
+        """
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name.endswith(".feather") and os.path.isfile(path):
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                # entry in use (memory mapped on windows), try again next time
+                continue
+            total -= size
+
+    def clear(self):
+        """
+        clear deletes every entry in the cache directory.
+        """
+        if not os.path.isdir(self.cache_dir):
+            return
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".feather"):
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    continue
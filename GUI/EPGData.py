@@ -4,6 +4,8 @@ import pandas as pd
 import re
 import windaq
 import os
+from EPGCache import EPGCache
+from LODPyramid import LODPyramid
 
 
 class EPGData:
@@ -13,9 +15,18 @@ class EPGData:
 
     def __init__(self):
         self.dfs = {}  # A dictionary of filename : pandas dataframe objects
+        # A dictionary of filename : {section_type : (starts, values)}, the
+        # labels and probes of each recording as run-length encoded segments.
+        # starts holds the first sample index of each segment (always starting
+        # at 0), values the label of the segment. These are the source of
+        # truth, per sample columns are only built by labeled_df.
+        self.segments = {}
         self.label_column = "labels"
         self.probe_column = "probes"
+        self.section_columns = {"labels": self.label_column, "probes": self.probe_column}
+        self.pyramids = {}  # A dictionary of (filename, prepost) : LODPyramid, see get_pyramid
         self.prepost_suffix = "_rect"
+        self.cache = EPGCache()  # decoded recordings, see load_data
         self.dir_path = os.path.dirname(os.path.realpath(__file__))
         self.current_file = os.path.join(
             os.path.abspath(os.path.join(self.dir_path, "..")), # root dir
@@ -36,37 +47,71 @@ class EPGData:
         import time
         start_time = time.perf_counter()
 
-        if re.search(r"\.(WDQ|DAQ)$", file, re.IGNORECASE):
-            windaq_file = windaq.windaq(file)
+        # decoded recordings are cached on disk, keyed by path, mtime and size,
+        # voltages are float32 whether they come from the cache or not
+        if re.search(r"\.csv$", file, re.IGNORECASE):
+            source = os.path.join(self.dir_path, file)
+        else:
+            source = file
+        cached = self.cache.get(source)
+
+        if cached is not None:
+            self.dfs[file] = cached
+        elif re.search(r"\.(WDQ|DAQ)$", file, re.IGNORECASE):
+            # memory map the recording so only the channels we use are paged in
+            windaq_file = windaq.windaq(file, mmap=True)
             # TODO: don't hardcode channel count and names
             # TODO: add event markers as column
+            divisors = windaq_file.sampleRateDivisor
+            if windaq_file.nChannels == 1:
+                # single channel recording, e.g. a live session backup
+                pre = post = windaq_file.data(1).astype(np.float32)
+            elif divisors[0] == divisors[1]:
+                # decode pre and post in one pass over the interleaved data
+                prepost = windaq_file.channels([1, 2])
+                pre, post = prepost[:, 0], prepost[:, 1]
+            else:
+                # packed file with pre and post at different rates,
+                # put post on the time base of pre
+                pre = windaq_file.data(1).astype(np.float32)
+                post = np.interp(windaq_file.time(1), windaq_file.time(2), windaq_file.data(2)).astype(np.float32)
+            # exact times kept by windaqWriter(keepTimes=True), e.g. for live backups
+            times = windaq.read_sample_times(file, len(pre))
             df = DataFrame(
                 {
-                    "time": windaq_file.time(),
-                    "pre_rect": windaq_file.data(1),
-                    "post_rect": windaq_file.data(2),
+                    "time": windaq_file.time(1) if times is None else times,
+                    "pre_rect": pre,
+                    "post_rect": post,
                 }
             )
             # This will overwrite if there are multiple
             # markers pointing to the same index
-            comments = [None for i in range(len(df))]
-            for event in windaq_file.eventmarkers:
-                if "comment" in event:
-                    comments[event["index"]] = event["comment"]
-                elif "timestamp" in event:
-                    comments[event["index"]] = event["timestamp"]
-                else:
-                    comments[event["index"]] = ""
+            markers = windaq_file.eventmarkers.copy()
+            # markers point at sample sets, rows are samples of pre
+            markers["index"] //= max(divisors[0], 1)
+            in_range = markers["index"] < len(df)
+            stamped = in_range & ((markers["type"] & windaq.windaq.STAMPED) != 0)
+            plain = in_range & ~stamped
+            comments = np.full(len(df), None, dtype=object)
+            comments[markers["index"][plain]] = ""
+            comments[markers["index"][stamped]] = markers["timestamp"][stamped].astype("datetime64[s]").astype(str)
+            # only commented markers need their text decoded
+            commented = in_range & ((markers["type"] & windaq.windaq.COMMENTED) != 0)
+            for i in np.flatnonzero(commented):
+                comments[markers["index"][i]] = windaq_file.eventmarker_comment(i)
             df["comments"] = comments
             self.dfs[file] = df
+            self.cache.put(source, df, self.voltage_columns(df))
         elif re.search(r"\.csv$", file, re.IGNORECASE):
-            full_path = os.path.join(self.dir_path, file)
             try:
-                self.dfs[file] = read_csv(full_path, engine="pyarrow")
+                self.dfs[file] = read_csv(source, engine="pyarrow")
 
             except FileNotFoundError:
-                print(f"Could not find {full_path}")
+                print(f"Could not find {source}")
                 return False
+            voltages = self.voltage_columns(self.dfs[file])
+            self.dfs[file][voltages] = self.dfs[file][voltages].astype(np.float32)
+            self.cache.put(source, self.dfs[file], self.voltage_columns(self.dfs[file]))
         else:
             # unknown file extension
             return False
@@ -74,12 +119,125 @@ class EPGData:
         print(f"Data loaded in {time.perf_counter() - start_time:.4f}s")
 
         self.current_file = file
-        if not self.label_column in self.dfs[file]:
-            self.dfs[file][self.label_column] = np.nan
-        if not self.probe_column in self.dfs[file]:
-            self.dfs[file][self.probe_column] = np.nan
+        # move labels and probes out of the dataframe into segments
+        df = self.dfs[file]
+        self.segments[file] = {}
+        for section_type, column in self.section_columns.items():
+            if column in df:
+                self.segments[file][section_type] = self._encode(df[column].values)
+                df.drop(columns=[column], inplace=True)
+            else:
+                self.segments[file][section_type] = self._encode(np.full(len(df), np.nan, dtype=object))
+
+        # start building the plotting pyramids while the file is being displayed
+        for prepost in ["pre", "post"]:
+            self.pyramids.pop((file, prepost), None)
+            self.get_pyramid(file, prepost)
         return True
 
+    def _encode(self, values):
+        """
+        _encode run-length encodes a per sample label array.
+        Inputs:
+                values: array with a label (or NaN) per sample
+        Returns:
+                a (starts, values) tuple of numpy arrays
+        """
+        values = np.asarray(values, dtype=object)
+        if len(values) == 0:
+            return np.zeros(1, dtype=np.int64), np.array([np.nan], dtype=object)
+        isna = pd.isna(values)
+        # NaN != NaN, so consecutive missing labels need their own check
+        changes = (values[1:] != values[:-1]) & ~(isna[1:] & isna[:-1])
+        starts = np.concatenate(([0], np.flatnonzero(changes) + 1)).astype(np.int64)
+        return starts, values[starts]
+
+    def get_segments(self, file: str, section_type: str):
+        """
+        get_segments returns the run-length encoded labels or probes of file.
+        Inputs:
+                file: string containing the key of the recording
+                section_type: either "labels" or "probes"
+        Returns:
+                a (starts, values) tuple of numpy arrays, segment i covers
+                samples starts[i] up to (not including) starts[i + 1]
+        """
+        if not file in self.segments:
+            raise Exception(f"{file} is not a key in self.dfs")
+        if not section_type in self.section_columns:
+            raise ValueError(f"Unknown section_type: {section_type}")
+        return self.segments[file][section_type]
+
+    def set_segments(self, file: str, section_type: str, starts, values) -> None:
+        """
+        set_segments replaces the labels or probes of file. Segments are
+        normalized: later segments win where starts repeat, segments past
+        the end are dropped, neighbours with the same label are merged and
+        anything before the first segment is unlabeled.
+        Inputs:
+                file: string containing the key of the recording
+                section_type: either "labels" or "probes"
+                starts: sorted first sample index of each segment
+                values: label of each segment
+        Returns:
+                None
+        """
+        self.get_segments(file, section_type)  # validates file and section_type
+        n = len(self.dfs[file])
+        starts = np.asarray(starts, dtype=np.int64)
+        values = np.asarray(values, dtype=object)
+
+        # keep the last of repeated starts and drop segments past the end
+        keep = np.append(starts[1:] != starts[:-1], True) & (starts < max(n, 1))
+        starts, values = starts[keep], values[keep]
+        if len(starts) == 0 or starts[0] > 0:
+            starts = np.concatenate(([0], starts))
+            values = np.concatenate(([np.nan], values))
+        starts[0] = 0
+
+        # merge neighbours with the same label
+        isna = pd.isna(values)
+        same = (values[1:] == values[:-1]) | (isna[1:] & isna[:-1])
+        keep = np.concatenate(([True], ~same))
+        self.segments[file][section_type] = (starts[keep], values[keep])
+
+    def materialize(self, file: str, section_type: str):
+        """
+        materialize expands the labels or probes of file to one value per sample.
+        Inputs:
+                file: string containing the key of the recording
+                section_type: either "labels" or "probes"
+        Returns:
+                a numpy object array as long as the recording
+        """
+        starts, values = self.get_segments(file, section_type)
+        lengths = np.diff(np.append(starts, len(self.dfs[file])))
+        return np.repeat(values, lengths)
+
+    def labeled_df(self, file: str) -> DataFrame:
+        """
+        labeled_df returns a copy of the recording with per sample label and
+        probe columns, for exporting or running models.
+        Inputs:
+                file: string containing the key of the recording
+        Returns:
+                a pandas dataframe
+        """
+        df = self.dfs[file].copy()
+        for section_type, column in self.section_columns.items():
+            df[column] = self.materialize(file, section_type)
+        return df
+
+    def voltage_columns(self, df):
+        """
+        voltage_columns lists the pre/post voltage columns of a recording.
+        Inputs:
+                df: a recording dataframe
+        Returns:
+                a list of column names
+        """
+        return [column for column in df.columns if column.endswith(self.prepost_suffix)]
+
     def export_csv(self, file, destination):
         """
         export_csv saves a CSV of loaded EPG data to disk.
@@ -92,7 +250,7 @@ class EPGData:
         """
 
         try:
-            self.dfs[file].to_csv(destination)
+            self.labeled_df(file).to_csv(destination)
         except:
             return False
         return True
@@ -109,14 +267,13 @@ class EPGData:
         Returns:
                 True if successful, False otherwise
         """
-        df = self.dfs[file]
-        df1 = df[:-1].reset_index()["labels"]
-        df2 = df[1:].reset_index()["labels"]
-        where = np.where(~((df1 == df2) | (df1.isna() & df2.isna())))[0]
-        where = np.append(where, [len(df) - 1])
+        times = self.dfs[file]["time"].values
+        starts, values = self.get_segments(file, "labels")
+        # last sample of each segment
+        ends = np.append(starts[1:], len(times)) - 1
         with open(destination, "w") as f:
-            for i, row in df.iloc[where].iterrows():
-                f.write(f'"{row["labels"]}"\n    {row["time"]:.02f}\n')
+            for end, label in zip(ends, values):
+                f.write(f'"{label}"\n    {times[end]:.02f}\n')
 
     def get_recording(self, file, prepost):
         """
@@ -142,6 +299,23 @@ class EPGData:
             df = self.dfs[file]
             return df["time"].values, df[f"{prepost}{self.prepost_suffix}"].values
 
+    def get_pyramid(self, file: str, prepost: str) -> LODPyramid:
+        """
+        get_pyramid returns the min/max level-of-detail pyramid of the
+        pre or post data of file, building it in the background on first use.
+
+        Inputs:
+                file: string containing the key of the recording
+                prepost: string containing either "pre" or "post"
+
+        Outputs:
+                the LODPyramid of that channel
+        """
+        if not (file, prepost) in self.pyramids:
+            times, volts = self.get_recording(file, prepost)
+            self.pyramids[(file, prepost)] = LODPyramid(times, volts, background=True)
+        return self.pyramids[(file, prepost)]
+
     def set_labels(self, file: str, labels) -> None:
         """
         set_labels sets the labels of file to be those given in the
@@ -164,7 +338,7 @@ class EPGData:
                 f"but dataframe has length {self.dfs[file].shape[0]}"
             )
         else:
-            self.dfs[file][self.label_column] = labels
+            self.segments[file]["labels"] = self._encode(labels)
 
     def set_transitions(self, file, transitions, section_type):
         """
@@ -179,40 +353,54 @@ class EPGData:
         """
         if not file in self.dfs:
             raise Exception(f"{file} is not a key in self.dfs")
-        
-
-        df = self.dfs[file]
-        section_to_column = {"labels": self.label_column, "probes": self.probe_column}
-        col = section_to_column[section_type]
 
-        cleaned_transitions = [(round(t, 2), label) for t, label in transitions]
+        cleaned_transitions = sorted(((round(t, 2), label) for t, label in transitions), key=lambda tl: tl[0])
 
         if not cleaned_transitions:
             return
-        
-        # Build Series of transitions indexed by time
-        times, labels = zip(*cleaned_transitions)
-        transition_series = pd.Series(labels, index=times)
 
-        # Align with the time column (assumed to already match transition rounding)
-        aligned = transition_series.reindex(df["time"], method="ffill")
-
-        # Update label column
-        self.dfs[file][col] = aligned.reset_index(drop=True)
+        times, labels = zip(*cleaned_transitions)
+        # each transition starts at the first sample at or after its time
+        starts = np.searchsorted(self.dfs[file]["time"].values, times, side="left")
+        self.set_segments(file, section_type, starts, labels)
 
-        # df = self.dfs[file].copy()
-        # df["time"] = df["time"].round(2)
-        # df = df.set_index("time")
+    def update_label_range(self, file: str, start_time: float, end_time: float, label, section_type: str) -> None:
+        """
+        update_label_range labels the samples from start_time up to (not
+        including) end_time, leaving the rest of the recording untouched.
+        Only the segments overlapping the range are replaced.
+        Inputs:
+                file: string containing the key of the recording
+                start_time: start of the range, in seconds
+                end_time: end of the range, in seconds
+                label: the new label, None or NaN to unlabel the range
+                section_type: either "labels" or "probes"
+        Returns:
+                None
+        """
+        starts, values = self.get_segments(file, section_type)
+        times = self.dfs[file]["time"].values
+        # same rounding as set_transitions, a range starts at the first sample at or after its time
+        i0, i1 = np.searchsorted(times, [round(start_time, 2), round(end_time, 2)], side="left")
+        if i1 <= i0:
+            return
 
-        # section_to_column = {"labels": self.label_column, "probes": self.probe_column}
-        # col = section_to_column[section_type]
-        # df[col] = df[col].astype(str)
-        # df[col] = pd.NA
-        # for time, label in transitions:
-        #     rounded_time = round(time, 2)
-        #     df.loc[rounded_time, col] = label
-        # new_labels = df.reset_index()[col].ffill()
-        # self.dfs[file][col] = new_labels
+        first = np.searchsorted(starts, i0, side="left")  # segments before the range are kept
+        last = np.searchsorted(starts, i1, side="left")  # segments from i1 on are kept
+        new_starts = [starts[:first], [i0]]
+        new_values = [values[:first], [np.nan if label is None else label]]
+        if i1 < len(times) and (last == len(starts) or starts[last] != i1):
+            # the segment the range ends in continues after it
+            new_starts.append([i1])
+            new_values.append([values[last - 1]])
+        new_starts.append(starts[last:])
+        new_values.append(values[last:])
+        self.set_segments(
+            file,
+            section_type,
+            np.concatenate(new_starts),
+            np.concatenate([np.asarray(v, dtype=object) for v in new_values]),
+        )
 
     def get_transitions(self, file: str, section_type: str) -> list[tuple[float, str]]:
         """
@@ -227,29 +415,14 @@ class EPGData:
         """
         if not file in self.dfs:
             raise Exception(f"{file} is not a key in self.dfs")
-        
-
-        df: DataFrame = self.dfs[file]
-        times = df["time"].values
-
-        if section_type == "labels":
-            values = df[self.label_column].values
-        elif section_type == "probes":
-            values = df[self.probe_column].values
-        else:
+        if not section_type in self.section_columns:
             raise ValueError(f"Unknown section_type: {section_type}")
 
-        
+        starts, values = self.get_segments(file, section_type)
         if pd.isna(values).all():
             return []
 
-        # Find where the value changes (i.e., transitions)
-        change_indices = np.flatnonzero(values[1:] != values[:-1]) + 1
-
-        # Prepend time 0 with the initial label
-        initial = np.array([[0.0, values[0]]], dtype=object)
-        transitions = np.column_stack((times[change_indices], values[change_indices])) # combine elements pair-wise
-
-        transitions = np.vstack((initial, transitions)) # prepend initial zero
+        transitions = np.column_stack((self.dfs[file]["time"].values[starts], values)) # combine elements pair-wise
+        transitions[0, 0] = 0.0 # always starts at time 0
 
-        return transitions
\ No newline at end of file
+        return transitions
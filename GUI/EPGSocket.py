@@ -1,13 +1,23 @@
+import asyncio
 import socket
+import struct
 import threading
 import json
 import queue
+import random
 import time
 import sys
 import logging
+from collections import deque
+
+import numpy as np
 
 from PyQt6.QtCore import QObject, pyqtSignal
 
+from BoundedQueue import BoundedQueue
+from SharedRingBuffer import SharedRingBuffer, DEFAULT_RING_NAME
+from StreamRecorder import StreamRecorder
+
 # Log output to console even if running in background thread
 logging.basicConfig(
     level=logging.INFO,
@@ -17,21 +27,628 @@ logging.basicConfig(
     force=True
 )
 
-class SocketServer:
+# --- BINARY DATA FRAMES ---
+# Besides newline-delimited JSON, clients that ask for it in their handshake
+# ("client_id=ENGR;frames=binary") exchange samples in binary frames, many
+# samples per frame. A frame is a fixed header followed by the payload:
+# all sample times as float64, then the values of each channel in turn as
+# float32 or float64. Frames start with FRAME_MAGIC, a byte that never
+# starts a UTF-8 text line, so frames and JSON lines can share the stream.
+# The header also carries wall clock (time.time()) stamps of when the block
+# was acquired by the sender and received by the server, to measure latency.
+# Senders number their frames: a random stream id per sender session and a
+# sequence number that grows by one per frame, so receivers can detect lost
+# frames and the server can replay the ones a reconnecting client missed.
+FRAME_MAGIC = 0xB7
+FRAME_VERSION = 3
+# magic, version, value size (4 or 8 bytes), channels, source id, samples, payload size,
+# stream id, sequence number, acquired time, server time
+FRAME_HEADER = struct.Struct("<BBBB8sIIIQdd")
+FRAME_SERVER_TIME = struct.Struct("<d")
+FRAME_SERVER_TIME_OFFSET = FRAME_HEADER.size - FRAME_SERVER_TIME.size
+FRAME_SEQUENCE = struct.Struct("<IQ")
+FRAME_SEQUENCE_OFFSET = FRAME_HEADER.size - 16 - FRAME_SEQUENCE.size # before the two times
+FRAME_VALUE_TYPES = {4: np.dtype("<f4"), 8: np.dtype("<f8")}
+MAX_FRAME_PAYLOAD = 64 * 1024 * 1024 # larger sizes mean a corrupt stream
+REPLAY_FRAME_OVERHEAD = 600 # bytes of the python objects holding a replayed frame (frame, header copy, payload view, entry tuple)
+
+
+def parse_handshake(line: str) -> dict[str, str]:
+    """
+    Parses a handshake line such as "client_id=CS;frames=binary" into its fields.
+    """
+    fields = {}
+    for item in line.strip().split(";"):
+        key, _, value = item.partition("=")
+        if key.strip():
+            fields[key.strip()] = value.strip()
+    return fields
+
+
+def parse_json_lines(text: str) -> list[dict]:
+    """
+    Parses newline-separated JSON messages, e.g. a raw line SocketClient
+    could not decode, logging and skipping lines that are not a JSON object.
+    """
+    messages = []
+    for line in text.strip().split("\n"):
+        if not line.strip():
+            continue
+        try:
+            message = json.loads(line)
+        except json.JSONDecodeError:
+            logging.warning(f"[SOCKET] Skipping malformed message: {line[:80]!r}")
+            continue
+        if isinstance(message, dict):
+            messages.append(message)
+        else:
+            logging.warning(f"[SOCKET] Skipping message that is not an object: {line[:80]!r}")
+    return messages
+
+
+def encode_frame(times, values, source: str, value_dtype = np.float32, acquired: float | None = None,
+                 stream: int = 0, sequence: int = 0) -> bytes:
+    """
+    Packs a block of samples into a binary data frame.
+
+    Parameters:
+        times (array-like): Sample times, one per sample.
+        values (array-like): Sample values, shape (samples,) for one channel
+            or (channels, samples).
+        source (str): ID of the sending client, at most 8 characters.
+        value_dtype: np.float32 or np.float64.
+        acquired (float): Wall clock time the block was acquired, defaults to now.
+        stream (int): Stream id of the sender session, 32 bits.
+        sequence (int): Number of the frame in its stream.
+
+    Returns:
+        bytes: The frame.
+    """
+    times = np.ascontiguousarray(times, dtype="<f8")
+    values = np.asarray(values, dtype=np.dtype(value_dtype).newbyteorder("<"))
+    if values.ndim == 1:
+        values = values[np.newaxis, :]
+    if values.shape[1] != len(times):
+        raise ValueError(f"{len(times)} times but {values.shape[1]} values per channel")
+
+    payload_size = times.nbytes + values.nbytes
+    header = FRAME_HEADER.pack(
+        FRAME_MAGIC, FRAME_VERSION, values.itemsize, values.shape[0],
+        source.encode("ascii"), len(times), payload_size, stream, sequence,
+        time.time() if acquired is None else acquired, 0.0
+    )
+    return header + times.tobytes() + np.ascontiguousarray(values).tobytes()
+
+
+def decode_frame(frame: bytes) -> dict:
+    """
+    Unpacks a binary data frame into a "data_block" message.
+
+    Parameters:
+        frame (bytes): A whole frame, header included.
+
+    Returns:
+        dict: {"source", "type": "data_block", "times": (samples,) float64 array,
+               "values": (channels, samples) array, "stream", "sequence",
+               "acquired_time", "server_time"}.
+               The arrays are read only views of frame, server_time is 0 if
+               the frame did not pass through a server.
+    """
+    _, _, value_size, channels, source, samples, _, stream, sequence, acquired, server_time = FRAME_HEADER.unpack_from(frame)
+    times = np.frombuffer(frame, dtype="<f8", count=samples, offset=FRAME_HEADER.size)
+    values = np.frombuffer(
+        frame, dtype=FRAME_VALUE_TYPES[value_size], count=channels * samples,
+        offset=FRAME_HEADER.size + times.nbytes
+    ).reshape(channels, samples)
+    return {
+        "source": source.rstrip(b"\0").decode("ascii"),
+        "type": "data_block",
+        "times": times,
+        "values": values,
+        "stream": stream,
+        "sequence": sequence,
+        "acquired_time": acquired,
+        "server_time": server_time,
+    }
+
+
+def frame_payload_size(header, offset: int = 0) -> int:
+    """
+    Validates the frame header at offset and returns the size of its payload.
+
+    Raises:
+        ValueError: If the header is invalid, the stream cannot be resynchronized.
+    """
+    _, version, value_size, channels, _, samples, payload_size, *_ = FRAME_HEADER.unpack_from(header, offset)
+    if (
+        version != FRAME_VERSION
+        or value_size not in FRAME_VALUE_TYPES
+        or payload_size != samples * (8 + channels * value_size)
+        or payload_size > MAX_FRAME_PAYLOAD
+    ):
+        raise ValueError("invalid data frame header")
+    return payload_size
+
+
+class FrameDecoder:
+    """
+    Splits a received byte stream into JSON/text lines and binary data frames.
+    """
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def feed(self, data: bytes) -> list[tuple[str, str | bytes]]:
+        """
+        Adds received bytes and returns the messages completed by them.
+
+        Parameters:
+            data (bytes): Bytes read from the socket.
+
+        Returns:
+            list[tuple[str, str | bytes]]: ("line", text) for each text line
+                (without the newline) and ("frame", bytes) for each whole frame.
+
+        Raises:
+            ValueError: If a frame header is invalid, the stream cannot be resynchronized.
+        """
+        self._buffer += data
+        messages = []
+        position = 0
+        buffer = self._buffer
+        while position < len(buffer):
+            if buffer[position] == FRAME_MAGIC:
+                if len(buffer) - position < FRAME_HEADER.size:
+                    break
+                end = position + FRAME_HEADER.size + frame_payload_size(buffer, position)
+                if end > len(buffer):
+                    break
+                messages.append(("frame", bytes(buffer[position:end])))
+                position = end
+            else:
+                end = buffer.find(b"\n", position)
+                if end < 0:
+                    break
+                messages.append(("line", buffer[position:end].decode("utf-8", errors="replace")))
+                position = end + 1
+        del self._buffer[:position]
+        return messages
+
+
+class BaseSocketServer:
     """
-    A bidirectional socket to connect the CS and ENGR UIs.
-    Forwards EPG data and slider control events beteween the clients. 
+    The routing logic shared by the socket servers that connect the CS and ENGR UIs.
+    Forwards EPG data and slider control events beteween the clients.
+    Subclasses own the connections and implement start, stop and _send_bytes.
+
+    Recent data frames are kept in a replay buffer per stream id, up to
+    replay_max_bytes and replay_max_frames in total, also while CS is away.
+    Each frame is counted with REPLAY_FRAME_OVERHEAD bytes on top of its
+    size for the objects holding it, which outweigh the one sample frames
+    of wrapped JSON data. A reconnecting CS names
+    the next frame it expects of each stream it has seen in its handshake
+    ("resume=<stream>:<sequence>,<stream>:<sequence>") and gets the frames it
+    missed before any new one, in the order they arrived. Streams can
+    interleave, e.g. binary frames and wrapped JSON data (stream 0).
+
+    Given a StreamRecorder, the server also tees every data frame it receives
+    to disk, so the recording does not depend on CS being connected or responsive.
+
+    Control messages are coalesced per control name: at most control_max_rate
+    per second are forwarded, and of the ones arriving faster only the last
+    value is, once the interval has passed.
     """
-    def __init__(self, host = "localhost", port=16671):
+    def __init__(self, host = "localhost", port=16671, replay_max_bytes: int = 64 * 1024 * 1024,
+                 recorder: StreamRecorder = None, control_max_rate: float = 20.0, replay_max_frames: int = 100_000):
         self.host: str = host                                                   # use "localhost" for interal socket
         self.port: int = port                                                   # arbitrary port
-        self.clients: dict[str, socket.socket] = {"CS": None, "ENGR": None}     # map of client IDs to their connection objects
+        self.clients: dict[str, object] = {"CS": None, "ENGR": None}            # map of client IDs to their connection objects
         self.running = False                                                    # whether the server is running
         self.ready_event = threading.Event()                                    # event to signal that the server is ready to receive connections
-        self._server_socket: socket.socket = None                               # the socket connection
         self._current_time:float = time.perf_counter()                          # time tracker used in logging
 
         self.control_state: dict = {}                                           # the dictionary containing the current state of the controls
+        self.binary_clients: set[str] = set()                                   # IDs of clients that negotiated binary data frames
+
+        self.replay_max_bytes: int = replay_max_bytes                           # size limit of the replay buffers together
+        self.replay_max_frames: int = replay_max_frames                         # frame count limit of the replay buffers together
+        self._replay: dict[int, deque[tuple[int, int, bytearray, memoryview]]] = {}  # stream id -> (arrival, sequence, header, payload) of recent frames, oldest first
+        self._replay_bytes: int = 0                                             # size of the frames in the replay buffers, with their overhead
+        self._replay_count: int = 0                                             # number of frames in the replay buffers
+        self._replay_arrivals: int = 0                                          # number of frames remembered so far, orders frames across streams
+        self._legacy_sequence: int = 0                                          # sequence number for JSON data messages, wrapped in frames of stream 0
+        self._stream_lock = threading.Lock()                                    # keeps forwarding and replaying frames in order
+        self.recorder: StreamRecorder = recorder                                # writes the received data to disk, if given
+
+        self.control_max_rate: float = control_max_rate                         # max forwarded messages per second per control, 0 for no limit
+        self._control_sent: dict[str, float] = {}                               # control name -> time.monotonic() it was last forwarded
+        self._pending_controls: dict[str, tuple[dict, str]] = {}                # control name -> (latest message, sender) waiting to be forwarded
+        self._control_flush_scheduled: bool = False                             # whether a flush of the pending controls is scheduled
+        self._control_lock = threading.Lock()                                   # guards the pending controls
+
+    def start(self):
+        """
+        Starts the server in the background, listening for incoming client connections.
+        """
+        raise NotImplementedError
+
+    def stop(self):
+        """
+        Stops the server, closes all sockets, and disconnects any clients.
+        """
+        raise NotImplementedError
+
+    def _send_bytes(self, client_id: str, data: bytes):
+        """
+        Sends raw bytes to a connected client. Raises on failure.
+        """
+        raise NotImplementedError
+
+    def _send_many(self, client_id: str, chunks: list[bytes]):
+        """
+        Sends several messages to a client at once.
+        """
+        self._send_bytes(client_id, b"".join(chunks))
+
+    def _close_connection(self, connection):
+        """
+        Closes a client connection, which ends its receiving side.
+        """
+        raise NotImplementedError
+
+    def _drop_client(self, client_id: str, error: Exception):
+        """
+        Unregisters a client whose connection failed while sending to it and
+        closes the connection, so the sender and the other clients stay connected.
+        """
+        connection = self.clients.get(client_id)
+        if connection is None:
+            return  # already gone
+        logging.warning(f"[SOCKET] Dropping \"{client_id}\" after a failed send: {error}")
+        self._unregister(client_id)
+        try:
+            self._close_connection(connection)
+        except OSError:
+            pass
+
+    def _accept_handshake(self, line: str) -> tuple[str, bytes, dict[int, int] | None] | None:
+        """
+        Checks the client named by a handshake line, e.g. "client_id=CS",
+        "client_id=CS;frames=binary" or "client_id=CS;frames=binary;resume=1234:56,0:78".
+
+        Returns:
+            (client_id, ack, resume) with the acknowledgement to send back and
+            a dict of stream id -> sequence number of the next frame the client
+            expects, None if it asked for no replay. None for a duplicate
+            connection, which only gets a plain ack.
+        """
+        fields = parse_handshake(line)
+        client_id = fields["client_id"]
+        if self.clients.get(client_id) is not None:  # duplicate connection
+            logging.info(f"[SOCKET] Ignoring duplicate client connection request from \"{client_id}\"")
+            return None
+
+        resume = None
+        if "resume" in fields:
+            try:
+                resume = {}
+                for point in fields["resume"].split(","):
+                    stream, _, sequence = point.partition(":")
+                    resume[int(stream)] = int(sequence)
+            except ValueError:
+                resume = None
+                logging.warning(f"[SOCKET] Invalid resume point from \"{client_id}\": {fields['resume']}")
+
+        if fields.get("frames") == "binary":
+            self.binary_clients.add(client_id)
+            return client_id, b"ack;frames=binary\n", resume  # client acknowledged, binary frames agreed
+        self.binary_clients.discard(client_id)
+        return client_id, b"ack\n", resume  # client acknowledged
+
+    def _register(self, client_id: str, connection, resume: dict[int, int] | None):
+        """
+        Adds an acknowledged client, first replaying the frames it missed if
+        it asked to resume, so no new frame can overtake them.
+        """
+        with self._stream_lock:
+            self.clients[client_id] = connection
+            if resume is not None and client_id == "CS":
+                self._replay_frames(client_id, resume)
+
+    def _replay_frames(self, client_id: str, resume: dict[int, int]):
+        """
+        Sends the buffered frames of each stream from its resume sequence
+        number on, in the order they arrived. Streams the client has not seen
+        (e.g. ENGR restarted) are new to it as a whole. Frames already evicted
+        are missing, which the client notices by their sequence numbers.
+        Call with the stream lock held.
+        """
+        frames = sorted(
+            (frame for stream, buffer in self._replay.items()
+             for frame in buffer if frame[1] >= resume.get(stream, 0)),
+            key=lambda frame: frame[0]
+        )
+        if not frames:
+            return
+        logging.info(f"[SOCKET] Replaying {len(frames)} data frames to \"{client_id}\"")
+        try:
+            self._send_frames(client_id, [(header, payload) for _, _, header, payload in frames])
+        except OSError as e:
+            self._drop_client(client_id, e)
+        except Exception as e:
+            logging.warning(f"[SOCKET] Failed to replay data to {client_id}: {e}")
+
+    def _remember_frame(self, header: bytearray, payload: memoryview):
+        """
+        Adds a frame to the replay buffer of its stream, evicting the oldest
+        frames of any stream over replay_max_bytes or replay_max_frames.
+        Call with the stream lock held.
+        """
+        stream, sequence = FRAME_SEQUENCE.unpack_from(header, FRAME_SEQUENCE_OFFSET)
+        self._replay.setdefault(stream, deque()).append((self._replay_arrivals, sequence, header, payload))
+        self._replay_arrivals += 1
+        self._replay_bytes += len(header) + len(payload) + REPLAY_FRAME_OVERHEAD
+        self._replay_count += 1
+        while self._replay_bytes > self.replay_max_bytes or self._replay_count > self.replay_max_frames:
+            oldest = min(self._replay, key=lambda s: self._replay[s][0][0])
+            if oldest == stream and len(self._replay[stream]) == 1:
+                break # keep the newest frame
+            _, _, old_header, old_payload = self._replay[oldest].popleft()
+            self._replay_bytes -= len(old_header) + len(old_payload) + REPLAY_FRAME_OVERHEAD
+            self._replay_count -= 1
+            if not self._replay[oldest]:
+                del self._replay[oldest]
+
+    def _announce(self, client_id: str, addr):
+        """
+        Exchanges connection status between a newly registered client and its peers.
+        """
+        # Get status of already-connected clients
+        for peer_id, peer_sock in self.clients.items():
+            if peer_id != client_id and peer_sock:
+                self.broadcast_peer_status(peer_id, "connected", target=client_id)
+
+        # Notify other cilents of succesful connection
+        self.broadcast_peer_status(client_id, "connected")
+        logging.info(f"[SOCKET] Client \"{client_id}\" connected from {addr}")
+
+    def _unregister(self, client_id: str):
+        """
+        Forgets a disconnected client and notifies its peers.
+        """
+        self.clients[client_id] = None
+        self.binary_clients.discard(client_id)
+        self.broadcast_peer_status(client_id, "disconnected")
+
+    def broadcast_peer_status(self, changed_id: str, status: str, target: str = None):
+        """
+        Broadcasts a peer's status to all other clients or to a specific target client.
+        - `changed_id`: ID of the client whose status changed.
+        - `status`: "connected" or "disconnected"
+        - `target`: if given, only send to this client (used when a new client joins).
+        """
+        message = json.dumps({
+            "source": "socket",
+            "type": "status",
+            "peer_id": changed_id,
+            "status": status
+        }) + "\n"
+
+        for client_id, client_sock in self.clients.items():
+            if client_sock is None:
+                continue
+            if target is not None:
+                if client_id == target:
+                    try:
+                        self._send_bytes(client_id, message.encode('utf-8'))
+                    except:
+                        pass
+            else:
+                if client_id != changed_id:
+                    try:
+                        self._send_bytes(client_id, message.encode('utf-8'))
+                    except:
+                        pass
+
+    def _dispatch(self, kind: str, message: str | bytes, client_id: str):
+        """
+        Hands a message from FrameDecoder to the JSON or the binary frame handler.
+        """
+        if kind == "frame":
+            self._forward_frame(message)
+        elif message.strip():
+            self._process_message(message.strip(), client_id)
+
+    def _process_message(self, message: str, client_id: str):
+        """
+        Processes a single JSON-formatted message from a client.
+        Delegates to control or data handlers based on message type.
+        """
+        try:
+            message_dict = json.loads(message)
+        except json.JSONDecodeError:
+            logging.warning(f"[SOCKET] Invalid JSON from {client_id}: {message}")
+            return
+
+        message_type = message_dict["type"]
+        if message_type == "data": # time-voltage data
+            self._forward_data(message_dict)
+
+        elif message_type  == "control": # control value
+            if message_dict.get("source") == client_id:
+                self.control_state[message_dict["name"]] = message_dict["value"]
+                self._coalesce_control(message_dict, client_id)
+
+        elif message_type == "state_sync":
+            incoming_state = message_dict.get("value")
+            logging.info(f"[{client_id}] Full state sync received with {len(incoming_state)} controls")
+
+            # Update full state, it supersedes older pending control values
+            self.control_state.update(incoming_state)
+            with self._control_lock:
+                for name in incoming_state:
+                    self._pending_controls.pop(name, None)
+
+            # Broadcast to CS
+            self._broadcast(message_dict, exclude=client_id)
+
+        else:
+            logging.warning(f"[{client_id}] Unknown message type: {message_dict['type']}")
+
+    def _coalesce_control(self, message: dict, client_id: str):
+        """
+        Forwards a control message now if its control was not forwarded within
+        the last 1 / control_max_rate seconds, otherwise keeps it as the
+        control's pending value (replacing an older one) and schedules a flush.
+        """
+        name = message["name"]
+        interval = 1 / self.control_max_rate if self.control_max_rate > 0 else 0
+        now = time.monotonic()
+        with self._control_lock:
+            wait = self._control_sent.get(name, float("-inf")) + interval - now
+            if wait > 0:
+                self._pending_controls[name] = (message, client_id)
+                if not self._control_flush_scheduled:
+                    self._control_flush_scheduled = True
+                    self._schedule(wait, self._flush_controls)
+                return
+            self._control_sent[name] = now
+        self._send_control(message, client_id)
+
+    def _flush_controls(self):
+        """
+        Forwards the pending control values whose interval has passed and
+        reschedules itself for the rest.
+        """
+        interval = 1 / self.control_max_rate if self.control_max_rate > 0 else 0
+        now = time.monotonic()
+        due = []
+        with self._control_lock:
+            for name, pending in list(self._pending_controls.items()):
+                if self._control_sent.get(name, float("-inf")) + interval <= now:
+                    due.append(pending)
+                    self._control_sent[name] = now
+                    del self._pending_controls[name]
+            if self._pending_controls:
+                wait = min(self._control_sent[name] + interval for name in self._pending_controls) - now
+                self._schedule(max(wait, 0.001), self._flush_controls)
+            else:
+                self._control_flush_scheduled = False
+        for message, client_id in due:
+            self._send_control(message, client_id)
+
+    def _send_control(self, message: dict, client_id: str):
+        """
+        Forwards a control message to the other clients.
+        """
+        logging.info(f"[{client_id}] Control: {message['name']} = {message['value']}")
+        self._broadcast(message, exclude=client_id)
+
+    def _schedule(self, delay: float, callback):
+        """
+        Calls callback after delay seconds, from a timer thread.
+        """
+        timer = threading.Timer(delay, callback)
+        timer.daemon = True
+        timer.start()
+
+    def _cs_connected(self) -> bool:
+        """
+        Returns whether CS is connected, logging a warning at most once a second if not.
+        """
+        if self.clients.get("CS"):
+            return True
+        if (time.perf_counter() - self._current_time) > 1: # only send every 1s
+            logging.warning("[SOCKET] CS not connected, can't forward data.")
+            self._current_time = time.perf_counter()
+        return False
+
+    def _forward_data(self, data: dict):
+        """
+        Forwards a (timestamp, voltage) JSON data message from ENGR to CS,
+        wrapped in a one sample frame of stream 0 so it is numbered and
+        replayed like binary data.
+        If CS is not connected, logs a warning.
+        """
+        data_list = data["value"].split(",")
+        frame = encode_frame(
+            [float(data_list[0])], [float(data_list[2])], "ENGR", np.float64,  # (timestamp, voltage)
+            stream=0, sequence=self._legacy_sequence
+        )
+        self._legacy_sequence += 1
+        self._forward_frame(frame)
+
+    def _forward_frame(self, frame: bytes):
+        """
+        Forwards a binary data frame from ENGR to CS with the server time
+        stamped in, keeps it for replay and hands it to the recorder.
+        If CS is not connected, logs a warning.
+        """
+        if self.recorder is not None:
+            self.recorder.record_block(decode_frame(frame))
+
+        # stamp the server time into a copy of the header, the payload is sent as is
+        header = bytearray(memoryview(frame)[:FRAME_HEADER.size])
+        FRAME_SERVER_TIME.pack_into(header, FRAME_SERVER_TIME_OFFSET, time.time())
+        payload = memoryview(frame)[FRAME_HEADER.size:]
+        with self._stream_lock:
+            self._remember_frame(header, payload)
+            if not self._cs_connected():
+                return
+            try:
+                self._send_frames("CS", [(header, payload)])
+            except OSError as e:
+                self._drop_client("CS", e)
+
+    def _send_frames(self, client_id: str, frames: list[tuple[bytearray, memoryview]]):
+        """
+        Sends data frames to a client as they are if it negotiated binary
+        frames, otherwise as one JSON data message per sample of the first
+        channel, with the stream id and sequence number of its frame.
+        """
+        if client_id in self.binary_clients:
+            self._send_many(client_id, [chunk for frame in frames for chunk in frame])
+            return
+
+        lines = []
+        for header, payload in frames:
+            block = decode_frame(bytes(header) + payload)
+            lines += [
+                (json.dumps({
+                    "source": block["source"], "type": "data", "value": (t, v),
+                    "stream": block["stream"], "seq": block["sequence"]
+                }) + "\n").encode("utf-8")
+                for t, v in zip(block["times"].tolist(), block["values"][0].tolist())
+            ]
+        if lines:
+            self._send_many(client_id, lines)
+
+    def _broadcast(self, message: dict, exclude: str = None):
+        """
+        Sends a JSON message to all connected clients, optionally excluding one.
+        """
+        serialized = json.dumps(message) + "\n"
+        for client_id, sock in self.clients.items():
+            if sock and client_id != exclude:
+                try:
+                    logging.debug(f"[SOCKET] Sending to [{client_id}]")
+                    self._send_bytes(client_id, serialized.encode("utf-8"))
+                except OSError as e:
+                    self._drop_client(client_id, e)
+                except Exception as e:
+                    logging.warning(f"[SOCKET] Failed to send to {client_id}: {e}")
+
+
+class SocketServer(BaseSocketServer):
+    """
+    A bidirectional socket to connect the CS and ENGR UIs, with a thread per client.
+    Forwards EPG data and slider control events beteween the clients.
+    """
+    def __init__(self, host = "localhost", port=16671, replay_max_bytes: int = 64 * 1024 * 1024,
+                 recorder: StreamRecorder = None, control_max_rate: float = 20.0, replay_max_frames: int = 100_000):
+        super().__init__(host, port, replay_max_bytes, recorder, control_max_rate, replay_max_frames)
+        self.clients: dict[str, socket.socket] = {"CS": None, "ENGR": None}     # map of client IDs to their connection objects
+        self._server_socket: socket.socket = None                               # the socket connection
+        self._send_locks: dict[str, threading.Lock] = {}                        # one writer per client at a time, so messages never interleave
 
     def start(self):
         """
@@ -54,13 +671,15 @@ class SocketServer:
         for client_id, client_sock in list(self.clients.items()):
             if client_sock:
                 try:
-                    client_sock.sendall('SERVER SHUTDOWN'.encode('utf-8'))
+                    with self._send_locks[client_id]:
+                        client_sock.sendall('SERVER SHUTDOWN\n'.encode('utf-8'))
                     logging.info(f"[SOCKET] Disconnected {client_id}")
                 except Exception as e:
                     logging.warning(f"[SOCKET] Error closing {client_id}: {e}")
 
 
         self.clients = {"CS": None, "ENGR": None}
+        self.binary_clients.clear()
 
         # Close server socket
         if self._server_socket:
@@ -70,8 +689,36 @@ class SocketServer:
             except Exception as e:
                 logging.warning(f"[SOCKET] Error closing socket: {e}")
 
+        if self.recorder is not None:
+            self.recorder.close()
         logging.info("[SOCKET] Shutdown complete")
 
+    def _send_bytes(self, client_id: str, data: bytes):
+        """
+        Sends raw bytes to a connected client. Raises on failure.
+        Data, control and status messages are sent from different threads
+        (the sender's, the coalescing timer's), so each sendall holds the
+        client's send lock to keep its bytes in one piece.
+        """
+        sock = self.clients.get(client_id)
+        if sock is None:
+            raise ConnectionError(f"\"{client_id}\" is not connected")
+        with self._send_locks[client_id]:
+            sock.sendall(data)
+
+    def _register(self, client_id: str, connection, resume: dict[int, int] | None):
+        """
+        Adds an acknowledged client with its send lock, see BaseSocketServer._register.
+        """
+        self._send_locks.setdefault(client_id, threading.Lock())
+        super()._register(client_id, connection, resume)
+
+    def _close_connection(self, connection: socket.socket):
+        """
+        Shuts a client socket down, which wakes its thread out of recv.
+        """
+        connection.shutdown(socket.SHUT_RDWR)
+
     def _listen(self):
         """
         Internal loop that binds the server socket and accepts new connections.
@@ -91,177 +738,281 @@ class SocketServer:
                     threading.Thread(target=self._handle_client, args=(conn, addr), daemon=True).start()
                 except OSError:
                     break  # socket closed
-       
+
     def _handle_client(self, sock: socket.socket, addr):
         """
         Processes new client connections and begins reading messages from it.
         """
         client_id = None
         try:
-            client_id = sock.recv(1024).decode().strip().split("=")[1]
-            sock.sendall(b"ack\n")  # client acknowledged 
-            if self.clients.get(client_id) is not None:  # duplicate connection
+            # handshake line, e.g. "client_id=CS" or "client_id=CS;frames=binary"
+            decoder = FrameDecoder()
+            handshake = []
+            while not handshake:
+                chunk = sock.recv(1024)
+                if not chunk:
+                    return
+                handshake = decoder.feed(chunk)
+            kind, line = handshake[0]
+            accepted = self._accept_handshake(line if kind == "line" else "")
+            if accepted is None:
+                sock.sendall(b"ack\n")  # client acknowledged
                 sock.close()
-                logging.info(f"[SOCKET] Ignoring duplicate client connection request from \"{client_id}\"")
                 return
 
-            self.clients[client_id] = sock
+            client_id, ack, resume = accepted
+            sock.sendall(ack)
+            self._register(client_id, sock, resume)
+            self._announce(client_id, addr)
 
-            # Get status of already-connected clients
-            for peer_id, peer_sock in self.clients.items():
-                if peer_id != client_id and peer_sock:
-                    self.broadcast_peer_status(peer_id, "connected", target=client_id)
-
-            # Notify other cilents of succesful connection
-            self.broadcast_peer_status(client_id, "connected")
-            logging.info(f"[SOCKET] Client \"{client_id}\" connected from {addr}")
-            self._receive_loop(sock, client_id)
+            # messages sent right behind the handshake
+            for kind, message in handshake[1:]:
+                self._dispatch(kind, message, client_id)
+            self._receive_loop(sock, client_id, decoder)
         except Exception as e:
             logging.warning(f"[SOCKET] Error in _handle_client: {e}")
         finally:
-            if client_id:
-                self.clients[client_id] = None         
-                self.broadcast_peer_status(client_id, "disconnected")   
+            if client_id and self.clients.get(client_id) is sock:  # not dropped already
+                self._unregister(client_id)
             try:
                 sock.close()
             except:
                 pass
 
-    def broadcast_peer_status(self, changed_id: str, status: str, target: str = None):
-        """
-        Broadcasts a peer's status to all other clients or to a specific target client.
-        - `changed_id`: ID of the client whose status changed.
-        - `status`: "connected" or "disconnected"
-        - `target`: if given, only send to this client (used when a new client joins).
-        """
-        message = json.dumps({
-            "source": "socket",
-            "type": "status",
-            "peer_id": changed_id,
-            "status": status
-        }) + "\n"
-
-        for client_id, client_sock in self.clients.items():
-            if client_sock is None:
-                continue
-            if target is not None:
-                if client_id == target:
-                    try:
-                        client_sock.sendall(message.encode('utf-8'))
-                    except:
-                        pass
-            else:
-                if client_id != changed_id:
-                    try:
-                        client_sock.sendall(message.encode('utf-8'))
-                    except:
-                        pass
-    
-    def _receive_loop(self, sock: socket.socket, client_id: str):
+    def _receive_loop(self, sock: socket.socket, client_id: str, decoder: FrameDecoder):
         """
-        Backgroung loop to read newline-delimited JSON messages from the given client connection
-        and dispatch them to the appropriate handler.
+        Backgroung loop to read newline-delimited JSON messages and binary data frames
+        from the given client connection and dispatch them to the appropriate handler.
         """
-        buffer = ""
         try:
             while True:
-                if not self.clients.get(client_id):  # already removed externally
+                if self.clients.get(client_id) is not sock:  # already removed externally
                     break
 
-                chunk = sock.recv(1024)
+                chunk = sock.recv(65536)
                 if not chunk:
                     logging.info(f"[SOCKET] Client \"{client_id}\" disconnected")
                     break
-                
-                buffer += chunk.decode('utf-8')
-                while "\n" in buffer:
-                    line, buffer = buffer.split("\n", 1)
-                    self._process_message(line.strip(), client_id)
+
+                for kind, message in decoder.feed(chunk):
+                    self._dispatch(kind, message, client_id)
         except ConnectionResetError:
             logging.info(f"[SOCKET] Client \"{client_id}\" disconnected abruptly (reset)")
         except Exception as e:
             logging.warning(f"[SOCKET] Error in _receive_loop for \"{client_id}\": {e}")
 
 
+class AsyncSocketServer(BaseSocketServer):
+    """
+    A drop-in replacement for SocketServer that serves every client from
+    one asyncio event loop running in a background thread.
 
-    def _process_message(self, message: str, client_id: str):
+    Messages are framed on the byte stream: JSON lines are read with
+    StreamReader.readuntil and binary data frames with readexactly using
+    the payload size in their header, so nothing is re-scanned or decoded
+    before it is complete. Frames are forwarded as the bytes received
+    and batches of JSON lines with a single writelines.
+    """
+    def __init__(self, host = "localhost", port=16671, replay_max_bytes: int = 64 * 1024 * 1024,
+                 recorder: StreamRecorder = None, control_max_rate: float = 20.0, replay_max_frames: int = 100_000):
+        super().__init__(host, port, replay_max_bytes, recorder, control_max_rate, replay_max_frames)
+        self.clients: dict[str, asyncio.StreamWriter] = {"CS": None, "ENGR": None}  # map of client IDs to their stream writers
+        self._loop: asyncio.AbstractEventLoop = None                                # the event loop, runs in its own thread
+        self._server: asyncio.base_events.Server = None                             # the listening server
+
+    def start(self):
         """
-        Processes a single JSON-formatted message from a client.
-        Delegates to control or data handlers based on message type.
+        Starts the event loop in a background thread, listening for incoming client connections.
         """
-        try:
-            message_dict = json.loads(message)
-        except json.JSONDecodeError:
-            logging.warning(f"[SOCKET] Invalid JSON from {client_id}: {message}")
+        if self.running:
             return
-        
-        message_type = message_dict["type"] 
-        if message_type == "data": # time-voltage data
-            self._forward_data(message_dict)
+        self.running = True
+        self.ready_event.clear()
+        threading.Thread(target = self._run_loop, daemon = True).start()
+        self.ready_event.wait()  # wait for server to fully initialize
 
-        elif message_type  == "control": # control value        
-            if message_dict.get("source") == client_id:
-                logging.info(f"[{client_id}] Control: {message_dict['name']} = {message_dict['value']}")        
-                self.control_state[message_dict["name"]] = message_dict["value"]
-                self._broadcast(message_dict, exclude=client_id)
+    def stop(self):
+        """
+        Stops the server, closes all sockets, and disconnects any clients.
+        """
+        if not self.running:
+            return
+        self.running = False
+        logging.info("[SOCKET] Shutting down socket...")
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result(timeout=5)
+        except Exception as e:
+            logging.warning(f"[SOCKET] Error during shutdown: {e}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        if self.recorder is not None:
+            self.recorder.close()
+        logging.info("[SOCKET] Shutdown complete")
 
-        elif message_type == "state_sync":
-            incoming_state = message_dict.get("value")
-            logging.info(f"[{client_id}] Full state sync received with {len(incoming_state)} controls")
+    def _send_bytes(self, client_id: str, data: bytes):
+        """
+        Queues raw bytes on a client's transport. Only call from the event loop.
+        """
+        self._writer(client_id).write(data)
 
-            # Update full state
-            self.control_state.update(incoming_state)
+    def _send_many(self, client_id: str, chunks: list[bytes]):
+        """
+        Queues several messages on a client's transport in one call.
+        """
+        self._writer(client_id).writelines(chunks)
 
-            # Broadcast to CS
-            self._broadcast(message_dict, exclude=client_id)
+    def _writer(self, client_id: str) -> asyncio.StreamWriter:
+        """
+        Returns the stream writer of a client, raising ConnectionError if it
+        is not connected or its transport is closing (writes would be lost).
+        """
+        writer = self.clients.get(client_id)
+        if writer is None or writer.is_closing():
+            raise ConnectionError(f"\"{client_id}\" is not connected")
+        return writer
 
-        else:
-            logging.warning(f"[{client_id}] Unknown message type: {message_dict['type']}")
-    
-    def _forward_data(self, data: dict):
+    def _close_connection(self, connection: asyncio.StreamWriter):
         """
-        Forwards a simplified (timestamp, voltage) message from ENGR to CS.
-        If CS is not connected, logs a warning.
+        Closes a client's transport, which ends its handler with end of stream.
         """
-        cs_sock = self.clients.get("CS")
-        if not cs_sock:
-            if (time.perf_counter() - self._current_time) > 1: # only send every 1s
-                logging.warning("[SOCKET] CS not connected, can't forward data.")
-                self._current_time = time.perf_counter()
-            return
+        connection.close()
 
-        data_list = data["value"].split(",")
-        msg = {
-            "source": "ENGR",
-            "type": "data",
-            "value": (data_list[0], data_list[2]),  # (timestamp, voltage)
-        }
-        cs_sock.sendall((json.dumps(msg) + "\n").encode("utf-8"))
+    def _schedule(self, delay: float, callback):
+        """
+        Calls callback after delay seconds, on the event loop.
+        """
+        self._loop.call_soon_threadsafe(self._loop.call_later, delay, callback)
 
+    def _run_loop(self):
+        """
+        Internal method: runs the event loop in the background thread.
+        """
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._server = self._loop.run_until_complete(
+                asyncio.start_server(self._handle_client, self.host, self.port, reuse_address=True, limit=1 << 20)
+            )
+        except OSError as e:
+            logging.warning(f"[SOCKET] Could not listen on {self.host}:{self.port}: {e}")
+            self.running = False
+            self.ready_event.set()
+            return
+        logging.info(f"[SOCKET] Listening on {self.host}:{self.port}")
+        self.ready_event.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._loop.close()
 
-    def _broadcast(self, message: dict, exclude: str = None):
+    async def _shutdown(self):
         """
-        Sends a JSON message to all connected clients, optionally excluding one.
+        Internal coroutine: notifies and closes all clients, then the listening socket.
         """
-        serialized = json.dumps(message) + "\n"
-        for client_id, sock in self.clients.items():
-            if sock and client_id != exclude:
+        for client_id, writer in list(self.clients.items()):
+            if writer:
                 try:
-                    print(f"Sending to [{client_id}]")
-                    sock.sendall(serialized.encode("utf-8"))
+                    writer.write('SERVER SHUTDOWN\n'.encode('utf-8'))
+                    await writer.drain()
+                    writer.close()
+                    logging.info(f"[SOCKET] Disconnected {client_id}")
                 except Exception as e:
-                    logging.warning(f"[SOCKET] Failed to send to {client_id}: {e}")
+                    logging.warning(f"[SOCKET] Error closing {client_id}: {e}")
+
+        self.clients = {"CS": None, "ENGR": None}
+        self.binary_clients.clear()
+
+        self._server.close()
+        await self._server.wait_closed()
+        logging.info("[SOCKET] Socket closed")
+
+    async def _read_message(self, reader: asyncio.StreamReader) -> tuple[str, str | bytes]:
+        """
+        Internal coroutine: reads the next message off a client stream.
+
+        Returns:
+            ("line", text) for a JSON/text line, without the newline, or
+            ("frame", bytes) for a whole binary data frame.
+
+        Raises:
+            asyncio.IncompleteReadError: If the client disconnected.
+            ValueError: If a frame header is invalid.
+        """
+        first = await reader.readexactly(1)
+        if first[0] != FRAME_MAGIC:
+            line = first + await reader.readuntil(b"\n") if first != b"\n" else b""
+            return "line", line.rstrip(b"\n").decode("utf-8", errors="replace")
+
+        header = first + await reader.readexactly(FRAME_HEADER.size - 1)
+        payload_size = frame_payload_size(memoryview(header))
+        return "frame", header + await reader.readexactly(payload_size)
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Internal coroutine: processes a new client connection and reads its messages until it disconnects.
+        """
+        addr = writer.get_extra_info("peername")
+        client_id = None
+        try:
+            # handshake line, e.g. "client_id=CS" or "client_id=CS;frames=binary"
+            kind, line = await self._read_message(reader)
+            accepted = self._accept_handshake(line if kind == "line" else "")
+            if accepted is None:
+                writer.write(b"ack\n")  # client acknowledged
+                await writer.drain()
+                writer.close()
+                return
+
+            client_id, ack, resume = accepted
+            writer.write(ack)
+            self._register(client_id, writer, resume)
+            self._announce(client_id, addr)
+
+            while self.clients.get(client_id) is writer:
+                kind, message = await self._read_message(reader)
+                self._dispatch(kind, message, client_id)
+                await self._drain()
+        except asyncio.IncompleteReadError:
+            logging.info(f"[SOCKET] Client \"{client_id}\" disconnected")
+        except ConnectionResetError:
+            logging.info(f"[SOCKET] Client \"{client_id}\" disconnected abruptly (reset)")
+        except Exception as e:
+            logging.warning(f"[SOCKET] Error in _handle_client for \"{client_id}\": {e}")
+        finally:
+            if client_id and self.clients.get(client_id) is writer:
+                self._unregister(client_id)
+            writer.close()
+
+    async def _drain(self):
+        """
+        Internal coroutine: waits for clients whose send buffers are full, so a
+        slow reader applies backpressure instead of growing memory without bound.
+        """
+        for client_id, writer in list(self.clients.items()):
+            if writer is None:
+                continue
+            try:
+                await writer.drain()
+            except ConnectionError:
+                pass  # its own handler unregisters it
+
 
-  
 class SocketClient(QObject):
     """
     A client class to connect to the socket and handle sending/receiving data it.
     Incoming messages are pulled from the recieve queue, and outgoing messages are placed in the send queue.
+
+    Received data frames are checked against their sequence numbers: frames
+    missing from the stream are counted and logged as gaps (see
+    sequence_stats), repeated ones are skipped. On reconnecting, the client
+    asks the server to replay the frames after the last one it received.
     """
     connectionChanged = pyqtSignal(bool)        # emitted when this client's connection changes
     peerConnectionChanged = pyqtSignal(bool)    # emitted when the other client's connection changes
 
-    def __init__(self, client_id, host="localhost", port=16671, parent: QObject = None):
+    def __init__(self, client_id, host="localhost", port=16671, parent: QObject = None, binary_frames: bool = True,
+                 send_maxsize: int = 10000, send_policy: str = "block",
+                 recv_maxsize: int = 10000, recv_policy: str = "decimate", shared_memory: bool = False,
+                 auto_reconnect: bool = False, reconnect_interval: float = 1.0):
         """
         Initializes a new SocketClient instance.
 
@@ -270,16 +1021,53 @@ class SocketClient(QObject):
             host (str): The server hostname or IP address to connect to.
             port (int): The server port to connect to.
             parent (QObject, optional): The parent QObject in the Qt hierarchy.
+            binary_frames (bool): Ask the server for binary data frames instead of JSON data messages.
+            send_maxsize (int): Max number of queued outgoing messages.
+            send_policy (str): What to do when the send queue is full, see BoundedQueue.
+                "block" (default) holds up the sender, e.g. ENGR's acquisition loop.
+            recv_maxsize (int): Max number of queued incoming messages.
+            recv_policy (str): What to do when the receive queue is full, see BoundedQueue.
+                "decimate" (default) thins queued data blocks, "block" stops reading
+                the socket, which in turn holds up the server and the sender.
+            shared_memory (bool): For a sender on the same PC as CS: write samples to
+                the shared memory ring CS creates (see SharedRingBuffer) instead of
+                the socket, whenever it exists.
+            auto_reconnect (bool): Keep trying to connect again, every reconnect_interval
+                seconds, when the connection fails or drops until disconnect is called.
+            reconnect_interval (float): Seconds between connection attempts.
         """
         super().__init__()
         self.client_id: str = client_id         # identifying string for this client (e.g., CS, ENGR) 
         self.host: str = host                   # use "localhost" for interal socket
         self.port: int = port                   # arbitrary port
         self.parent = parent                    # the parent Qt object
-        self.send_queue: queue = queue.Queue()  # queue to send data to other client
-        self.recv_queue: queue = queue.Queue()  # queue to receive data from other client
+        self.send_queue: BoundedQueue = BoundedQueue(send_maxsize, send_policy)  # queue to send data to other client
+        self.recv_queue: BoundedQueue = BoundedQueue(recv_maxsize, recv_policy)  # queue to receive data from other client
         self.connected: bool = False            # whether the client is connected to the socket
         self._sock: socket.socket = None        # the socket connection
+        self.request_binary_frames: bool = binary_frames    # whether to ask for binary data frames in the handshake
+        self.binary_frames: bool = False        # whether the server agreed to binary data frames
+        self.use_shared_memory: bool = shared_memory        # whether to send samples through the shared memory ring
+        self.ring: SharedRingBuffer = None      # the attached ring, if any
+        self._ring_lock = threading.Lock()      # guards ring between the sending and the receiving thread
+        self.auto_reconnect: bool = auto_reconnect          # whether to reconnect after the connection drops
+        self.reconnect_interval: float = reconnect_interval # seconds between connection attempts
+        self._closing: bool = False             # whether disconnect was called, stops reconnecting
+        self._reconnecting: bool = False        # whether the reconnect thread is running
+
+        self.stream_id: int = random.getrandbits(32) or 1  # id of the frames sent by this client, 0 is for wrapped JSON data
+        self._next_sequence: int = 0            # sequence number of the next frame sent
+        self.expected_sequences: dict[int, int] = {}  # stream id -> sequence number of the next frame expected, of recent streams
+        self.gaps: deque[tuple[int, int]] = deque(maxlen=100)  # (first, last) sequence numbers of recent gaps
+        self.gap_count: int = 0                 # gaps detected
+        self.missing_frames: int = 0            # frames lost in gaps
+        self.duplicate_frames: int = 0          # frames received again and skipped
+
+    @property
+    def active(self) -> bool:
+        """ Whether the client is connected or will try to reconnect. """
+        return self.connected or (self.auto_reconnect and not self._closing)
+
     def connect(self):
         """
         Attempts to connect to the server and begin communication.
@@ -287,55 +1075,224 @@ class SocketClient(QObject):
         Sends the client ID immediately upon connection.
         Emits `connectionChanged(True)` on success or `connectionChanged(False)` on failure.
         """
+        self._closing = False
+        self._open()
+
+    def _open(self, quiet: bool = False):
+        """
+        Internal method: opens the connection, see connect. Asks for a replay of
+        the missed frames if frames were received before. On failure, logs a
+        warning unless quiet and starts reconnecting if auto_reconnect is set.
+        """
         try:
             self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             self._sock.connect((self.host, self.port))
 
             # send initial message with client ID to socket
-            self._sock.sendall(f"client_id={self.client_id}\n".encode('utf-8'))
+            handshake = f"client_id={self.client_id}"
+            if self.request_binary_frames:
+                handshake += ";frames=binary"
+            if self.expected_sequences:
+                handshake += ";resume=" + ",".join(
+                    f"{stream}:{sequence}" for stream, sequence in self.expected_sequences.items()
+                )
+            self.binary_frames = False
+            self._sock.sendall(f"{handshake}\n".encode('utf-8'))
             self.connected = True
             self.connectionChanged.emit(True)
+            if self.use_shared_memory:
+                self._attach_ring()
     
             threading.Thread(target=self._send_loop, daemon=True).start()
             threading.Thread(target=self._recv_loop, daemon=True).start()
         except Exception as e:
             self.connected = False
             self.connectionChanged.emit(False)
-            logging.warning(f"[SocketClient] Connection failed: {e}")
+            self._close_socket()
+            if not quiet:
+                logging.warning(f"[SocketClient] Connection failed: {e}")
+            self._start_reconnect()
 
+    def _start_reconnect(self):
+        """
+        Internal method: starts the reconnect thread if auto_reconnect is set and it isn't running.
+        """
+        if self.auto_reconnect and not self._closing and not self._reconnecting:
+            self._reconnecting = True
+            threading.Thread(target=self._reconnect_loop, daemon=True).start()
 
+    def _reconnect_loop(self):
+        """
+        Internal method: runs in a background thread.
+        Tries to connect every reconnect_interval seconds until connected or disconnect is called.
+        """
+        logging.info(f"[SocketClient] Reconnecting to {self.host}:{self.port}...")
+        try:
+            while not self._closing and not self.connected:
+                time.sleep(self.reconnect_interval)
+                if not self._closing:
+                    self._open(quiet=True)
+        finally:
+            self._reconnecting = False
+        if self.connected:
+            logging.info(f"[SocketClient] Reconnected to {self.host}:{self.port}")
 
     def disconnect(self):
         """
         Gracefully disconnects from the server and closes the socket.
-        Stops background communication threads.
+        Stops background communication threads and reconnecting.
         Emits `connectionChanged(False)` upon completion.
         """
+        self._closing = True
         self.connected = False
         self.connectionChanged.emit(False)
+        self._detach_ring()
+        self._close_socket()
 
-        if self._sock:
+    def _close_socket(self):
+        """
+        Internal method: shuts down and closes the socket, if any.
+        """
+        sock, self._sock = self._sock, None  # the receive and send loops may both get here
+        if sock:
             try:
-                self._sock.shutdown(socket.SHUT_RDWR)
+                sock.shutdown(socket.SHUT_RDWR)
             except OSError:
                 pass  # already closed or not a socket
 
             try:
-                self._sock.close()
+                sock.close()
             except OSError:
                 pass  # already closed
 
-            self._sock = None
-
         
     def send(self, data: dict):
         """
         Queues a dictionary for sending to the server as a JSON-formatted message.
+        Waits while the send queue is full if its policy is "block".
 
         Parameters:
             data (dict): The data to send.
         """
-        self.send_queue.put_nowait(data)
+        self._enqueue(self.send_queue, data)
+
+    def send_samples(self, times, values, value_dtype = np.float32, acquired: float | None = None):
+        """
+        Queues a block of samples for sending: written to the shared memory
+        ring if attached (waiting up to 1 s for space if the send policy is
+        "block"), else as one binary data frame if the server agreed to binary
+        frames, otherwise as one JSON data message per sample of the first channel.
+
+        Parameters:
+            times (array-like): Sample times.
+            values (array-like): Sample values, shape (samples,) or (channels, samples).
+            value_dtype: np.float32 or np.float64, the value type of binary frames.
+            acquired (float): Wall clock time the samples were acquired, defaults to now.
+        """
+        channels = 1 if np.ndim(values) == 1 else len(values)
+        with self._ring_lock:
+            if self.ring is not None and channels == self.ring.channels:
+                timeout = 1.0 if self.send_queue.policy == "block" else 0.0
+                self.ring.write(np.asarray(times, dtype=np.float64), values, acquired, timeout=timeout)
+                return
+
+        if self.binary_frames:
+            # numbered before queueing, so frames dropped on the way leave a gap
+            frame = encode_frame(times, values, self.client_id, value_dtype, acquired, self.stream_id, self._next_sequence)
+            self._next_sequence += 1
+            self._enqueue(self.send_queue, frame)
+            return
+
+        values = np.asarray(values)
+        first_channel = values if values.ndim == 1 else values[0]
+        for t, v in zip(np.asarray(times).tolist(), first_channel.tolist()):
+            self.send({"type": "data", "value": f"{t:.4f},DATA,{v:.4f},0\n", "source": self.client_id})
+
+    def _attach_ring(self):
+        """
+        Attaches to the shared memory ring of CS, replacing a previous one
+        (CS creates a new ring each time it starts). Stays on the socket if there is none.
+        """
+        self._detach_ring()
+        try:
+            ring = SharedRingBuffer.attach(DEFAULT_RING_NAME)
+        except (FileNotFoundError, ValueError, OSError):
+            return
+        with self._ring_lock:
+            self.ring = ring
+        logging.info(f"[SocketClient] Sending samples through shared memory \"{ring.name}\"")
+
+    def _detach_ring(self):
+        """
+        Stops using the shared memory ring, samples go through the socket again.
+        """
+        with self._ring_lock:
+            ring, self.ring = self.ring, None
+        if ring is not None:
+            ring.close_producer()
+            ring.close()
+
+    def _enqueue(self, target: BoundedQueue, item):
+        """
+        Puts an item in one of the queues, waiting for space if its policy is
+        "block". Gives up (and counts the item as dropped) once disconnected.
+        """
+        while True:
+            try:
+                target.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                if not self.connected:
+                    with target.mutex:
+                        target.dropped += 1
+                    return
+
+    def _check_sequence(self, stream: int, sequence: int, same_frame: bool = False) -> bool:
+        """
+        Internal method: follows the sequence numbers of received frames,
+        per stream, recording and logging gaps.
+
+        Parameters:
+            stream (int): Stream id of the frame.
+            sequence (int): Sequence number of the frame.
+            same_frame (bool): Whether the previous frame may come again, for
+                JSON data messages, one per sample of a frame.
+
+        Returns:
+            bool: False if the frame was already received and should be skipped.
+        """
+        expected = self.expected_sequences.get(stream)
+        if expected is None:
+            logging.info(f"[SocketClient] New data stream {stream} from #{sequence}")
+            if len(self.expected_sequences) >= 8: # forget the oldest stream, e.g. of an earlier ENGR run
+                del self.expected_sequences[next(iter(self.expected_sequences))]
+        elif sequence < expected:
+            if same_frame and sequence == expected - 1:
+                return True
+            self.duplicate_frames += 1
+            return False
+        elif sequence > expected:
+            missing = sequence - expected
+            self.gaps.append((expected, sequence - 1))
+            self.gap_count += 1
+            self.missing_frames += missing
+            logging.warning(
+                f"[SocketClient] Gap in data stream {stream}: frames #{expected} to #{sequence - 1} are missing"
+            )
+        self.expected_sequences[stream] = sequence + 1
+        return True
+
+    def sequence_stats(self) -> dict[str, int]:
+        """
+        Returns the received streams' counters: number of "gaps", "missing_frames",
+        "duplicate_frames" and of "streams" followed.
+        """
+        return {
+            "gaps": self.gap_count,
+            "missing_frames": self.missing_frames,
+            "duplicate_frames": self.duplicate_frames,
+            "streams": len(self.expected_sequences),
+        }
 
     def receive(self):
         """
@@ -354,44 +1311,65 @@ class SocketClient(QObject):
         """
         Internal method: runs in a background thread.
         Continuously reads from the send queue and transmits messages to the server.
-        Terminates if the socket is closed or an error occurs.
+        Dicts are sent as JSON lines, bytes (binary data frames) as is.
+        Terminates if the socket is closed or an error occurs, then starts
+        reconnecting if auto_reconnect is set.
         """
         while self.connected:
             try:
                 msg = self.send_queue.get(timeout=0.1)
+                if isinstance(msg, bytes):
+                    self._sock.sendall(msg)
+                    continue
                 json_str = json.dumps(msg) + "\n"
                 self._sock.sendall(json_str.encode("utf-8"))
             except queue.Empty:
                 continue
             except Exception as e:
-                logging.info("[SocketClient SEND ERROR]", e)
-                self.connected = False
+                if self.connected:
+                    logging.info(f"[SocketClient SEND ERROR] {e}")
+                    self.connected = False
+                    self._close_socket() # wakes the receive loop
+                    self.connectionChanged.emit(False)
+                    self._start_reconnect()
                 break
 
     def _recv_loop(self):
         """
         Internal method: runs in a background thread.
         Continuously reads from the socket and places incoming messages into the receive queue.
-        Also handles peer connection status updates and filters self-originating messages.
-        Terminates if the socket is closed or an error occurs.
+        Binary data frames are queued as "data_block" dicts, see decode_frame,
+        with the wall clock time they were received as "received_time".
+        Also handles peer connection status updates, filters self-originating
+        messages and skips data received twice, see _check_sequence.
+        Terminates if the socket is closed or an error occurs, then starts
+        reconnecting if auto_reconnect is set.
         """
-        buffer = ""
+        decoder = FrameDecoder()
         while self.connected:
             try:
-                message = self._sock.recv(1024).decode('utf-8')
-                
-                buffer += message
-                while '\n' in buffer:
-                    line, buffer = buffer.split("\n", 1)
-                    line = line.strip()
+                chunk = self._sock.recv(65536)
+                if not chunk:
+                    break
+
+                for kind, message in decoder.feed(chunk):
+                    if kind == "frame":
+                        block = decode_frame(message)
+                        block["received_time"] = time.time()
+                        if block["source"] != self.client_id and self._check_sequence(block["stream"], block["sequence"]):
+                            self._enqueue(self.recv_queue, block)
+                        continue
+
+                    line = message.strip()
                     if not line:
                         continue
 
                     if "SERVER SHUTDOWN" in line:
-                        self.disconnect()
+                        self._detach_ring()
                         break
-                    elif line.strip() == "ack": # server acknowledgement
-                        self.recv_queue.put_nowait(line)
+                    elif line.split(";")[0] == "ack": # server acknowledgement
+                        self.binary_frames = parse_handshake(line).get("frames") == "binary"
+                        self._enqueue(self.recv_queue, "ack")
                         continue
 
                     try:
@@ -400,18 +1378,26 @@ class SocketClient(QObject):
                        
                         # Fallback: non-JSON line, treat as plain message
                         print(f"JSON Decode Error: placing raw message in to queue: {line}")
-                        self.recv_queue.put_nowait(line)
+                        self._enqueue(self.recv_queue, line)
                         continue
                     if msg.get("source") == self.client_id:
                         continue  # don't process message from this client
+                    if "seq" in msg and not self._check_sequence(msg.get("stream"), msg["seq"], same_frame=True):
+                        continue  # replayed sample
                     if msg.get("type") == "status":
                         peer_id = msg.get("peer_id")
                         status = msg.get("status")
                         is_connected = (status == "connected")
                         if peer_id != self.client_id:  # only care about the *other* client
+                            if self.use_shared_memory and peer_id == "CS":
+                                # CS (re)started or went away, so did its ring
+                                if is_connected:
+                                    self._attach_ring()
+                                else:
+                                    self._detach_ring()
                             self.peerConnectionChanged.emit(is_connected)
                     else:
-                        self.recv_queue.put_nowait(msg)
+                        self._enqueue(self.recv_queue, msg)
 
             except ConnectionResetError:
                 if self.connected:
@@ -422,5 +1408,8 @@ class SocketClient(QObject):
                     logging.info(f"[SocketClient RECV ERROR] {e}")
                 break
 
-        self.connected = False
-        self.connectionChanged.emit(False)
\ No newline at end of file
+        was_connected, self.connected = self.connected, False
+        self._close_socket()
+        if was_connected:
+            self.connectionChanged.emit(False)
+            self._start_reconnect()
\ No newline at end of file
@@ -0,0 +1,173 @@
+import threading
+
+import numpy as np
+from numpy.typing import NDArray
+
+
+class LODPyramid:
+    """
+    A min/max level-of-detail pyramid over one channel of a recording.
+
+    Level k holds the minimum and maximum of every bin of factor**k
+    samples, so a zoomed out redraw reads about as many bins as there are
+    pixels instead of reducing every visible sample. Levels are built
+    bottom up, optionally in a background thread; until a level is ready,
+    queries reduce the best finished level on the fly. For streaming data,
+    extend updates only the bins touched by newly appended samples.
+    """
+
+    def __init__(self, x: NDArray, y: NDArray, factor: int = 2, min_bins: int = 256, background: bool = False):
+        """
+        Parameters:
+            x (NDArray): Sample times.
+            y (NDArray): Sample values.
+            factor (int): Number of bins of a level merged into one bin of the next.
+            min_bins (int): Stop adding levels once a level has fewer bins.
+            background (bool): Build the levels in a daemon thread.
+        """
+        self.x = x
+        self.y = y
+        self.factor = factor
+        self.min_bins = min_bins
+        # levels[k] is a (mins, maxs) tuple for bins of factor**k samples, level 0 is the raw data
+        self.levels: list[tuple[NDArray, NDArray]] = [(y, y)]
+        # growable (mins, maxs) buffers behind levels[k] once extend was used, levels[k] are views into them
+        self._buffers: dict[int, tuple[NDArray, NDArray]] = {}
+        self.ready = threading.Event()
+
+        if background:
+            threading.Thread(target=self.build, daemon=True).start()
+        else:
+            self.build()
+
+    def build(self) -> None:
+        """
+        Computes every level from the one below it, O(N) in total.
+        """
+        mins, maxs = self.levels[-1]
+        while len(mins) > self.min_bins:
+            starts = np.arange(0, len(mins), self.factor)  # reduceat keeps the partial last bin
+            mins = np.minimum.reduceat(mins, starts)
+            maxs = np.maximum.reduceat(maxs, starts)
+            self.levels.append((mins, maxs))  # appending is atomic, readers see whole levels only
+        self.ready.set()
+
+    def extend(self, x: NDArray, y: NDArray) -> None:
+        """
+        Updates the pyramid after samples were appended. Only the last bin
+        of each level and the bins of the new samples are recomputed, so the
+        cost depends on the number of new samples, not on the total.
+
+        Parameters:
+            x (NDArray): All sample times, starting with the ones already in the pyramid.
+            y (NDArray): All sample values, starting with the ones already in the pyramid.
+        """
+        self.ready.wait()  # never race a background build
+        first = len(self.x)  # first changed entry of the level below
+        self.x = x
+        self.y = y
+        self.levels[0] = (y, y)
+        if len(y) == first:
+            return
+
+        level = 1
+        while level < len(self.levels) or len(self.levels[level - 1][0]) > self.min_bins:
+            below_mins, below_maxs = self.levels[level - 1]
+            if level == len(self.levels):
+                first = 0  # new level, compute all of it
+            first_bin = first // self.factor
+            offset = first_bin * self.factor
+            starts = np.arange(0, len(below_mins) - offset, self.factor)
+            self._store(
+                level,
+                first_bin,
+                np.minimum.reduceat(below_mins[offset:], starts),
+                np.maximum.reduceat(below_maxs[offset:], starts),
+            )
+            first = first_bin
+            level += 1
+
+    def _store(self, level: int, first: int, mins: NDArray, maxs: NDArray) -> None:
+        """
+        Writes bins from first on into the buffers of a level, doubling
+        their capacity when full.
+        """
+        length = first + len(mins)
+        if level in self._buffers:
+            min_buffer, max_buffer = self._buffers[level]
+        else:
+            # adopt the level computed by build, if any
+            min_buffer, max_buffer = self.levels[level] if level < len(self.levels) else (mins[:0], maxs[:0])
+        if length > len(min_buffer) or level not in self._buffers:
+            capacity = max(2 * length, 1024)
+            grown_min = np.empty(capacity, dtype=mins.dtype)
+            grown_max = np.empty(capacity, dtype=maxs.dtype)
+            grown_min[:first] = min_buffer[:first]
+            grown_max[:first] = max_buffer[:first]
+            min_buffer, max_buffer = grown_min, grown_max
+            self._buffers[level] = (min_buffer, max_buffer)
+        min_buffer[first:length] = mins
+        max_buffer[first:length] = maxs
+
+        level_view = (min_buffer[:length], max_buffer[:length])
+        if level < len(self.levels):
+            self.levels[level] = level_view
+        else:
+            self.levels.append(level_view)
+
+    def bins(self, level: int, first: int, last: int) -> tuple[NDArray, NDArray]:
+        """
+        Returns the min and max of bins first to last (exclusive) of a level,
+        reduced from the highest finished level below it if necessary.
+
+        Parameters:
+            level (int): The pyramid level.
+            first (int): First bin.
+            last (int): Bin after the last one.
+
+        Returns:
+            tuple[NDArray, NDArray]: Bin minimums and maximums.
+        """
+        built = min(level, len(self.levels) - 1)
+        mins, maxs = self.levels[built]
+        if built == level:
+            return mins[first:last], maxs[first:last]
+
+        scale = self.factor ** (level - built)
+        mins = mins[first * scale : last * scale]
+        maxs = maxs[first * scale : last * scale]
+        starts = np.arange(0, len(mins), scale)
+        return np.minimum.reduceat(mins, starts), np.maximum.reduceat(maxs, starts)
+
+    def peaks(self, start: int, stop: int, max_points: int) -> tuple[NDArray, NDArray]:
+        """
+        Returns the peak downsampling of samples start to stop: the max and
+        min of each bin at its center time, at most max_points points.
+
+        Parameters:
+            start (int): First sample.
+            stop (int): Sample after the last one.
+            max_points (int): Max number of points to return.
+
+        Returns:
+            tuple[NDArray, NDArray]: x and y of the points, (x, max), (x, min) per bin.
+        """
+        count = stop - start
+        max_bins = max(1, max_points // 2)  # each bin gives 2 points
+
+        # smallest level with no more than max_bins bins in the range
+        level, size = 0, 1
+        while count / size > max_bins:
+            level += 1
+            size *= self.factor
+
+        first = start // size
+        last = (stop - 1) // size + 1
+        mins, maxs = self.bins(level, first, last)
+
+        centers = np.minimum(np.arange(first, last) * size + size // 2, len(self.x) - 1)
+        x_out = np.repeat(self.x[centers], 2)  # repeated for (x, y_max), (x, y_min)
+        y_out = np.empty(len(mins) * 2, dtype=mins.dtype)
+        y_out[::2] = maxs
+        y_out[1::2] = mins
+        return x_out, y_out
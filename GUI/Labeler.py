@@ -106,9 +106,12 @@ class Labeler(QObject):
         self.start_labeling_progress.emit(25, 100)
         probes = ProbeSplitter.simple_probe_finder(pre_rect)
         self.start_labeling_progress.emit(50, 100)
-        data['probes'] = 'NP'
-        for i, (start, end) in enumerate(probes, start=1):
-            data.loc[start:end, 'probes'] = 'P'
+        # probe segments, NP everywhere else
+        starts, values = [0], ['NP']
+        for start, end in probes:
+            starts += [start, end + 1]
+            values += ['P', 'NP']
+        epgdata.set_segments(epgdata.current_file, 'probes', starts, values)
         datawindow.transition_mode = 'probes'
         datawindow.plot_recording(epgdata.current_file)
         datawindow.plot_transitions(epgdata.current_file)
@@ -122,7 +125,8 @@ class Labeler(QObject):
         if not self.model:
             print("No model loaded!")
             return
-        current_file = epgdata.dfs[epgdata.current_file]
+        # models expect per sample label and probe columns
+        current_file = epgdata.labeled_df(epgdata.current_file)
         current_file["file"] = "placeholder file"
         # We need to split based on the probe labels
         probe_indices = self.leak_probe_finder(current_file["probes"].values)
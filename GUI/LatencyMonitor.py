@@ -0,0 +1,168 @@
+import csv
+import datetime
+import os
+import threading
+import time
+
+import numpy as np
+
+
+class LatencyMonitor:
+    """
+    Rolling latency histograms and throughput counters for the live data path.
+
+    Each hop records how long after acquisition (the wall clock stamp ENGR
+    puts in every data frame) a block of samples reached it:
+
+    - "server": received by the socket server
+    - "client": received by the CS socket client
+    - "view": handed to the LiveDataWindow buffer by LiveViewTab
+    - "render": drawn by LiveDataWindow
+
+    Latencies are counted in log spaced bins from 0.1 ms to 10 s, one
+    histogram per second, and only the last `window` seconds are kept, so
+    the statistics follow the current behavior of the link. Thread-safe.
+    """
+
+    HOPS = ("server", "client", "view", "render")
+
+    def __init__(self, window: int = 10):
+        """
+        Parameters:
+            window (int): Number of seconds the statistics cover.
+        """
+        self.window = window
+        self.edges = np.logspace(-4, 1, 51) # bin edges in seconds, plus an underflow and an overflow bin
+        # second -> {"counts": {hop: bin counts}, "max": {hop: max latency}, "samples": int, "blocks": int}
+        self._seconds: dict[int, dict] = {}
+        self._lock = threading.Lock()
+
+    def record(self, hop: str, acquired: float, samples: int = 0, now: float | None = None) -> None:
+        """
+        Records that a block of samples reached a hop.
+
+        Parameters:
+            hop (str): One of HOPS.
+            acquired (float): Wall clock time (time.time()) the block was acquired.
+            samples (int): Number of samples in the block, counted towards
+                throughput. Pass it for one hop only.
+            now (float): Wall clock time the block reached the hop, defaults to now.
+        """
+        if now is None:
+            now = time.time()
+        latency = now - acquired
+        bin_index = int(np.searchsorted(self.edges, latency))
+        with self._lock:
+            second = self._second(now)
+            counts = second["counts"].setdefault(hop, np.zeros(len(self.edges) + 1, dtype=np.int64))
+            counts[bin_index] += 1
+            second["max"][hop] = max(second["max"].get(hop, latency), latency)
+            if samples:
+                second["samples"] += samples
+                second["blocks"] += 1
+
+    def _second(self, now: float) -> dict:
+        """
+        Returns the counters of the current second, dropping expired ones. Call with the lock held.
+        """
+        current = int(now)
+        if current not in self._seconds:
+            self._seconds[current] = {"counts": {}, "max": {}, "samples": 0, "blocks": 0}
+            for expired in [second for second in self._seconds if second <= current - self.window]:
+                del self._seconds[expired]
+        return self._seconds[current]
+
+    def histogram(self, hop: str) -> np.ndarray:
+        """
+        Returns the latency bin counts of a hop over the window, see edges.
+        """
+        with self._lock:
+            self._second(time.time())
+            counts = [second["counts"][hop] for second in self._seconds.values() if hop in second["counts"]]
+        return np.sum(counts, axis=0) if counts else np.zeros(len(self.edges) + 1, dtype=np.int64)
+
+    def percentile(self, counts: np.ndarray, q: float) -> float:
+        """
+        Returns an upper bound of the q-th percentile (0-100) latency from bin counts, in seconds.
+        """
+        total = counts.sum()
+        if total == 0:
+            return float("nan")
+        index = int(np.searchsorted(np.cumsum(counts), q / 100 * total))
+        return float(self.edges[min(index, len(self.edges) - 1)])
+
+    def summary(self) -> dict:
+        """
+        Returns the statistics over the window.
+
+        Returns:
+            dict: {hop: {"count", "p50", "p95", "p99", "max"}} for every hop seen,
+                latencies in seconds, plus "samples_per_s" and "blocks_per_s".
+        """
+        stats = {}
+        for hop in self.HOPS:
+            counts = self.histogram(hop)
+            if counts.sum() == 0:
+                continue
+            with self._lock:
+                worst = max(second["max"].get(hop, float("-inf")) for second in self._seconds.values())
+            # a bin edge can lie past the largest latency seen
+            stats[hop] = {
+                "count": int(counts.sum()),
+                "p50": min(self.percentile(counts, 50), worst),
+                "p95": min(self.percentile(counts, 95), worst),
+                "p99": min(self.percentile(counts, 99), worst),
+                "max": worst,
+            }
+        with self._lock:
+            stats["samples_per_s"] = sum(second["samples"] for second in self._seconds.values()) / self.window
+            stats["blocks_per_s"] = sum(second["blocks"] for second in self._seconds.values()) / self.window
+        return stats
+
+    def format_summary(self) -> str:
+        """
+        Returns the statistics as text, e.g. for a tooltip.
+        """
+        stats = self.summary()
+        lines = [f"Last {self.window} s: {stats['samples_per_s']:.0f} samples/s in {stats['blocks_per_s']:.1f} blocks/s"]
+        for hop in self.HOPS:
+            if hop in stats:
+                hop_stats = stats[hop]
+                lines.append(
+                    f"{hop}: p50 < {hop_stats['p50'] * 1000:.1f} ms, p95 < {hop_stats['p95'] * 1000:.1f} ms, "
+                    f"max {hop_stats['max'] * 1000:.1f} ms"
+                )
+        if len(lines) == 1:
+            lines.append("No latency data")
+        return "\n".join(lines)
+
+    def export(self, path: str) -> None:
+        """
+        Appends the current statistics and histograms to a CSV log, one row per hop.
+        Histogram counts are space separated, for the bins between edges_ms
+        plus an underflow and an overflow bin.
+
+        Parameters:
+            path (str): The log file, created with a header if it doesn't exist.
+        """
+        stats = self.summary()
+        utc = datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds")
+        new_file = not os.path.exists(path)
+        with open(path, "a", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            if new_file:
+                writer.writerow(["utc_time", "window_s", "hop", "count", "p50_ms", "p95_ms", "p99_ms", "max_ms",
+                                 "samples_per_s", "histogram"])
+                writer.writerow(["", "", "edges_ms", "", "", "", "", "", "",
+                                 " ".join(f"{edge * 1000:.4g}" for edge in self.edges)])
+            for hop in self.HOPS:
+                if hop not in stats:
+                    continue
+                hop_stats = stats[hop]
+                writer.writerow([
+                    utc, self.window, hop, hop_stats["count"],
+                    f"{hop_stats['p50'] * 1000:.3f}", f"{hop_stats['p95'] * 1000:.3f}",
+                    f"{hop_stats['p99'] * 1000:.3f}", f"{hop_stats['max'] * 1000:.3f}",
+                    f"{stats['samples_per_s']:.1f}",
+                    " ".join(str(count) for count in self.histogram(hop)),
+                ])
@@ -12,13 +12,18 @@ import re
 
 from pyqtgraph import PlotWidget, PlotItem, ScatterPlotItem, PlotDataItem, mkPen, InfiniteLine
 
-from PyQt6.QtCore import QTimer, Qt, QPointF
+from PyQt6.QtCore import QTimer, Qt, QPointF, pyqtSlot
 from PyQt6.QtGui import QWheelEvent, QMouseEvent, QCursor, QKeyEvent, QGuiApplication
 from PyQt6.QtWidgets import QApplication, QDialog, QVBoxLayout, QLabel, QDialogButtonBox, QMessageBox, QFileDialog
 
 from PanZoomViewBox import PanZoomViewBox
 from CommentMarker import CommentMarker
 from TextEdit import TextEdit
+from LODPyramid import LODPyramid
+from SampleStore import SampleStore
+from BoundedQueue import minmax_decimate
+from LatencyMonitor import LatencyMonitor
+import windaq
 
 class LiveDataWindow(PlotWidget):
     """
@@ -38,8 +43,8 @@ class LiveDataWindow(PlotWidget):
         Initializes the LiveDataWindow widget.
 
         Sets up plotting area/custom viwebox and UI elements,
-        thread-safe data buffers, live rendering timer at ~60 Hz, 
-        periodiic auto-backup.
+        thread-safe data buffers, a redraw timer capped at the display
+        refresh rate, periodiic auto-backup.
         """
         # --- GENERAL INIT ITEMS ---
         super().__init__(parent = parent, viewBox=PanZoomViewBox(datawindow=self))
@@ -50,23 +55,47 @@ class LiveDataWindow(PlotWidget):
         self.viewbox.menu = None  # disable default menu
 
         # --- DATA STORAGE ---
-        # holds all historical data
+        # holds all historical data, xy_data are views of the store
         self.epgdata = self.parent().parent().epgdata
-        self.xy_data: list[NDArray] = [np.array([]), np.array([])]
-
-        # temporary buffer for incoming data, to be added to full xy_data every plot update
-        self.buffer_data: list[tuple[float, float]] = []
+        self.samples = SampleStore()
+        self.xy_data: list[NDArray] = [self.samples.times, self.samples.values]
+        # min/max pyramid over xy_data, extended as data arrives, for downsampling
+        self.pyramid = LODPyramid(self.xy_data[0], self.xy_data[1])
+
+        # temporary buffer for incoming (times, volts) blocks, to be added to full xy_data every plot update.
+        # fill it with push_samples, which keeps it under max_buffer_samples if the GUI stalls:
+        # "decimate" keeps the min/max of the buffered data, "drop" keeps the newest samples
+        self.buffer_data: list[tuple[NDArray, NDArray]] = []
+        self.buffer_samples = 0 # number of samples in buffer_data
+        self.max_buffer_samples = 1 << 18
+        self.buffer_policy = "decimate"
+        self.buffer_dropped = 0 # samples discarded by the "drop" policy
+        self.buffer_decimated = 0 # samples removed by the "decimate" policy
+        self.buffer_acquired: list[tuple[float, float]] = [] # (acquisition time, last sample time) of the buffered blocks, for latency
         self.buffer_lock = threading.Lock() # lock to prevent data loss
 
+        # latency of incoming data at each hop of the live path, see LatencyMonitor
+        self.latency = LatencyMonitor()
+        self.drawn_acquired: list[float] = [] # acquisition times of blocks integrated but not yet drawn
+
         # store currently rendered data (downsampled for display)
         self.xy_rendered: list[NDArray] = [np.array([]), np.array([])]
 
         # track last rendered state to optimize plot updates
         self.last_rendered_x_range: tuple[float, float] = (0, 0)
         
-        # timer for plot updates (~60 fps)
+        # redraws only happen when something changed (new samples, view range,
+        # comments), see request_redraw. the timer runs at the display refresh
+        # rate while there is something to draw and slows to idle polling of
+        # the buffer otherwise
+        self.redraw_pending = True
+        self.drawing = False # set while update_plot scrolls the view, its own range changes need no redraw
+        self.idle_ticks = 0 # frames in a row without anything to draw
+        self.idle_after_ticks = 30 # ~0.5 s at 60 Hz
+        self.idle_interval = 100 # ms between buffer polls while idle
+
         self.plot_update_timer = QTimer(self)
-        self.plot_update_timer.setInterval(int(1000/60))
+        self.plot_update_timer.setInterval(self.frame_interval())
         self.plot_update_timer.timeout.connect(self.timed_plot_update)
         self.plot_update_timer.start()
 
@@ -79,23 +108,25 @@ class LiveDataWindow(PlotWidget):
         # assign from new rec window
         self.save_path = None
 
-        # base names for the backup files
-        self.waveform_backup_base = "waveform_backup.csv"
-        self.comments_backup_base = "comments_backup.csv"
+        # base names for the backup files, the utc time of the first save is appended
+        self.waveform_backup_base = "waveform_backup"
+        self.comments_backup_base = "comments_journal"
 
-        # store the active filenames, updated after each save with utc time stamp
-        self.waveform_backup_path = os.path.join(self.periodic_backup_dir, self.waveform_backup_base)
-        self.comments_backup_path = os.path.join(self.periodic_backup_dir, self.comments_backup_base)
+        # active filenames, set on the first save so no files are left behind without data
+        self.waveform_backup_path: str | None = None
+        self.comments_backup_path: str | None = None
 
-        self.backup_renamed = False
+        # the waveform backup is streamed to a windaq file, new samples are appended
+        # and the header is patched in place, see windaq.windaqWriter
+        self.waveform_writer: windaq.windaqWriter | None = None
 
         self.last_saved_data_index = 0 # track how much waveform data has been saved
 
-        # initialize CSV headers if files don't exist
-        if not os.path.exists(self.waveform_backup_path):
-            pd.DataFrame(columns=['time', 'voltage']).to_csv(self.waveform_backup_path, index=False)
-        if not os.path.exists(self.comments_backup_path):
-            pd.DataFrame(columns=['time', 'comment']).to_csv(self.comments_backup_path, index=False)
+        # comment changes not yet written to the comments journal, as
+        # (action, time, text) with action "add", "edit" or "delete".
+        # replaying the journal in order gives the current comments
+        self.comment_journal: list[tuple[str, float, str]] = []
+        self.journal_lock = threading.Lock()
 
         self.save_lock = threading.Lock() # to prevent concurrent writes
         self.is_saving = False # flag for ongoing background save
@@ -174,6 +205,7 @@ class LiveDataWindow(PlotWidget):
         self.moving_comment: CommentMarker = None
         
         self.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
+        self.viewbox.sigRangeChanged.connect(self.view_range_changed)
         self.update_plot()
 
     def closeEvent(self, event):
@@ -194,13 +226,6 @@ class LiveDataWindow(PlotWidget):
         if self.save_timer.isActive():
             self.save_timer.stop()
 
-        if not self.backup_renamed:
-            # store the active filenames, updated after each save with utc time stamp
-            
-            # delete waveform and comments csv because no data uploaded
-            os.remove(self.waveform_backup_path)
-            os.remove(self.comments_backup_path)
-
         three_days_ago_utc = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=3)
         
         # --- DELETE OLD BACKUPS --- 
@@ -242,8 +267,61 @@ class LiveDataWindow(PlotWidget):
                 event.ignore()
                 return
 
+        self.close_waveform_backup()
         super().closeEvent(event)
 
+    def journal_comment(self, action: str, time: float, text: str = "") -> None:
+        """
+        Records a comment change for the next backup.
+
+        Parameters:
+            action (str): "add", "edit" or "delete".
+            time (float): Time of the comment.
+            text (str): Comment text, for "add" and "edit".
+        """
+        with self.journal_lock:
+            self.comment_journal.append((action, time, text))
+
+    def write_comment_journal(self) -> None:
+        """
+        Appends the recorded comment changes to the comments journal.
+        Call with save_lock held. Changes are kept until the first
+        waveform save creates the backup files.
+        """
+        if self.comments_backup_path is None:
+            return
+        with self.journal_lock:
+            pending = self.comment_journal
+            self.comment_journal = []
+        if not pending:
+            return
+
+        new_file = not os.path.exists(self.comments_backup_path)
+        with open(self.comments_backup_path, 'a', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            if new_file:
+                writer.writerow(['action', 'time', 'comment'])
+            writer.writerows(pending)
+
+    def close_waveform_backup(self):
+        """
+        Finishes the waveform backup file.
+
+        Appends samples received since the last periodic save, stores the
+        comments as event markers and patches the windaq header.
+        """
+        self.integrate_buffer_to_np()
+        with self.save_lock:
+            if self.waveform_writer is None:
+                return
+            times, volts = self.samples.view(self.last_saved_data_index)
+            self.waveform_writer.write(times, volts)
+            self.last_saved_data_index = len(self.samples)
+            for comment_time, comment in self.comments.items():
+                self.waveform_writer.add_comment(comment_time, comment.text)
+            self.waveform_writer.close()
+            self.write_comment_journal()
+
     def window_to_viewbox(self, point: QPointF) -> QPointF:
         """
         Converts between window (screen) coordinates and data (viewbox) coordinates.
@@ -270,27 +348,128 @@ class LiveDataWindow(PlotWidget):
             if not self.buffer_data:
                 return
             
-            # create local copy of buffer and clear orig, to release lock
-            data_to_process = self.buffer_data.copy()
-            self.buffer_data.clear()
+            # take the buffer and leave an empty one, to release lock
+            data_to_process = self.buffer_data
+            self.buffer_data = []
+            self.buffer_samples = 0
+            self.drawn_acquired += [acquired for acquired, _ in self.buffer_acquired]
+            self.buffer_acquired = []
 
-        # convert data to np array
-        new_xy_data = np.array(data_to_process, dtype=float)
         self.data_modified = True
 
-        self.xy_data[0] = np.concatenate((self.xy_data[0], new_xy_data[:, 0]))
-        self.xy_data[1] = np.concatenate((self.xy_data[1], new_xy_data[:, 1]))
+        self.samples.append(
+            np.concatenate([times for times, _ in data_to_process]),
+            np.concatenate([volts for _, volts in data_to_process]),
+        )
+        self.xy_data = [self.samples.times, self.samples.values]
+        self.pyramid.extend(self.xy_data[0], self.xy_data[1])
+        self.redraw_pending = True
+
+    def push_samples(self, times: NDArray, volts: NDArray, acquired: float | None = None) -> None:
+        """
+        Adds incoming samples to the buffer, thread-safe. If the buffer
+        grows past max_buffer_samples (the GUI is not draining it), it is
+        cut to half that size according to buffer_policy.
+
+        Parameters:
+            times (NDArray): Sample times.
+            volts (NDArray): Sample voltages, as many as times.
+            acquired (float): Wall clock time the samples were acquired, if
+                known, to record their render latency.
+        """
+        with self.buffer_lock:
+            self.buffer_data.append((times, volts))
+            if acquired is not None and len(times):
+                self.buffer_acquired.append((acquired, float(times[-1])))
+            self.buffer_samples += len(times)
+            if self.buffer_samples <= self.max_buffer_samples:
+                return
+
+            times = np.concatenate([times for times, _ in self.buffer_data])
+            volts = np.concatenate([volts for _, volts in self.buffer_data])
+            keep = self.max_buffer_samples // 2
+            if self.buffer_policy == "decimate":
+                times, volts = minmax_decimate(times, volts, keep)
+                self.buffer_decimated += self.buffer_samples - len(times)
+            else:
+                times, volts = times[-keep:], volts[-keep:]
+                self.buffer_dropped += self.buffer_samples - len(times)
+                # blocks dropped as a whole are not drawn, their latency is not either
+                self.buffer_acquired = [stamp for stamp in self.buffer_acquired if stamp[1] >= times[0]]
+            self.buffer_data = [(times, volts)]
+            self.buffer_samples = len(times)
+
+    def buffer_stats(self) -> dict[str, int]:
+        """
+        Returns the buffer counters, for display.
+        """
+        with self.buffer_lock:
+            return {
+                "size": self.buffer_samples,
+                "maxsize": self.max_buffer_samples,
+                "dropped": self.buffer_dropped,
+                "decimated": self.buffer_decimated,
+            }
+
+    def frame_interval(self) -> int:
+        """
+        Returns the redraw timer interval in ms, one frame of the display
+        the window is on (60 Hz if unknown).
+        """
+        screen = self.screen() or QGuiApplication.primaryScreen()
+        refresh_rate = screen.refreshRate() if screen is not None else 0
+        if not refresh_rate > 0:
+            refresh_rate = 60
+        return max(1, int(1000 / refresh_rate))
+
+    def request_redraw(self) -> None:
+        """
+        Marks the plot as out of date so it is redrawn on the next frame.
+        Several requests within one frame cause a single redraw.
+        """
+        self.redraw_pending = True
+        self.idle_ticks = 0
+        frame_interval = self.frame_interval()
+        if self.plot_update_timer.interval() != frame_interval:
+            self.plot_update_timer.setInterval(frame_interval)
+
+    def view_range_changed(self, *args) -> None:
+        """
+        Requests a redraw when the user (or anything but update_plot) changes
+        the horizontal view range to something not drawn yet.
+        """
+        if self.drawing:
+            return
+        current_x_range, _ = self.viewbox.viewRange()
+        if tuple(current_x_range) != tuple(self.last_rendered_x_range):
+            self.request_redraw()
 
     def timed_plot_update(self):
         """
-        Periodically triggers a refresh the plot.
+        Redraws the plot if anything changed since the last frame.
 
         - Moves data from the buffer to full storage.
-        - Calls update_plot()
+        - Calls update_plot() if there were new samples or a redraw was requested.
+        - Slows the timer to idle polling after a while without changes.
         """
         self.integrate_buffer_to_np()
+
+        if not self.redraw_pending:
+            self.idle_ticks += 1
+            if self.idle_ticks == self.idle_after_ticks:
+                self.plot_update_timer.setInterval(self.idle_interval)
+            return
+
+        self.redraw_pending = False
+        if self.idle_ticks >= self.idle_after_ticks:
+            self.plot_update_timer.setInterval(self.frame_interval())
+        self.idle_ticks = 0
         self.update_plot()
 
+        for acquired in self.drawn_acquired:
+            self.latency.record("render", acquired)
+        self.drawn_acquired = []
+
     def trigger_periodic_save(self):
         """
         Periodically triggers a background save of waveform and comment data.
@@ -306,47 +485,42 @@ class LiveDataWindow(PlotWidget):
         Performs a periodic backup save in a background thread.
 
         Saves:
-            - Waveform data to CSV (appends new data)
-            - Comment data to separate CSV (rewrites each time)
+            - Waveform data to a windaq file (appends new data, patches the header)
+            - Comment changes to a CSV journal (appends new changes)
 
-        Ensures filenames are updated with recent UTC timestamp.
+        Only what changed since the last save is written, so the cost per
+        save does not grow with the session length.
+        Filenames carry the UTC timestamp of the first save.
         """
         
         with self.save_lock:
             self.is_saving = True
             
-            # want stable snapshot
-            times = self.xy_data[0].copy()
-            volts = self.xy_data[1].copy()
-            comments = self.comments.copy()
+            # want stable snapshot of the new tail, views of the store never change once taken
+            times, volts = self.samples.view(self.last_saved_data_index)
         
             try:
-                current_utc_time = datetime.datetime.now(datetime.timezone.utc).strftime('%Y%m%d_%H%M%S')
-                df_to_append = pd.DataFrame({'time': times[self.last_saved_data_index:], 'voltage': volts[self.last_saved_data_index:]})
-                comments_list = [{'time': t, 'comment': c.text} for t, c in comments.items()]
-
-                if not df_to_append.empty:
-                    df_to_append.to_csv(self.waveform_backup_path, mode='a', header=False, index=False)
-                    new_waveform_filename = os.path.join(
-                        self.periodic_backup_dir, f"{self.waveform_backup_base}_{current_utc_time}.csv"
+                if self.waveform_writer is None and len(times) > 0:
+                    current_utc_time = datetime.datetime.now(datetime.timezone.utc).strftime('%Y%m%d_%H%M%S')
+                    self.waveform_backup_path = os.path.join(
+                        self.periodic_backup_dir, f"{self.waveform_backup_base}_{current_utc_time}.WDQ"
                     )
-                    os.rename(self.waveform_backup_path, new_waveform_filename)
-                    self.waveform_backup_path = new_waveform_filename
-                    self.last_saved_data_index = len(times)
-                    if not self.backup_renamed:
-                        self.backup_renamed = True
-                
-                if comments_list:
-                    comments_df = pd.DataFrame(comments_list, columns=['time', 'comment'])
-                    comments_df.to_csv(self.comments_backup_path, mode='w', header=True, index=False)
-
-                    # rename file and path
-                    
-                    new_comments_filename = os.path.join(
+                    self.comments_backup_path = os.path.join(
                         self.periodic_backup_dir, f"{self.comments_backup_base}_{current_utc_time}.csv"
                     )
-                    os.rename(self.comments_backup_path, new_comments_filename)
-                    self.comments_backup_path = new_comments_filename
+                    # live samples are not evenly spaced (decimation, link gaps), keep their times
+                    self.waveform_writer = windaq.windaqWriter(self.waveform_backup_path, annotations=["live"], keepTimes=True)
+
+                if self.waveform_writer is not None:
+                    clipped = self.waveform_writer.clipped
+                    self.waveform_writer.write(times, volts)
+                    self.waveform_writer.flush()
+                    if self.waveform_writer.clipped > clipped:
+                        print(f"[PERIODIC SAVE WARNING] {self.waveform_writer.clipped - clipped} samples beyond "
+                              f"+-{self.waveform_writer.fullScale} V were clipped in the backup")
+                    self.last_saved_data_index += len(times)
+
+                self.write_comment_journal()
 
                 self.data_modified = False
                 
@@ -372,7 +546,7 @@ class LiveDataWindow(PlotWidget):
         if self.live_mode:
             rerender = True
         else:
-            if current_x_range != self.last_rendered_x_range or current_x_range[1] > self.current_time:
+            if tuple(current_x_range) != tuple(self.last_rendered_x_range) or current_x_range[1] > self.current_time:
                 rerender = True
 
         if not rerender:
@@ -381,23 +555,39 @@ class LiveDataWindow(PlotWidget):
             self.viewbox.update()
             return
 
-        # rerender needed
+        # rerender needed, range changes from here on are the redraw's own
+        # (setLimits, setXRange, setData autorange) and must not request another one
+        self.drawing = True
+        try:
+            self._redraw(current_x_range)
+        finally:
+            self.drawing = False
+
+    def _redraw(self, current_x_range: list[float]):
+        """
+        Downsamples the visible data and updates the curve, scatter and
+        leading line, see update_plot.
+        """
         self.viewbox.setLimits(xMin=None, xMax=None, yMin=None, yMax=None) # clear stale data (avoids warning)
 
+        # about two points (a min and a max) per pixel of plot width
+        plot_width = self.viewbox.geometry().width() * self.devicePixelRatioF()
+        max_points = max(2 * int(plot_width), 500)
+
         if self.live_mode:
             end = self.current_time
             start = end - self.auto_scroll_window
             offset = 0.1 # when zoomed in, leading line lags with plotting so need offset to keep hidden
             self.viewbox.setXRange(start, end, padding=0)
-            self.downsample_visible(self.xy_data, x_range=(start, end))
+            current_x_range = [start, end]
+            self.downsample_visible(self.xy_data, x_range=(start, end), max_points=max_points)
             self.leading_line.setPos(end+offset)
         else:
-            self.downsample_visible(self.xy_data, x_range=current_x_range)
+            self.downsample_visible(self.xy_data, x_range=current_x_range, max_points=max_points)
             self.leading_line.setPos(self.current_time)
 
         # SCATTER
         time_span = current_x_range[1] - current_x_range[0]
-        plot_width = self.viewbox.geometry().width() * self.devicePixelRatioF()
         pix_per_second = plot_width / time_span if time_span != 0 else float("inf")
         default_pix_per_second = plot_width / self.default_scroll_window
         self.zoom_level = pix_per_second / default_pix_per_second
@@ -413,8 +603,9 @@ class LiveDataWindow(PlotWidget):
         self.viewbox.update()
 
         # update last rendered range
-        self.last_rendered_x_range = current_x_range
+        self.last_rendered_x_range = tuple(current_x_range)
 
+    @pyqtSlot(bool)
     def set_live_mode(self, enabled: bool):
         """
         Enables or disables live auto-scrolling mode.
@@ -423,7 +614,7 @@ class LiveDataWindow(PlotWidget):
             enabled (bool): True to enable live mode; False to pause.
         """
         self.live_mode = enabled
-        self.update_plot()
+        self.request_redraw()
         return
     
     def downsample_visible(
@@ -431,8 +622,8 @@ class LiveDataWindow(PlotWidget):
     ) -> None:
         """
         Downsamples waveform data in the visible x range using the selected method.
-        Modifies self.xy_rendered and sorts it (efficient for comment insertion idx
-        finding).
+        Modifies self.xy_rendered, which stays sorted by time (efficient for comment
+        insertion idx finding) because incoming time is monotonic.
 
         Parameters:
             xy (NDArray): full xy data array.
@@ -443,9 +634,10 @@ class LiveDataWindow(PlotWidget):
         NOTE: 
             `subsample` samples the first point of each bin (fastest)
             `mean` averages each bin
-            `peak` returns the min and max point of each bin (slowest, best looking)
+            `peak` returns the min and max point of each bin (best looking, read from self.pyramid)
         """
         x, y = full_xy_data
+        left_idx, right_idx = 0, len(x)
 
         # Filter to x_range if provided
         if x_range is not None:
@@ -458,22 +650,23 @@ class LiveDataWindow(PlotWidget):
                 # render additional point on each side at very high zooms
                 left_idx = max(0, left_idx - 1)
                 right_idx = min(len(x), right_idx + 1)
-  
-  
-            x_sliced = x[left_idx:right_idx].copy()
-            y_sliced = y[left_idx:right_idx].copy()   
-        else:
-            x_sliced = x.copy()
-            y_sliced = y.copy()   
-    
-        num_points = len(x_sliced)
+
+        num_points = right_idx - left_idx
 
         if num_points <= max_points:  # no downsampling needed
-            # referencing self.xy_data
-            self.xy_rendered[0] = x_sliced
-            self.xy_rendered[1] = y_sliced
+            # views into the sample store, stored samples are never rewritten
+            self.xy_rendered[0] = x[left_idx:right_idx]
+            self.xy_rendered[1] = y[left_idx:right_idx]
+            return
+
+        if method == 'peak':
+            # cost depends on max_points only, not on the visible or total amount of data
+            self.xy_rendered[0], self.xy_rendered[1] = self.pyramid.peaks(left_idx, right_idx, max_points)
             return
 
+        x_sliced = x[left_idx:right_idx]
+        y_sliced = y[left_idx:right_idx]
+
         if method == 'subsampling': 
             stride = num_points // max_points
             x_out = x_sliced[::stride].copy()
@@ -485,41 +678,6 @@ class LiveDataWindow(PlotWidget):
             start_idx = stride // 2
             x_out = x_sliced[start_idx : start_idx + num_windows * stride : stride].copy()
             y_out = y_sliced[:num_windows * stride].reshape(num_windows, stride).mean(axis = 1)
-        elif method == 'peak':
-            stride = max(1, num_points // (max_points // 2))  # each window gives 2 points
-            num_windows = num_points // stride
-
-            x_win = x_sliced[stride // 2 : stride // 2 + num_windows * stride : stride]
-            y_reshaped = y_sliced[: num_windows * stride].reshape(num_windows, stride)
-
-            # create output arrays for peaks
-            x_out = np.empty(num_windows * 2)
-            y_out = np.empty(num_windows * 2)
-
-            # assign peaks
-            y_out[::2] = y_reshaped.max(axis=1)
-            y_out[1::2] = y_reshaped.min(axis=1)
-            x_out[::2] = x_win
-            x_out[1::2] = x_win
-
-            # if receive another mismatched shape error try this
-                # # Safely calculate number of full windows
-                # stride = max(1, num_points // (max_points // 2))
-                # num_windows = num_points // stride
-                # total_pts = num_windows * stride
-
-                # # Slice to full window size
-                # x_window = x[:total_pts]
-                # y_window = y[:total_pts]
-
-                # x_win = x_window[stride // 2::stride][:num_windows]  # in case of rounding issues
-                # y_reshaped = y_window.reshape(num_windows, stride)
-
-                # # Now generate x and y downsampled
-                # x_out = np.repeat(x_win, 2)
-                # y_out = np.empty(num_windows * 2)
-                # y_out[::2] = y_reshaped.max(axis=1)
-                # y_out[1::2] = y_reshaped.min(axis=1)
         else:
             raise ValueError(
                 'Invalid "method" arugment. ' \
@@ -529,11 +687,6 @@ class LiveDataWindow(PlotWidget):
         self.xy_rendered[0] = x_out
         self.xy_rendered[1] = y_out
 
-        # sort xy_rendered for ability to add comment to past and move comment
-        sort_idx = np.argsort(self.xy_rendered[0])
-        self.xy_rendered[0] = self.xy_rendered[0][sort_idx]
-        self.xy_rendered[1] = self.xy_rendered[1][sort_idx]
-
     def add_comment_dialog(self, comment_time: float) -> str | None:
         """
         Opens a modal dialog to input a new comment for the given time.
@@ -588,7 +741,8 @@ class LiveDataWindow(PlotWidget):
         # create comment
         new_marker = CommentMarker(comment_time, text, self)
         self.comments[comment_time] = new_marker
-        self.update_plot()
+        self.journal_comment("add", comment_time, text)
+        self.request_redraw()
 
         self.data_modified = True
     
@@ -609,8 +763,9 @@ class LiveDataWindow(PlotWidget):
         # commentmarker handles viisbility out of range
         new_marker = CommentMarker(comment_time, text, self)
         self.comments[comment_time] = new_marker
+        self.journal_comment("add", comment_time, text)
 
-        self.update_plot()
+        self.request_redraw()
 
         self.data_modified = True
 
@@ -653,6 +808,9 @@ class LiveDataWindow(PlotWidget):
         new_time = self.find_nearest_time(click_time)
         new_marker = CommentMarker(new_time, text, self)
         self.comments[new_time] = new_marker
+        self.journal_comment("delete", old_time)
+        self.journal_comment("add", new_time, text)
+        self.request_redraw()
 
         self.comment_preview_enabled = False
         self.comment_preview.setVisible(False)
@@ -672,6 +830,8 @@ class LiveDataWindow(PlotWidget):
         time = marker.time
         marker = self.comments[time]
         marker.text = new_text
+        self.journal_comment("edit", time, new_text)
+        self.request_redraw()
         self.data_modified = True
         return
     
@@ -687,6 +847,8 @@ class LiveDataWindow(PlotWidget):
         marker = self.comments.pop(time)
         # remove marker from viewbox
         marker.remove()
+        self.journal_comment("delete", time)
+        self.request_redraw()
         self.data_modified = True
         return
     
@@ -701,7 +863,7 @@ class LiveDataWindow(PlotWidget):
         Returns:
             float: The nearest timestamp available in the data.
         """
-        # xy rendered sorted in downsampling
+        # xy rendered is sorted by time
         # find insertion point
         x = self.xy_rendered[0]
         idx = np.searchsorted(x, time)
@@ -748,8 +910,10 @@ class LiveDataWindow(PlotWidget):
         self.file = file
         self.prepost = prepost
         times, volts = self.epgdata.get_recording(self.file, self.prepost)
-        self.xy_data[0] = times
-        self.xy_data[1] = volts
+        self.samples = SampleStore(len(times))
+        self.samples.append(times, volts)
+        self.xy_data = [self.samples.times, self.samples.values]
+        self.pyramid = LODPyramid(self.xy_data[0], self.xy_data[1])
         self.downsample_visible(self.xy_data)
         #init_x, init_y = self.xy_data[0].copy(), self.xy_data[1].copy()
         self.curve.setData(self.xy_data[0], self.xy_data[1])
@@ -830,7 +994,7 @@ class LiveDataWindow(PlotWidget):
     def export_df(self) -> bool:
         """
         Exports the current waveform data and associated comments to a
-        CSV file. Prompts the user to select a file location. If no
+        CSV or windaq file. Prompts the user to select a file location. If no
         data is available, shows a message box informing the user.
         """
         self.integrate_buffer_to_np()
@@ -846,14 +1010,23 @@ class LiveDataWindow(PlotWidget):
         filename, _ = QFileDialog.getSaveFileName(
             parent=self,
             caption="Export Data As",
-            filter="CSV Files (*.csv);;All Files (*)"
+            filter="CSV Files (*.csv);;WinDaq Files (*.wdq);;All Files (*)"
         )
 
         if not filename:
             return
 
-        times = self.xy_data[0]
-        volts = self.xy_data[1]
+        times, volts = self.samples.view()
+
+        if re.search(r"\.wdq$", filename, re.IGNORECASE):
+            with windaq.windaqWriter(filename, annotations=["live"], keepTimes=True) as writer:
+                writer.write(times, volts)
+                if writer.clipped:
+                    print(f"[EXPORT WARNING] {writer.clipped} samples beyond +-{writer.fullScale} V were clipped")
+                for comment_time, comment in self.comments.items():
+                    writer.add_comment(comment_time, comment.text)
+            self.data_modified = False
+            return
         
         df = DataFrame({
             "time": times,
@@ -896,7 +1069,7 @@ class LiveDataWindow(PlotWidget):
             elif self.comment_preview_enabled and self.moving_comment is not None:
                 self.move_comment(self.moving_comment, x)
                 self.moving_comment = None
-            self.update_plot()
+            self.request_redraw()
 
     def keyPressEvent(self, event: QKeyEvent) -> None:
         """
@@ -960,6 +1133,17 @@ class LiveDataWindow(PlotWidget):
         #self.update_plot()
         return
 
+    def resizeEvent(self, event) -> None:
+        """
+        Redraws after a resize, the number of points drawn depends on the plot width.
+
+        Parameters:
+            event (QResizeEvent): The resize event.
+        """
+        super().resizeEvent(event)
+        if hasattr(self, "plot_update_timer"):
+            self.request_redraw()
+
     def wheelEvent(self, event: QWheelEvent) -> None:
         """
         Forwards mouse wheel scroll events to the custom PanZoomViewBox for
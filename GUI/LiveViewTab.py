@@ -1,31 +1,52 @@
 import numpy as np
-import json
 import threading
+import time
 from queue import Empty
 
 
-from PyQt6.QtCore import Qt, QSize, QMetaObject, Q_ARG
+from PyQt6.QtCore import Qt, QSize, QMetaObject, Q_ARG, QTimer
 from PyQt6.QtGui import QIcon
 from PyQt6.QtWidgets import (
-    QWidget, QPushButton, QToolButton, QHBoxLayout, QVBoxLayout, QLabel
+    QWidget, QPushButton, QToolButton, QHBoxLayout, QVBoxLayout, QLabel, QFileDialog
 )
 
 from LiveDataWindow import LiveDataWindow
 from ConnectionIndicator import ConnectionIndicator
 from SliderPanel2 import SliderPanel
-from EPGSocket import SocketClient, SocketServer
+from EPGSocket import SocketClient, AsyncSocketServer, parse_json_lines
+from SharedRingBuffer import SharedRingBuffer
+from StreamRecorder import StreamRecorder
 
 
 class LiveViewTab(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.connection_indicator = ConnectionIndicator()
+        self.connection_indicator.exportStatsRequested.connect(self.export_latency_log)
+
+        # === Shared memory ===
+        # same-host sample transport, ENGR writes samples here instead of the socket
+        # when it finds the ring (SocketClient(shared_memory=True)), controls stay on the socket.
+        # created before CS connects, ENGR attaches when it sees CS connect
+        try:
+            self.sample_ring = SharedRingBuffer.create()
+        except (OSError, ValueError) as e:
+            print(f"[SHARED MEMORY] Could not create sample ring, using the socket only: {e}")
+            self.sample_ring = None
+        self.ring_running = self.sample_ring is not None
+        self.ring_last_read = 0.0 # time.monotonic() of the last samples read from the ring
+
+        # === Recording ===
+        # every sample received is also written to recordings/stream_<utc>.WDQ from its own thread,
+        # so the recording survives the UI hanging, closing or never connecting
+        self.recorder = StreamRecorder("recordings")
 
         # === Socket ===
-        self.socket_server = SocketServer()
+        self.socket_server = AsyncSocketServer(recorder=self.recorder)
         self.socket_server.start()
 
-        self.socket_client = SocketClient(client_id='CS', parent=self)
+        # reconnects on its own and gets the frames it missed replayed by the server
+        self.socket_client = SocketClient(client_id='CS', parent=self, auto_reconnect=True)
         self.socket_client.peerConnectionChanged.connect(self.connection_indicator.set_connected)
         self.socket_client.peerConnectionChanged.connect(self.update_button_state)
         self.socket_client.connect()
@@ -36,6 +57,10 @@ class LiveViewTab(QWidget):
         self.datawindow = LiveDataWindow(self)
         self.datawindow.getPlotItem().hideButtons()
 
+        self.ring_loop = threading.Thread(target=self._ring_recv_loop, daemon=True)
+        if self.ring_running:
+            self.ring_loop.start()
+
         self.pause_button = QPushButton("Pause Live View", self)
         self.pause_button.setCheckable(True)
         self.pause_button.setChecked(True)
@@ -122,12 +147,22 @@ class LiveViewTab(QWidget):
         """)
         self.slider_button.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
         self.update_button_state(False)
+
+        # counters of data thinned or discarded because the view fell behind
+        self.pipeline_label = QLabel(self)
+        self.pipeline_label.setStyleSheet("color: gray;")
+        self.pipeline_timer = QTimer(self)
+        self.pipeline_timer.setInterval(1000)
+        self.pipeline_timer.timeout.connect(self.update_pipeline_stats)
+        self.pipeline_timer.start()
+        self.update_pipeline_stats()
         
 
         top_controls = QHBoxLayout()
         top_controls.addWidget(self.pause_button)
         top_controls.addWidget(self.add_comment_button)
         top_controls.addStretch()  # push slider button to right
+        top_controls.addWidget(self.pipeline_label)
         top_controls.addWidget(self.connection_indicator)
         top_controls.addWidget(self.slider_button)
 
@@ -157,6 +192,52 @@ class LiveViewTab(QWidget):
         else:
             self.slider_button.setToolTip("Hide control sliders")
 
+    def update_pipeline_stats(self):
+        """
+        Shows how much incoming data was decimated or dropped because the
+        live view could not keep up, and how many frames were missing from
+        the stream or could not be recorded to disk in time, with the queue
+        fill levels and recent gaps as tooltip.
+        Hidden while nothing was lost. Also refreshes the latency statistics
+        in the connection indicator tooltip.
+        """
+        queue_stats = self.socket_client.recv_queue.stats()
+        buffer_stats = self.datawindow.buffer_stats()
+        decimated = queue_stats["decimated"] + buffer_stats["decimated"]
+        dropped = buffer_stats["dropped"]
+        if self.sample_ring is not None:
+            dropped += self.sample_ring.dropped # ring full, counted by ENGR
+        dropped_messages = queue_stats["dropped"]
+        unrecorded = self.recorder.dropped # blocks the recorder could not write in time
+        sequence_stats = self.socket_client.sequence_stats()
+        missing = sequence_stats["missing_frames"]
+
+        self.pipeline_label.setVisible(bool(decimated or dropped or dropped_messages or missing or unrecorded))
+        self.pipeline_label.setText(
+            f"Decimated: {decimated} samples   Dropped: {dropped} samples, {dropped_messages} messages"
+            + (f"   Missing: {missing} frames in {sequence_stats['gaps']} gaps" if missing else "")
+            + (f"   Not recorded: {unrecorded} blocks" if unrecorded else "")
+        )
+        recent_gaps = ", ".join(f"#{first}-#{last}" for first, last in list(self.socket_client.gaps)[-5:])
+        self.pipeline_label.setToolTip(
+            f"Receive queue: {queue_stats['size']}/{queue_stats['maxsize']} messages "
+            f"(peak {queue_stats['high_water']})\n"
+            f"Plot buffer: {buffer_stats['size']}/{buffer_stats['maxsize']} samples"
+            + (f"\nRecent gaps (frame numbers): {recent_gaps}" if recent_gaps else "")
+        )
+        self.connection_indicator.set_details(self.datawindow.latency.format_summary())
+
+    def export_latency_log(self):
+        """
+        Appends the current latency statistics to a CSV log chosen by the user.
+        """
+        filename, _ = QFileDialog.getSaveFileName(
+            self, "Export Latency Log", "live_latency_log.csv", "CSV Files (*.csv);;All Files (*)",
+            options=QFileDialog.Option.DontConfirmOverwrite # the log is appended to
+        )
+        if filename:
+            self.datawindow.latency.export(filename)
+
     def update_button_state(self, is_connected: bool):
         """
         Handles disabling the slider, live view, and add comment button
@@ -195,46 +276,117 @@ class LiveViewTab(QWidget):
         self.add_comment_button.setToolTip("Recording has ended")
         self.add_comment_button.setEnabled(False)
 
-    def _socket_recv_loop(self):
+    def _set_live_mode(self, enabled: bool):
+        """
+        Switches live mode from a receiving thread. When it changes, the live
+        view is told in the GUI thread, so it redraws.
+        """
+        if self.datawindow.live_mode == enabled:
+            return
+        self.datawindow.live_mode = enabled
+        QMetaObject.invokeMethod(
+            self.datawindow, "set_live_mode", Qt.ConnectionType.QueuedConnection, Q_ARG(bool, enabled)
+        )
+
+    def _ring_recv_loop(self):
+        """
+        Moves sample blocks from the shared memory ring into the live view
+        buffer, no parsing involved. Polls every 2 ms while samples flow,
+        backing off to every 50 ms while the ring stays empty (no producer,
+        or data coming through the socket), so an idle CS does not keep waking up.
+        """
+        min_wait, max_wait = 0.002, 0.05
+        wait = min_wait
+        while self.ring_running:
+            times, values, acquired = self.sample_ring.read()
+            if len(times) == 0:
+                time.sleep(wait)
+                wait = min(wait * 2, max_wait)
+                continue
+            wait = min_wait
+
+            self.ring_last_read = time.monotonic()
+            self.recorder.record_samples(times, values)
+            self._set_live_mode(True)
+            self.datawindow.latency.record('view', float(acquired[0]), samples=len(times))
+            self.datawindow.push_samples(times, values[0], float(acquired[0]))
+            self.datawindow.current_time = float(times[-1])
+
+    def close_sample_ring(self):
+        """
+        Stops reading the shared memory ring and removes it.
+        """
+        if self.sample_ring is None:
+            return
+        self.ring_running = False
+        if self.ring_loop.is_alive():
+            self.ring_loop.join(timeout=1.0)
+        self.sample_ring.close()
+        self.sample_ring = None
 
+    def _socket_recv_loop(self):
+        """
+        Moves received messages into the live view, in batches: each pass
+        takes everything waiting in the receive queue at once, gathers the
+        samples of all its data messages into one block and pushes that with
+        a single push_samples call. Control messages are handed to the
+        slider panel in the GUI thread.
+        """
         acknowledged = False # whether the client has been acknowledged by the server
-        while self.socket_client.connected:
+        while self.socket_client.active:
             try:
                 # NOTE: message can include multiple commands/data, i.e. "{<command1>}\n{<command2>}\n"
-                raw_message = self.socket_client.recv_queue.get(timeout=1.0)
+                raw_messages = self.socket_client.recv_queue.get_all(timeout=1.0)
 
-                if not acknowledged:
-                    if raw_message.strip() == "ack":
+                messages = []
+                for raw_message in raw_messages:
+                    if isinstance(raw_message, str) and raw_message.strip() == "ack": # again after reconnecting
                         acknowledged = True
+                        continue
+                    if not acknowledged:
+                        continue
+
+                    # parse message into individual commands
+                    if isinstance(raw_message, dict):
+                        messages.append(raw_message)
+                    else:
+                        # Multiple newline-separated JSON strings, bad lines are skipped
+                        messages += parse_json_lines(raw_message)
+                if not messages:
                     continue
 
-                self.datawindow.live_mode = True
-                
-                # parse message into individual commands
-                if isinstance(raw_message, dict):
-                    messages = [raw_message]
-                else:
-                    # Multiple newline-separated JSON strings
-                    message_list = raw_message.strip().split("\n")
-                    messages = [
-                        json.loads(s) for s in message_list if s.strip()
-                    ]
-                
+                self._set_live_mode(True)
+
+                block_times, block_volts = [], [] # arrays of the data blocks, in order
+                sample_times, sample_volts = [], [] # single samples of JSON data messages
+                acquired = None # acquisition time of the oldest block
+                latency = self.datawindow.latency
                 for message in messages:
-                    if message["source"] == self.socket_client.client_id:
+                    if message.get("source") == self.socket_client.client_id:
                         continue
                     
-                    message_type = message['type']
+                    message_type = message.get('type')
 
                     if message_type == 'data':
-                        time = float(message['value'][0])
-                        volt = float(message['value'][1])
-
-                        with self.datawindow.buffer_lock:
-                            self.datawindow.buffer_data.append((time, volt))
-                            
-                        # update latest time input
-                        self.datawindow.current_time = time
+                        sample_times.append(message['value'][0])
+                        sample_volts.append(message['value'][1])
+
+                    elif message_type == 'data_block':
+                        # binary frame of many samples, only the first channel is plotted
+                        if len(message['times']) == 0:
+                            continue
+                        if sample_times: # keep the arrival order
+                            block_times.append(np.array(sample_times, dtype=np.float64))
+                            block_volts.append(np.array(sample_volts, dtype=np.float64))
+                            sample_times, sample_volts = [], []
+                        block_times.append(message['times'])
+                        block_volts.append(message['values'][0])
+
+                        if acquired is None:
+                            acquired = message['acquired_time']
+                        if message['server_time']:
+                            latency.record('server', message['acquired_time'], now=message['server_time'])
+                        latency.record('client', message['acquired_time'], now=message['received_time'])
 
                     elif message_type == "control":
                         name = message["name"]
@@ -261,13 +413,29 @@ class LiveViewTab(QWidget):
                             Qt.ConnectionType.QueuedConnection,
                             Q_ARG(dict, value),
                         )
+
+                if sample_times:
+                    # values may be strings, converted all at once
+                    block_times.append(np.array(sample_times, dtype=np.float64))
+                    block_volts.append(np.array(sample_volts, dtype=np.float64))
+                if not block_times:
+                    continue
+
+                times = block_times[0] if len(block_times) == 1 else np.concatenate(block_times)
+                volts = block_volts[0] if len(block_volts) == 1 else np.concatenate(block_volts)
+                if acquired is not None:
+                    latency.record('view', acquired, samples=len(times))
+                self.datawindow.push_samples(times, volts, acquired)
+
+                # update latest time input
+                self.datawindow.current_time = float(times[-1])
+
             except Empty:
-                self.datawindow.live_mode = False
+                # samples may be arriving through shared memory instead
+                if time.monotonic() - self.ring_last_read > 1.0:
+                    self._set_live_mode(False)
                 continue  # restart the loop
 
             except Exception as e:
-                self.datawindow.live_mode = False
+                self._set_live_mode(False)
                 print("[CS RECIEVE LOOP ERROR]", e)
-
-   
-
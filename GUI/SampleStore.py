@@ -0,0 +1,79 @@
+import numpy as np
+from numpy.typing import NDArray
+
+
+class SampleStore:
+    """
+    A growable store of (time, value) samples for streaming data.
+
+    Samples live in preallocated arrays whose capacity doubles when full,
+    so appends are amortized O(1) instead of copying everything like
+    np.concatenate. times and values are contiguous zero-copy views.
+    Appends only ever write past the current length, so a view taken
+    earlier never changes and can be used as a snapshot from another
+    thread (e.g. by a background save).
+
+    Times are kept as float64, float32 would lose millisecond resolution
+    after a few hours; values are float32.
+    """
+
+    def __init__(self, capacity: int = 1 << 16, value_dtype = np.float32):
+        """
+        Parameters:
+            capacity (int): Number of samples to preallocate.
+            value_dtype: dtype of the values.
+        """
+        self._times = np.empty(capacity, dtype=np.float64)
+        self._values = np.empty(capacity, dtype=value_dtype)
+        self._length = 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    @property
+    def times(self) -> NDArray:
+        """ All sample times, a view. """
+        return self._times[:self._length]
+
+    @property
+    def values(self) -> NDArray:
+        """ All sample values, a view. """
+        return self._values[:self._length]
+
+    def view(self, start: int = 0, stop: int | None = None) -> tuple[NDArray, NDArray]:
+        """
+        Returns views of the times and values of samples start to stop.
+
+        Parameters:
+            start (int): First sample.
+            stop (int): Sample after the last one, defaults to the current length.
+
+        Returns:
+            tuple[NDArray, NDArray]: Times and values.
+        """
+        stop = self._length if stop is None else min(stop, self._length)
+        return self._times[start:stop], self._values[start:stop]
+
+    def append(self, times: NDArray, values: NDArray) -> None:
+        """
+        Appends samples, growing the store if necessary.
+
+        Parameters:
+            times (NDArray): Sample times.
+            values (NDArray): Sample values, as many as times.
+        """
+        count = len(times)
+        needed = self._length + count
+        if needed > len(self._times):
+            capacity = max(needed, 2 * len(self._times))
+            # copy into new arrays, views of the old ones stay valid
+            grown_times = np.empty(capacity, dtype=self._times.dtype)
+            grown_values = np.empty(capacity, dtype=self._values.dtype)
+            grown_times[:self._length] = self._times[:self._length]
+            grown_values[:self._length] = self._values[:self._length]
+            self._times = grown_times
+            self._values = grown_values
+
+        self._times[self._length:needed] = times
+        self._values[self._length:needed] = values
+        self._length = needed
@@ -811,10 +811,10 @@ class Selection:
             new_label (str): The new label type to assign.
         """
         dw = self.datawindow
-        merged = False  # whether a merge was performed
 
         if self.is_selected(label_area): # label area is selected
             selected_label_areas = [label for label in self.selected_items if isinstance(label, LabelArea)]
+            edited_ranges = [(la.start_time, la.start_time + la.duration) for la in selected_label_areas]
             for label_area in selected_label_areas: # change without merging
                 label_area.label = new_label
                 label_area.update_label_area()
@@ -824,16 +824,15 @@ class Selection:
 
             for label_area in selected_label_areas[:]: # merge all labels if necessary
                 if label_area in self.datawindow.labels:
-                    did_merge = self.merge_adjacent_labels(label_area)
-                    merged = merged or did_merge
+                    self.merge_adjacent_labels(label_area)
         else: # label area is highlighted
+            edited_ranges = [(label_area.start_time, label_area.start_time + label_area.duration)]
             label_area.label = new_label
             label_area.update_label_area()
-            merged = self.merge_adjacent_labels(label_area)
+            self.merge_adjacent_labels(label_area)
 
         dw.viewbox.update()
 
-        if merged:
-            # kind of brute force, can we make this only update the necessary point in the df?
-            transitions = [(label_area.start_time, label_area.label) for label_area in dw.labels]
-            dw.epgdata.set_transitions(dw.file, transitions, dw.transition_mode)
\ No newline at end of file
+        # only the relabeled ranges change in the df, merging keeps labels as they are
+        for start_time, end_time in edited_ranges:
+            dw.push_label_range(start_time, end_time)
\ No newline at end of file
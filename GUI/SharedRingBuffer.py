@@ -0,0 +1,230 @@
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+from numpy.typing import NDArray
+
+DEFAULT_RING_NAME = "scido_live_samples"
+
+RING_MAGIC = 0x5C1D0
+RING_VERSION = 1
+# header slots (uint64): magic, version, capacity, channels, value size,
+# samples written, samples read, samples dropped, producer closed
+_MAGIC, _VERSION, _CAPACITY, _CHANNELS, _VALUE_SIZE, _WRITTEN, _READ, _DROPPED, _CLOSED = range(9)
+_HEADER_SLOTS = 16 # room for more fields, keeps the data 128 byte aligned
+_VALUE_TYPES = {4: np.float32, 8: np.float64}
+
+
+class SharedRingBuffer:
+    """
+    A single-producer/single-consumer ring buffer of waveform samples in
+    shared memory, for streaming from ENGR to CS on the same PC without
+    TCP, serialization or thread hops. Control and state messages still go
+    through the socket (EPGSocket).
+
+    The memory holds a header, the sample times (float64) and the values
+    of each channel (float32 or float64). The producer only advances the
+    written count and the consumer only the read count, both after copying
+    the samples, so no lock is needed between the two processes. Counts
+    grow forever (uint64) and are taken modulo the capacity for indexing.
+    The acquisition wall clock time of each sample is stored too, for
+    latency measurements.
+
+    CS creates the buffer (create) and consumes it, ENGR attaches (attach)
+    and produces. The creator unlinks the memory on close.
+    """
+
+    def __init__(self, memory: shared_memory.SharedMemory, owner: bool):
+        """
+        Use create or attach instead.
+        """
+        self._memory = memory
+        self._owner = owner
+        self._header = np.ndarray((_HEADER_SLOTS,), dtype=np.uint64, buffer=memory.buf)
+        if int(self._header[_MAGIC]) != RING_MAGIC or int(self._header[_VERSION]) != RING_VERSION:
+            self._header = None
+            memory.close()
+            raise ValueError(f'Shared memory "{memory.name}" is not a sample ring buffer')
+
+        self.capacity = int(self._header[_CAPACITY])
+        self.channels = int(self._header[_CHANNELS])
+        value_type = _VALUE_TYPES[int(self._header[_VALUE_SIZE])]
+        offset = self._header.nbytes
+        self._times = np.ndarray((self.capacity,), dtype=np.float64, buffer=memory.buf, offset=offset)
+        offset += self._times.nbytes
+        self._acquired = np.ndarray((self.capacity,), dtype=np.float64, buffer=memory.buf, offset=offset)
+        offset += self._acquired.nbytes
+        self._values = np.ndarray((self.channels, self.capacity), dtype=value_type, buffer=memory.buf, offset=offset)
+
+    @classmethod
+    def create(cls, name: str = DEFAULT_RING_NAME, capacity: int = 1 << 20, channels: int = 1,
+               value_dtype = np.float32) -> "SharedRingBuffer":
+        """
+        Creates the shared memory, replacing a stale buffer of the same name
+        (e.g. left by a crash).
+
+        Parameters:
+            name (str): Name of the shared memory.
+            capacity (int): Number of samples the buffer holds.
+            channels (int): Number of channels.
+            value_dtype: np.float32 or np.float64.
+
+        Returns:
+            SharedRingBuffer: The consumer end.
+        """
+        value_size = np.dtype(value_dtype).itemsize
+        size = 8 * _HEADER_SLOTS + capacity * (8 + 8 + channels * value_size)
+        try:
+            memory = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            memory = shared_memory.SharedMemory(name=name, create=True, size=size)
+
+        header = np.ndarray((_HEADER_SLOTS,), dtype=np.uint64, buffer=memory.buf)
+        header[:] = 0
+        header[_CAPACITY] = capacity
+        header[_CHANNELS] = channels
+        header[_VALUE_SIZE] = value_size
+        header[_VERSION] = RING_VERSION
+        header[_MAGIC] = RING_MAGIC # last, attach checks it
+        del header
+        return cls(memory, owner=True)
+
+    @classmethod
+    def attach(cls, name: str = DEFAULT_RING_NAME) -> "SharedRingBuffer":
+        """
+        Attaches to a buffer created by another process.
+
+        Parameters:
+            name (str): Name of the shared memory.
+
+        Returns:
+            SharedRingBuffer: The producer end.
+
+        Raises:
+            FileNotFoundError: If there is no such buffer.
+            ValueError: If the memory is not a sample ring buffer.
+        """
+        try:
+            memory = shared_memory.SharedMemory(name=name, track=False) # python 3.13+
+        except TypeError:
+            memory = shared_memory.SharedMemory(name=name)
+            # before 3.13 the resource tracker would unlink the creator's memory when this process exits
+            try:
+                from multiprocessing import resource_tracker
+                resource_tracker.unregister(memory._name, "shared_memory")
+            except (ImportError, AttributeError, KeyError):
+                pass
+        return cls(memory, owner=False)
+
+    @property
+    def name(self) -> str:
+        return self._memory.name
+
+    @property
+    def dropped(self) -> int:
+        """ Samples the producer discarded because the buffer was full. """
+        return int(self._header[_DROPPED])
+
+    @property
+    def closed(self) -> bool:
+        """ Whether the producer has finished. """
+        return bool(self._header[_CLOSED])
+
+    def available(self) -> int:
+        """ Number of samples waiting to be read. """
+        return int(self._header[_WRITTEN] - self._header[_READ])
+
+    def write(self, times: NDArray, values: NDArray, acquired: float | None = None,
+              timeout: float | None = 0.0) -> int:
+        """
+        Producer: appends samples. If the buffer is full, waits up to timeout
+        seconds for the consumer, then discards the samples that do not fit
+        and counts them as dropped.
+
+        Parameters:
+            times (NDArray): Sample times.
+            values (NDArray): Sample values, shape (samples,) or (channels, samples).
+            acquired (float): Wall clock time the samples were acquired, defaults to now.
+            timeout (float): Seconds to wait for space, None to wait indefinitely.
+
+        Returns:
+            int: Number of samples written.
+        """
+        values = np.asarray(values)
+        if values.ndim == 1:
+            values = values[np.newaxis, :]
+        count = len(times)
+        acquired = time.time() if acquired is None else acquired
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        written = int(self._header[_WRITTEN])
+        while self.capacity - (written - int(self._header[_READ])) < count:
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            time.sleep(0.001)
+
+        space = self.capacity - (written - int(self._header[_READ]))
+        kept = min(count, space)
+        if kept < count:
+            self._header[_DROPPED] += np.uint64(count - kept)
+
+        start = written % self.capacity
+        first = min(kept, self.capacity - start) # samples before wrapping around
+        self._times[start:start + first] = times[:first]
+        self._acquired[start:start + first] = acquired
+        self._values[:, start:start + first] = values[:, :first]
+        self._times[:kept - first] = times[first:kept]
+        self._acquired[:kept - first] = acquired
+        self._values[:, :kept - first] = values[:, first:kept]
+
+        self._header[_WRITTEN] = np.uint64(written + kept) # publish after the data
+        return kept
+
+    def read(self, max_samples: int | None = None) -> tuple[NDArray, NDArray, NDArray]:
+        """
+        Consumer: takes the samples written so far.
+
+        Parameters:
+            max_samples (int): Max number of samples to take.
+
+        Returns:
+            tuple[NDArray, NDArray, NDArray]: Copies of the times, values
+                (channels, samples) and acquisition times, empty if there
+                is nothing new.
+        """
+        read = int(self._header[_READ])
+        count = int(self._header[_WRITTEN]) - read
+        if max_samples is not None:
+            count = min(count, max_samples)
+
+        start = read % self.capacity
+        indices = (start + np.arange(count)) % self.capacity if start + count > self.capacity else slice(start, start + count)
+        times = self._times[indices].copy()
+        values = self._values[:, indices].copy()
+        acquired = self._acquired[indices].copy()
+
+        self._header[_READ] = np.uint64(read + count) # release the space after copying
+        return times, values, acquired
+
+    def close_producer(self) -> None:
+        """
+        Producer: marks the stream as finished.
+        """
+        self._header[_CLOSED] = 1
+
+    def close(self) -> None:
+        """
+        Releases the shared memory, and removes it if this end created it.
+        """
+        if self._header is None:
+            return
+        self._header = self._times = self._acquired = self._values = None # views must go before the memory
+        self._memory.close()
+        if self._owner:
+            try:
+                self._memory.unlink()
+            except FileNotFoundError:
+                pass
@@ -15,6 +15,14 @@ class SliderPanel(QWidget):
         self.socket_client = self.parent().socket_client
         self._suppress = False  # whether slider signals are suppressed
 
+        # slider drags emit valueChanged for every step, only the latest value
+        # of each control is sent, at most max_control_rate times a second
+        self.max_control_rate: float = 20.0
+        self.pending_controls: dict[str, object] = {}  # control name -> latest unsent value
+        self.control_timer = QTimer(self)
+        self.control_timer.setInterval(int(1000 / self.max_control_rate))
+        self.control_timer.timeout.connect(self.flush_control_updates)
+
         # self.suppress_signal: bool = False # whether slider change signals are hidden from the socket
         
         layout = QVBoxLayout()
@@ -191,9 +199,38 @@ class SliderPanel(QWidget):
         QTimer.singleShot(0, lambda: setattr(self, "_suppress", False))
 
     def send_control_update(self, name, value):
+        """
+        Sends a control change, coalesced per control: the first change is
+        sent right away, changes within the next 1 / max_control_rate seconds
+        only keep the latest value, sent when the interval has passed.
+        Button clicks are always sent.
+        """
         if self._suppress:
             return
 
+        if value == "clicked":
+            self._send_control(name, value)
+            return
+
+        self.pending_controls[name] = value
+        if not self.control_timer.isActive():
+            self.flush_control_updates()
+            self.control_timer.start()
+
+    def flush_control_updates(self):
+        """
+        Sends the latest pending value of each changed control.
+        Stops the timer once an interval passes without changes.
+        """
+        if not self.pending_controls:
+            self.control_timer.stop()
+            return
+
+        pending, self.pending_controls = self.pending_controls, {}
+        for name, value in pending.items():
+            self._send_control(name, value)
+
+    def _send_control(self, name, value):
         self.socket_client.send({
             "source": self.socket_client.client_id,
             "type": "control",
@@ -0,0 +1,214 @@
+import datetime
+import logging
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+from numpy.typing import NDArray
+
+import windaq
+from BoundedQueue import BoundedQueue
+
+
+class StreamRecorder:
+    """
+    Tees the live sample stream to disk from a dedicated writer thread,
+    independent of the CS UI: the socket server hands it every data frame it
+    receives (and LiveViewTab the samples read from shared memory), whether
+    or not CS is connected or keeping up.
+
+    Samples are appended to a windaq file (windaq.windaqWriter) in
+    `directory`, named stream_<utc>.WDQ after the first sample, with the
+    exact time of every sample in its stream_<utc>.WDQ.times sidecar
+    (float64, see windaq.read_sample_times), so pauses, gaps and uneven
+    spacing are kept. Values are stored as 16 bit words over +-full_scale
+    volts: that is a resolution of full_scale / 32768, values beyond it are
+    clipped and counted (clipped), and logged every sync. The header is
+    patched and both files forced to disk (fsync) every `sync_interval`
+    seconds, so after a crash or power loss the recording opens in EPGData
+    (or BackupRecovery) up to the last sync. A new file is started when the
+    sender restarts (new stream id, wrapped JSON data of stream 0 belongs to
+    any) or the channel count changes. Missing frames (sequence gaps) are
+    logged.
+
+    Samples wait for the writer in a BoundedQueue of queue_maxsize blocks.
+    The disk is normally much faster than the acquisition, but if it stalls
+    the "drop" policy discards the oldest blocks rather than growing memory
+    or holding up the sender, and the dropped blocks are counted (dropped)
+    and logged every sync. With "block" the sender waits instead.
+    """
+
+    def __init__(self, directory: str = "recordings", sync_interval: float = 1.0, full_scale: float = 10.0,
+                 queue_maxsize: int = 10000, queue_policy: str = "drop"):
+        """
+        Parameters:
+            directory (str): Folder of the recordings, created if needed.
+            sync_interval (float): Seconds between header patches and fsyncs.
+            full_scale (float): Full scale of the 16 bit samples, in volts.
+            queue_maxsize (int): Max number of blocks waiting for the writer, 0 for unbounded.
+            queue_policy (str): "drop" or "block", see BoundedQueue.
+        """
+        self.directory = directory
+        self.sync_interval = sync_interval
+        self.full_scale = full_scale
+        self.path: str | None = None # the file being written
+        self.samples = 0 # samples written to the current file
+        self.missing_frames = 0 # frames missing from the recorded streams
+        self.clipped = 0 # values beyond +-full_scale, over all files
+
+        self._queue: BoundedQueue = BoundedQueue(queue_maxsize, queue_policy)
+        self._writer: windaq.windaqWriter | None = None
+        self._stream: int | None = None # sender stream of the current file, None until a binary frame
+        self._next_sequences: dict[int, int] = {} # stream id -> sequence number of the next frame expected
+        self._clipped_logged = 0 # clipped values already logged
+        self._dropped_logged = 0 # dropped blocks already logged
+        self._thread = threading.Thread(target=self._write_loop, daemon=True)
+        os.makedirs(directory, exist_ok=True)
+        self._thread.start()
+
+    @property
+    def dropped(self) -> int:
+        """ Blocks discarded because the writer could not keep up. """
+        return self._queue.dropped
+
+    def record_block(self, block: dict) -> None:
+        """
+        Queues a "data_block" message (see EPGSocket.decode_frame) for writing.
+        """
+        self._queue.put(("block", block))
+
+    def record_samples(self, times: NDArray, values: NDArray, source: str = "ENGR") -> None:
+        """
+        Queues samples that did not come in a frame, e.g. through shared memory.
+
+        Parameters:
+            times (NDArray): Sample times.
+            values (NDArray): Sample values, shape (samples,) or (channels, samples).
+            source (str): ID of the sender, used in the channel annotation.
+        """
+        self._queue.put(("samples", (times, values, source)))
+
+    def close(self, timeout: float = 5.0) -> None:
+        """
+        Writes the queued samples, finishes the file and stops the writer thread.
+
+        Parameters:
+            timeout (float): Seconds to wait for the writer thread.
+        """
+        try:
+            # waits for room whatever the policy, closing must not drop queued samples
+            queue.Queue.put(self._queue, ("close", None), timeout=timeout)
+        except queue.Full:
+            logging.warning(f"[RECORDER] Writer not responding, {self.path} may be incomplete")
+            return
+        self._thread.join(timeout)
+
+    def _write_loop(self) -> None:
+        """
+        Writer thread: takes queued samples off the queue and appends them,
+        syncing the file every sync_interval seconds.
+        """
+        last_sync = time.monotonic()
+        while True:
+            timeout = max(0.0, last_sync + self.sync_interval - time.monotonic())
+            try:
+                kind, item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                kind, item = None, None
+
+            try:
+                if kind == "close":
+                    self._close_file()
+                    return
+                if kind == "block":
+                    self._check_sequence(item["stream"], item["sequence"])
+                    self._write(item["times"], item["values"], item["source"], item["stream"])
+                elif kind == "samples":
+                    times, values, source = item
+                    self._write(times, np.atleast_2d(values), source, None)
+
+                if time.monotonic() - last_sync >= self.sync_interval:
+                    if self._writer is not None:
+                        self._writer.flush(sync=True)
+                    self._log_clipping()
+                    self._log_drops()
+                    last_sync = time.monotonic()
+            except Exception as e:
+                logging.warning(f"[RECORDER] Could not write {self.path}: {e}")
+
+    def _check_sequence(self, stream: int, sequence: int) -> None:
+        """
+        Logs frames missing from a stream.
+        """
+        expected = self._next_sequences.get(stream)
+        if expected is not None and sequence > expected:
+            missing = sequence - expected
+            self.missing_frames += missing
+            logging.warning(f"[RECORDER] {missing} frames of stream {stream} missing from the recording before frame #{sequence}")
+        self._next_sequences[stream] = sequence + 1
+
+    def _log_clipping(self) -> None:
+        """
+        Logs the values clipped since the last call.
+        """
+        if self.clipped > self._clipped_logged:
+            logging.warning(
+                f"[RECORDER] {self.clipped - self._clipped_logged} values beyond +-{self.full_scale} V "
+                f"were clipped in {self.path}"
+            )
+            self._clipped_logged = self.clipped
+
+    def _log_drops(self) -> None:
+        """
+        Logs the blocks dropped from the queue since the last call.
+        """
+        dropped = self.dropped
+        if dropped > self._dropped_logged:
+            logging.warning(
+                f"[RECORDER] {dropped - self._dropped_logged} blocks were dropped before reaching "
+                f"{self.path}, the disk is not keeping up"
+            )
+            self._dropped_logged = dropped
+
+    def _write(self, times: NDArray, values: NDArray, source: str, stream: int | None) -> None:
+        """
+        Appends a block of samples (values shape (channels, samples)), starting
+        a new file for the first block, a new sender stream or a new channel count.
+        """
+        if len(times) == 0:
+            return
+        channels = values.shape[0]
+        new_stream = stream not in (None, 0, self._stream) and self._stream is not None
+        if stream not in (None, 0):
+            self._stream = stream
+        if self._writer is None or new_stream or channels != self._writer.nChannels:
+            self._close_file()
+            stamp = datetime.datetime.now(datetime.timezone.utc).strftime('%Y%m%d_%H%M%S')
+            self.path = os.path.join(self.directory, f"stream_{stamp}.WDQ")
+            number = 1
+            while os.path.exists(self.path): # several streams within a second
+                number += 1
+                self.path = os.path.join(self.directory, f"stream_{stamp}_{number}.WDQ")
+            self._writer = windaq.windaqWriter(
+                self.path, nChannels=channels, fullScale=self.full_scale,
+                annotations=[f"{source} ch{channel + 1}" for channel in range(channels)], keepTimes=True
+            )
+            self.samples = 0
+            logging.info(f"[RECORDER] Recording the live stream to {self.path}")
+        clipped = self._writer.clipped
+        self._writer.write(times, values.T)
+        self.clipped += self._writer.clipped - clipped
+        self.samples += len(times)
+
+    def _close_file(self) -> None:
+        """
+        Finishes the current file, if any.
+        """
+        if self._writer is not None:
+            self._writer.flush(sync=True)
+            self._writer.close()
+            self._log_clipping()
+            logging.info(f"[RECORDER] Recorded {self.samples} samples to {self.path}")
+            self._writer = None
@@ -140,11 +140,15 @@ class MainWindow(QMainWindow):
         self.tabs.addTab(self.label_tab, "Label")
     
     def closeEvent(self, event):
-        self.live_view_tab.socket_server.stop()
-
         current_widget = self.tabs.currentWidget()
         if isinstance(current_widget, LiveViewTab):
             current_widget.datawindow.closeEvent(event)
+            if not event.isAccepted(): # close cancelled at the unsaved changes prompt
+                return
+
+        self.live_view_tab.socket_client.disconnect()
+        self.live_view_tab.close_sample_ring()
+        self.live_view_tab.socket_server.stop() # after the ring, the recorder takes its last samples
 
         super().closeEvent(event)
 
@@ -0,0 +1,49 @@
+import numpy as np
+
+import BackupRecovery
+import windaq
+
+
+def _crashed_backup(backup_dir, stamp, samples, unsynced):
+    ''' a windaq backup whose header counts `samples` with `unsynced` samples and half a sample behind them '''
+    path = str(backup_dir / f"waveform_backup_{stamp}.WDQ")
+    writer = windaq.windaqWriter(path, keepTimes=True)
+    times = np.concatenate([np.arange(samples // 2), 100 + np.arange(samples - samples // 2)]) * 0.01 # a pause halfway
+    writer.write(times, np.linspace(-1, 1, samples))
+    writer.flush(sync=True)
+    writer._file.write(np.full(unsynced, 1000, dtype="<i2").tobytes() + b"\x01") # written after the last sync
+    writer._file.close() # crashed, never closed properly
+    writer._timesFile.close()
+    return path, times
+
+
+def test_recover_crashed_backup(tmp_path):
+    backups = tmp_path / "backups"
+    backups.mkdir()
+    _crashed_backup(backups, "20260101_120000", 1000, 10)
+    (backups / "comments_journal_20260101_120000.csv").write_text(
+        "time,action,comment\n0.5,add,first\n1.5,add,second\n0.5,delete,\n1.5,edit,changed\n2.5,ad", encoding="utf-8"
+    )
+
+    output = str(tmp_path / "recovered.WDQ")
+    result = BackupRecovery.recover(str(backups), output)
+
+    assert result["samples"] == 1010
+    assert result["comments"] == 1
+    assert "sample times file is incomplete, assuming even spacing" in result["problems"]
+    recovered = windaq.windaq(output)
+    assert recovered.nSample == 1010
+    np.testing.assert_allclose(recovered.data(1)[:1000], np.linspace(-1, 1, 1000), atol=1e-3)
+
+
+def test_recover_named_session(tmp_path):
+    backups = tmp_path / "backups"
+    backups.mkdir()
+    _, older_times = _crashed_backup(backups, "20260101_120000", 500, 0)
+    _crashed_backup(backups, "20260102_120000", 300, 0)
+
+    result = BackupRecovery.recover(str(backups), str(tmp_path / "recovered.WDQ"), stamp="20260101_120000")
+
+    assert result["session"]["stamp"] == "20260101_120000"
+    assert result["problems"] == []
+    assert windaq.read_sample_times(result["output"], 500).tolist() == older_times.tolist()
@@ -0,0 +1,111 @@
+import queue
+import types
+
+import numpy as np
+import pytest
+
+from BoundedQueue import BoundedQueue, minmax_decimate
+
+
+def _block(first, count, source="ENGR"):
+    times = np.arange(first, first + count, dtype=np.float64)
+    return {"type": "data_block", "source": source, "times": times, "values": np.sin(times)[np.newaxis, :]}
+
+
+def test_invalid_policy():
+    with pytest.raises(ValueError):
+        BoundedQueue(10, "newest")
+
+
+def test_block_policy_counts_waiting_puts():
+    q = BoundedQueue(2, "block")
+    q.put(1)
+    q.put(2)
+    with pytest.raises(queue.Full):
+        q.put(3, timeout=0.01)
+
+    assert q.blocked == 1 and q.dropped == 0
+    assert q.get_all() == [1, 2]
+
+
+def test_drop_policy_discards_the_oldest():
+    q = BoundedQueue(3, "drop")
+    for item in range(5):
+        q.put(item)
+
+    assert q.dropped == 2
+    assert q.get_all() == [2, 3, 4]
+    assert q.unfinished_tasks == 3
+    assert q.stats()["high_water"] == 3
+
+
+def test_decimate_policy_merges_data_blocks():
+    q = BoundedQueue(3, "decimate")
+    q.put(_block(0, 100))
+    q.put("ack")
+    q.put(_block(100, 100))
+    q.put(_block(200, 100)) # full: the three blocks become one of half their samples
+
+    items = q.get_all()
+    assert q.dropped == 0
+    assert q.decimated == 150
+    assert items[1] == "ack"
+    merged = items[0]
+    assert len(merged["times"]) == 150 and merged["values"].shape == (1, 150)
+    assert np.all(np.diff(merged["times"]) > 0)
+    assert merged["values"].max() == np.sin(np.arange(300.0)).max()
+    assert merged["values"].min() == np.sin(np.arange(300.0)).min()
+
+
+def test_decimate_policy_drops_when_nothing_merges():
+    q = BoundedQueue(2, "decimate")
+    for item in ["a", "b", "c"]:
+        q.put(item)
+
+    assert q.dropped == 1 and q.decimated == 0
+    assert q.get_all() == ["b", "c"]
+
+
+def test_get_all():
+    q = BoundedQueue(10)
+    with pytest.raises(queue.Empty):
+        q.get_all(timeout=0.01)
+    with pytest.raises(queue.Empty):
+        q.get_all(block=False)
+    for item in range(5):
+        q.put(item)
+
+    assert q.get_all(max_items=2) == [0, 1]
+    assert q.get_all() == [2, 3, 4]
+    assert q.stats()["size"] == 0
+
+
+def test_minmax_decimate_keeps_the_peaks():
+    times = np.arange(1000, dtype=np.float64)
+    values = np.zeros(1000)
+    values[123], values[877] = 5.0, -5.0
+
+    kept_times, kept_values = minmax_decimate(times, values, 100)
+    assert len(kept_times) <= 100
+    assert 123.0 in kept_times and 877.0 in kept_times
+    assert kept_values.max() == 5.0 and kept_values.min() == -5.0
+
+
+def test_live_buffer_drop_trims_latency_stamps():
+    pytest.importorskip("pyqtgraph")
+    from LiveDataWindow import LiveDataWindow
+    import threading
+
+    window = types.SimpleNamespace(
+        buffer_lock=threading.Lock(), buffer_data=[], buffer_samples=0, max_buffer_samples=200,
+        buffer_policy="drop", buffer_dropped=0, buffer_decimated=0, buffer_acquired=[],
+    )
+    for block in range(5): # the buffer overflows on the third block and keeps the newest 100 samples
+        times = np.arange(block * 80, (block + 1) * 80, dtype=np.float64)
+        LiveDataWindow.push_samples(window, times, np.zeros(80), acquired=1000.0 + block)
+
+    assert window.buffer_dropped > 0
+    kept_start = window.buffer_data[0][0][0]
+    assert [acquired for acquired, _ in window.buffer_acquired] == [
+        1000.0 + block for block in range(5) if (block + 1) * 80 - 1 >= kept_start
+    ]
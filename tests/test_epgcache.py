@@ -0,0 +1,71 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+import EPGCache as epgcache
+from EPGCache import EPGCache
+from EPGData import EPGData
+
+
+def _recording(path, samples=1000):
+    times = np.arange(samples) / 100
+    df = pd.DataFrame({
+        "time": times,
+        "pre_rect": np.sin(times),
+        "post_rect": np.cos(times),
+        "labels": np.where(times < 5, "J", "K").astype(object),
+    })
+    df.to_csv(path, index=False)
+    return df
+
+
+def test_cache_miss_then_hit(tmp_path):
+    source = tmp_path / "rec.csv"
+    df = _recording(source)
+    cache = EPGCache(str(tmp_path / "cache"))
+
+    assert cache.get(str(source)) is None
+    assert cache.put(str(source), df, ["pre_rect", "post_rect"])
+    cached = cache.get(str(source))
+
+    assert cached["pre_rect"].dtype == np.float32
+    assert cached["time"].dtype == np.float64
+    assert cached["labels"].dtype == object
+    assert cached["labels"].tolist() == df["labels"].tolist()
+    np.testing.assert_array_equal(cached["pre_rect"], df["pre_rect"].astype(np.float32))
+
+
+def test_changed_source_or_version_misses(tmp_path, monkeypatch):
+    source = tmp_path / "rec.csv"
+    df = _recording(source)
+    cache = EPGCache(str(tmp_path / "cache"))
+    cache.put(str(source), df)
+
+    monkeypatch.setattr(epgcache, "CACHE_VERSION", epgcache.CACHE_VERSION + 1)
+    assert cache.get(str(source)) is None
+    monkeypatch.undo()
+    assert cache.get(str(source)) is not None
+
+    _recording(source, samples=1001)
+    os.utime(source, ns=(0, os.stat(source).st_mtime_ns + 1))
+    assert cache.get(str(source)) is None
+
+
+def test_load_data_dtypes_do_not_depend_on_the_cache(tmp_path):
+    source = str(tmp_path / "rec.csv")
+    _recording(source)
+    loaded = []
+    for _ in range(2): # cold, then from the cache
+        data = EPGData()
+        data.cache = EPGCache(str(tmp_path / "cache"))
+        assert data.load_data(source)
+        loaded.append(data.dfs[source])
+
+    cold, cached = loaded
+    assert cold.dtypes.to_dict() == cached.dtypes.to_dict()
+    assert cold["pre_rect"].dtype == np.float32
+    pd.testing.assert_frame_equal(cold, cached)
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+
+from EPGData import EPGData
+
+
+def _same_labels(a, b):
+    a, b = np.asarray(a, dtype=object), np.asarray(b, dtype=object)
+    return len(a) == len(b) and bool(np.all((a == b) | (pd.isna(a) & pd.isna(b))))
+
+
+def _recording(labels, probes):
+    data = EPGData()
+    data.dfs["rec"] = pd.DataFrame({"time": np.arange(len(labels)) / 100, "pre_rect": np.zeros(len(labels))})
+    data.segments["rec"] = {"labels": data._encode(labels), "probes": data._encode(probes)}
+    return data
+
+
+def test_encode_round_trip():
+    labels = np.array([np.nan, np.nan, "J", "J", "K", np.nan, "K", "K"], dtype=object)
+    data = _recording(labels, np.full(len(labels), np.nan, dtype=object))
+
+    starts, values = data.get_segments("rec", "labels")
+    assert starts.tolist() == [0, 2, 4, 5, 6]
+    assert _same_labels(values, [np.nan, "J", "K", np.nan, "K"])
+    assert _same_labels(data.materialize("rec", "labels"), labels)
+    assert data.get_segments("rec", "probes")[0].tolist() == [0]
+
+
+def test_update_label_range_matches_per_sample_edits():
+    rng = np.random.default_rng(1)
+    samples = 2000
+    reference = {
+        "labels": rng.choice(np.array(["J", "K", "L"], dtype=object), samples // 100).repeat(100),
+        "probes": np.full(samples, np.nan, dtype=object),
+    }
+    data = _recording(reference["labels"].copy(), reference["probes"].copy())
+    times = data.dfs["rec"]["time"].values
+
+    for _ in range(200):
+        section_type = rng.choice(["labels", "probes"])
+        start, end = np.sort(rng.integers(0, samples + 50, 2)) / 100
+        label = rng.choice(np.array(["J", "K", "N", None], dtype=object))
+        data.update_label_range("rec", start, end, label, section_type)
+        i0, i1 = np.searchsorted(times, [round(start, 2), round(end, 2)], side="left")
+        reference[section_type][i0:i1] = np.nan if label is None else label
+
+        starts, values = data.get_segments("rec", section_type)
+        assert starts[0] == 0 and np.all(np.diff(starts) > 0)
+        assert not any(_same_labels(values[i:i + 1], values[i + 1:i + 2]) for i in range(len(values) - 1))
+        assert _same_labels(data.materialize("rec", section_type), reference[section_type])
+
+    labeled = data.labeled_df("rec")
+    assert _same_labels(labeled["labels"], reference["labels"])
+    assert _same_labels(labeled["probes"], reference["probes"])
+
+
+def test_transitions_round_trip():
+    labels = np.array(["J"] * 50 + ["K"] * 30 + ["J"] * 20, dtype=object)
+    data = _recording(labels, np.full(100, np.nan, dtype=object))
+
+    transitions = data.get_transitions("rec", "labels")
+    assert [(float(t), label) for t, label in transitions] == [(0.0, "J"), (0.5, "K"), (0.8, "J")]
+    data.set_transitions("rec", [(0.0, "J"), (0.25, "L"), (0.8, "J")], "labels")
+    assert _same_labels(data.materialize("rec", "labels"), ["J"] * 25 + ["L"] * 55 + ["J"] * 20)
+    assert data.get_transitions("rec", "probes") == []
@@ -0,0 +1,189 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+pytest.importorskip("PyQt6")
+
+from EPGSocket import REPLAY_FRAME_OVERHEAD, AsyncSocketServer, BaseSocketServer, FrameDecoder, SocketClient, SocketServer, decode_frame, encode_frame, parse_json_lines
+
+
+class CapturingServer(BaseSocketServer):
+    """ A server without sockets that keeps what it sends per client. """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.sent: dict[str, bytearray] = {}
+
+    def _send_bytes(self, client_id: str, data: bytes):
+        self.sent.setdefault(client_id, bytearray()).extend(data)
+
+    def received_frames(self, client_id: str) -> list[dict]:
+        messages = FrameDecoder().feed(bytes(self.sent.get(client_id, b"")))
+        return [decode_frame(message) for kind, message in messages if kind == "frame"]
+
+
+def _forward_alternating(server: CapturingServer, count: int):
+    """ Forwards binary frames of stream 7 interleaved with legacy JSON data (stream 0). """
+    for i in range(count):
+        server._forward_frame(encode_frame([2.0 * i], [1.0], "ENGR", stream=7, sequence=i))
+        server._forward_data({"type": "data", "value": f"{2.0 * i + 1:.4f},DATA,0.5000,0\n", "source": "ENGR"})
+
+
+def test_replay_keeps_interleaved_streams():
+    server = CapturingServer()
+    _forward_alternating(server, 5) # CS is away
+
+    _, _, resume = server._accept_handshake("client_id=CS;frames=binary;resume=7:2,0:3")
+    server._register("CS", object(), resume)
+
+    replayed = [(block["stream"], block["sequence"]) for block in server.received_frames("CS")]
+    assert replayed == [(7, 2), (7, 3), (0, 3), (7, 4), (0, 4)]
+    times = np.concatenate([block["times"] for block in server.received_frames("CS")])
+    assert np.all(np.diff(times) > 0)
+
+
+def test_replay_of_unseen_stream_is_complete():
+    server = CapturingServer()
+    _forward_alternating(server, 3)
+
+    _, _, resume = server._accept_handshake("client_id=CS;frames=binary;resume=7:3")
+    server._register("CS", object(), resume)
+
+    assert [(block["stream"], block["sequence"]) for block in server.received_frames("CS")] == [(0, 0), (0, 1), (0, 2)]
+
+
+def test_replay_limits_count_legacy_frames_with_their_overhead():
+    frame_size = len(encode_frame([0.0], [0.5], "ENGR", np.float64)) + REPLAY_FRAME_OVERHEAD
+    by_bytes = CapturingServer(replay_max_bytes=4 * frame_size)
+    by_count = CapturingServer(replay_max_frames=3)
+    for server in (by_bytes, by_count):
+        for i in range(10):
+            server._forward_data({"type": "data", "value": f"{i:.4f},DATA,0.5000,0\n", "source": "ENGR"})
+
+    assert [sequence for _, sequence, _, _ in by_bytes._replay[0]] == [6, 7, 8, 9]
+    assert [sequence for _, sequence, _, _ in by_count._replay[0]] == [7, 8, 9]
+    assert by_bytes._replay_bytes == 4 * frame_size
+
+
+def test_client_tracks_gaps_per_stream():
+    client = SocketClient("CS")
+    for stream, sequence in [(7, 0), (0, 0), (7, 1), (0, 1), (7, 3), (0, 2)]:
+        assert client._check_sequence(stream, sequence)
+    assert not client._check_sequence(7, 1)
+
+    assert client.sequence_stats() == {"gaps": 1, "missing_frames": 1, "duplicate_frames": 1, "streams": 2}
+    assert list(client.gaps) == [(2, 2)]
+
+
+class SlowSocket:
+    """ A socket whose sendall writes byte by byte, like a full send buffer would. """
+
+    def __init__(self):
+        self.received = bytearray()
+
+    def sendall(self, data: bytes):
+        for i in range(len(data)):
+            self.received += data[i:i + 1]
+            time.sleep(0)
+
+
+def test_threaded_server_keeps_concurrent_sends_apart():
+    server = SocketServer()
+    server._register("CS", connection := SlowSocket(), None)
+    server.binary_clients.add("CS")
+    frames = [encode_frame([float(i)], [1.0], "ENGR", stream=7, sequence=i) for i in range(20)]
+
+    def forward():
+        for frame in frames:
+            server._forward_frame(frame)
+
+    def control():
+        for i in range(20):
+            server._broadcast({"type": "control", "name": "pga", "value": i, "source": "ENGR"})
+
+    threads = [threading.Thread(target=forward), threading.Thread(target=control)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    messages = FrameDecoder().feed(bytes(connection.received))
+    assert [decode_frame(message)["sequence"] for kind, message in messages if kind == "frame"] == list(range(20))
+    assert sum(kind == "line" for kind, message in messages) == 20
+
+
+def test_malformed_lines_do_not_drop_the_batch():
+    text = (
+        '{"type": "control", "name": "pga", "value": 3, "source": "ENGR"}\n'
+        '{"type": "data", "value": [1.0, 0.5], "sour\n'
+        '[1, 2]\n'
+        '\n'
+        '{"type": "data", "value": [2.0, 0.25], "source": "ENGR"}\n'
+    )
+    messages = parse_json_lines(text)
+
+    assert [message["type"] for message in messages] == ["control", "data"]
+    assert messages[1]["value"] == [2.0, 0.25]
+
+
+class BrokenSocket(SlowSocket):
+    """ A socket whose peer went away. """
+
+    def __init__(self):
+        super().__init__()
+        self.shut_down = False
+
+    def sendall(self, data: bytes):
+        raise BrokenPipeError("broken pipe")
+
+    def shutdown(self, how):
+        self.shut_down = True
+
+
+class ClosingWriter:
+    """ A stream writer whose transport is closing. """
+
+    def __init__(self):
+        self.closed = False
+
+    def is_closing(self) -> bool:
+        return True
+
+    def close(self):
+        self.closed = True
+
+
+def test_failed_send_to_cs_drops_only_cs():
+    server = SocketServer()
+    cs, engr = BrokenSocket(), SlowSocket()
+    server._register("CS", cs, None)
+    server._register("ENGR", engr, None)
+
+    server._forward_frame(encode_frame([0.0], [1.0], "ENGR", stream=7, sequence=0))
+    server._broadcast({"type": "control", "name": "pga", "value": 1, "source": "ENGR"}, exclude="ENGR")
+
+    assert server.clients["CS"] is None and cs.shut_down
+    assert server.clients["ENGR"] is engr
+    status = [message for kind, message in FrameDecoder().feed(bytes(engr.received)) if kind == "line"]
+    assert status == ['{"source": "socket", "type": "status", "peer_id": "CS", "status": "disconnected"}']
+
+
+def test_threaded_server_sends_to_any_client_id():
+    server = SocketServer()
+    viewer = SlowSocket()
+    server._register("VIEWER", viewer, None)
+    server._send_bytes("VIEWER", b"hello\n")
+
+    assert bytes(viewer.received) == b"hello\n"
+
+
+def test_async_server_drops_closing_client():
+    server = AsyncSocketServer()
+    server.binary_clients.add("CS")
+    server._register("CS", writer := ClosingWriter(), None)
+
+    server._forward_frame(encode_frame([0.0], [1.0], "ENGR", stream=7, sequence=0))
+
+    assert server.clients["CS"] is None and writer.closed
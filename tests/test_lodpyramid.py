@@ -0,0 +1,46 @@
+import numpy as np
+
+from LODPyramid import LODPyramid
+
+
+def _signal(samples, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.arange(samples) / 100, rng.standard_normal(samples).astype(np.float32)
+
+
+def test_levels_hold_bin_extremes():
+    x, y = _signal(10_000)
+    pyramid = LODPyramid(x, y, factor=4, min_bins=16)
+
+    for level in range(1, len(pyramid.levels)):
+        size = 4 ** level
+        mins, maxs = pyramid.levels[level]
+        assert len(mins) == -(-len(y) // size)
+        np.testing.assert_array_equal(mins, [y[i:i + size].min() for i in range(0, len(y), size)])
+        np.testing.assert_array_equal(maxs, [y[i:i + size].max() for i in range(0, len(y), size)])
+    assert len(pyramid.levels[-1][0]) <= 16
+
+
+def test_extend_matches_a_full_build():
+    x, y = _signal(50_000)
+    pyramid = LODPyramid(x[:100], y[:100], min_bins=8) # grows new levels as data arrives
+    for stop in [101, 257, 1000, 4096, 4097, 20_000, 50_000]:
+        pyramid.extend(x[:stop], y[:stop])
+        built = LODPyramid(x[:stop], y[:stop], min_bins=8)
+
+        assert len(pyramid.levels) == len(built.levels)
+        for (mins, maxs), (built_mins, built_maxs) in zip(pyramid.levels, built.levels):
+            np.testing.assert_array_equal(mins, built_mins)
+            np.testing.assert_array_equal(maxs, built_maxs)
+
+
+def test_peaks_keep_extremes_of_the_range():
+    x, y = _signal(100_000)
+    pyramid = LODPyramid(x, y, background=True)
+    pyramid.ready.wait()
+
+    x_out, y_out = pyramid.peaks(1000, 90_000, 2000)
+    assert len(y_out) <= 2000
+    # bins are aligned to the level, so they may reach a little past the range
+    assert y_out.max() >= y[1000:90_000].max() and y_out.min() <= y[1000:90_000].min()
+    assert np.all(np.diff(x_out) >= 0)
@@ -0,0 +1,38 @@
+import numpy as np
+
+from SampleStore import SampleStore
+
+
+def test_append_grows_past_the_capacity():
+    store = SampleStore(capacity=4)
+    for first in range(0, 100, 7):
+        times = np.arange(first, first + 7, dtype=np.float64)
+        store.append(times, times * 2)
+
+    assert len(store) == 105
+    np.testing.assert_array_equal(store.times, np.arange(105))
+    np.testing.assert_array_equal(store.values, np.arange(105) * 2)
+    assert store.times.dtype == np.float64 and store.values.dtype == np.float32
+
+
+def test_views_are_snapshots():
+    store = SampleStore(capacity=8)
+    store.append(np.arange(6, dtype=np.float64), np.ones(6))
+    times, values = store.view()
+    inner_times, _ = store.view(2, 4)
+
+    store.append(np.arange(6, 20, dtype=np.float64), np.zeros(14)) # grows
+    store.append(np.arange(20, 22, dtype=np.float64), np.zeros(2))
+
+    assert times.tolist() == list(range(6)) and values.tolist() == [1.0] * 6
+    assert inner_times.tolist() == [2.0, 3.0]
+    assert len(store.view(18)[0]) == 4
+    assert len(store.view(0, 1000)[0]) == 22
+
+
+def test_views_do_not_copy():
+    store = SampleStore(capacity=16)
+    store.append(np.arange(10, dtype=np.float64), np.arange(10))
+
+    assert np.shares_memory(store.times, store.view(3, 7)[0])
+    assert store.times.base is not None
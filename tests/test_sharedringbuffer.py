@@ -0,0 +1,63 @@
+import uuid
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+
+from SharedRingBuffer import SharedRingBuffer
+
+
+@pytest.fixture
+def ring():
+    consumer = SharedRingBuffer.create(f"test_ring_{uuid.uuid4().hex[:8]}", capacity=100, channels=2)
+    # attach would unregister the memory from this process's resource tracker, meant for a producer process
+    producer = SharedRingBuffer(shared_memory.SharedMemory(name=consumer.name), owner=False)
+    yield producer, consumer
+    producer.close()
+    consumer.close()
+
+
+def _samples(first, count):
+    times = np.arange(first, first + count, dtype=np.float64)
+    return times, np.vstack([times, -times])
+
+
+def test_wraparound(ring):
+    producer, consumer = ring
+    read = []
+    for first in range(0, 1000, 70): # every write after the first wraps around the end at some point
+        assert producer.write(*_samples(first, 70), acquired=1.0 + first) == 70
+        times, values, acquired = consumer.read()
+        read.append(times)
+        np.testing.assert_array_equal(values, np.vstack([times, -times]))
+        assert np.all(acquired == 1.0 + first)
+
+    np.testing.assert_array_equal(np.concatenate(read), np.arange(0, 1050))
+    assert producer.dropped == 0 and consumer.available() == 0
+
+
+def test_overrun_drops_what_does_not_fit(ring):
+    producer, consumer = ring
+    assert producer.write(*_samples(0, 60)) == 60
+    assert producer.write(*_samples(60, 60)) == 40 # full, no waiting
+    assert consumer.dropped == 20
+
+    times, _, _ = consumer.read(max_samples=30)
+    assert times.tolist() == list(range(30))
+    assert producer.write(*_samples(100, 50), timeout=0.01) == 30
+    assert consumer.dropped == 40
+
+    times, values, _ = consumer.read()
+    assert times.tolist() == list(range(30, 100)) + list(range(100, 130))
+    assert values.shape == (2, 100)
+    assert len(consumer.read()[0]) == 0
+
+
+def test_producer_close_and_invalid_memory(ring):
+    producer, consumer = ring
+    assert not consumer.closed
+    producer.close_producer()
+    assert consumer.closed
+
+    with pytest.raises(FileNotFoundError):
+        SharedRingBuffer.attach(f"missing_ring_{uuid.uuid4().hex[:8]}")
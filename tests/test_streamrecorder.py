@@ -0,0 +1,47 @@
+import glob
+import threading
+import time
+
+import numpy as np
+
+import windaq
+from StreamRecorder import StreamRecorder
+
+
+def _block(stream, sequence, times, values):
+    return {"stream": stream, "sequence": sequence, "source": "ENGR",
+            "times": np.asarray(times, dtype=np.float64), "values": np.atleast_2d(values)}
+
+
+def test_recording_keeps_sample_times_across_interleaved_streams(tmp_path):
+    recorder = StreamRecorder(str(tmp_path), sync_interval=0.05)
+    recorder.record_block(_block(7, 0, [0.0, 0.001, 0.002], [1.0, 2.0, 3.0]))
+    recorder.record_block(_block(0, 0, [0.5, 0.75], [4.0, 5.0])) # wrapped JSON data, after a pause
+    recorder.record_block(_block(7, 1, [2.0, 2.001], [6.0, 12.0])) # clipped at 10 V
+    recorder.close()
+
+    files = glob.glob(str(tmp_path / "*.WDQ"))
+    assert len(files) == 1
+    times = windaq.read_sample_times(files[0], 7)
+    assert times.tolist() == [0.0, 0.001, 0.002, 0.5, 0.75, 2.0, 2.001]
+    assert recorder.clipped == 1
+    assert recorder.missing_frames == 0
+
+
+def test_stalled_writer_drops_oldest_blocks(tmp_path, monkeypatch):
+    release = threading.Event()
+    write = StreamRecorder._write
+    monkeypatch.setattr(StreamRecorder, "_write", lambda self, *args: release.wait() and write(self, *args))
+    recorder = StreamRecorder(str(tmp_path), sync_interval=0.05, queue_maxsize=3)
+    recorder.record_block(_block(7, 0, [0.0], [1.0]))
+    while recorder._queue.qsize(): # taken by the writer, which stalls
+        time.sleep(0.001)
+    for sequence in range(1, 6):
+        recorder.record_block(_block(7, sequence, [float(sequence)], [1.0]))
+    release.set()
+    recorder.close()
+
+    # 2 of the 5 blocks queued behind the stalled one did not fit
+    assert recorder.dropped == 2
+    files = glob.glob(str(tmp_path / "*.WDQ"))
+    assert windaq.read_sample_times(files[0], 4).tolist() == [0.0, 3.0, 4.0, 5.0]
@@ -0,0 +1,43 @@
+import numpy as np
+
+import windaq
+
+
+def _single_channel_reader(comments = b''):
+    ''' a reader with the frame layout of an unpacked single channel file, no file behind it '''
+    reader = windaq.windaq.__new__(windaq.windaq)
+    reader._frameWords = 1
+    reader._frameSets = 1
+    reader._setOfWord = np.zeros(1, dtype=np.int64)
+    reader._markerComments = comments
+    return reader
+
+
+def test_stamped_eventmarker_keeps_its_stamp():
+    trailer = np.array([10, 20 | 0x80000000, 1700000000, 30, 40], dtype=np.uint32).astype('<u4').tobytes()
+    markers = _single_channel_reader()._read_eventmarkers(trailer)
+
+    assert markers['index'].tolist() == [10, 20, 30, 40]
+    assert markers['type'].tolist() == [0, windaq.windaq.STAMPED, 0, 0]
+    assert markers['timestamp'].tolist() == [0, 1700000000, 0, 0]
+
+
+def test_truncated_stamp_is_ignored():
+    trailer = np.array([10, 20 | 0x80000000], dtype=np.uint32).astype('<u4').tobytes()
+    markers = _single_channel_reader()._read_eventmarkers(trailer)
+
+    assert markers['index'].tolist() == [10, 20]
+    assert markers['timestamp'].tolist() == [0, 0]
+
+
+def test_writer_keeps_uneven_times(tmp_path):
+    path = str(tmp_path / "live.WDQ")
+    times = np.concatenate([np.arange(100)*1e-3, 5 + np.arange(100)*2e-3])
+    with windaq.windaqWriter(path, keepTimes=True) as writer:
+        writer.write(times, np.linspace(-12, 12, len(times)))
+        writer.add_comment(5.0, "after the gap")
+
+    reader = windaq.windaq(path)
+    assert np.array_equal(windaq.read_sample_times(path, reader.nSample), times)
+    assert writer.clipped == np.count_nonzero(np.abs(np.linspace(-12, 12, len(times))) > 10)
+    assert reader.eventmarkers['index'].tolist() == [100]